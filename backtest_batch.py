@@ -0,0 +1,265 @@
+# backtest_batch.py
+"""
+Multi-date V2 backtest: din process pool me, ek login, shared candle cache.
+
+    python backtest_batch.py --from 2025-01-01 --to 2025-03-31 --expiry live
+
+Pool "spawn" context se banta hai (uvicorn threadpool se bhi safe - fork
+parent ke locks / shared requests.Session copy kar leta). Parent ke login
+ke tokens (jwt / refresh / feed) initargs me jaate hain aur har worker unse
+apna SmartConnect banata hai - login / engine import per worker ek baar,
+har din pe nahi. Candle cache disk pe hai, isliye sab workers ek hi cache
+padhte / bharte hain. Broker rate limit workers me baant diya jaata hai
+(HIST_LIMITER per process = rate / workers). Record mode (cassette) me
+pool nahi banta - din inline chalte hain, ek hi RecordingBroker likhta hai.
+
+Output NDJSON: har din ek {"type": "day", ...} line (complete hote hi),
+aakhri line {"type": "summary", ...} - P&L, win rate, max drawdown.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import (
+    APIKEY,
+    BACKTESTDIR,
+    BACKTEST_BATCH_WORKERS,
+    BROKER_MODE,
+    SMARTAPI_HIST_RATE_PER_SEC,
+    SMARTAPI_HIST_BURST,
+)
+
+
+# Session attributes jo worker ka SmartConnect banane ke liye chahiye
+_SESSION_ATTRS = ("api_key", "access_token", "refresh_token", "feed_token", "userId")
+
+# Sirf worker process me set (_init_worker); parent kabhi nahi likhta
+_WORKER_API = None
+
+
+def _json_default(obj: Any) -> Any:
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+def _json_safe(obj: Any) -> Any:
+    return json.loads(json.dumps(obj, default=_json_default))
+
+
+def _day_pnl(result: Dict[str, Any]) -> Optional[float]:
+    pnl = (result.get("trade_details") or {}).get("pnl_points")
+    return float(pnl) if pnl is not None else None
+
+
+def session_args(api) -> Dict[str, str]:
+    """Logged-in SmartConnect ke tokens (picklable) - worker apna session banaye."""
+    out = {}
+    for name in _SESSION_ATTRS:
+        value = getattr(api, name, None)
+        if isinstance(value, str) and value:
+            out[name] = value
+    return out
+
+
+def _init_worker(workers: int, session: Dict[str, str]) -> None:
+    global _WORKER_API
+    import candle_fetcher
+    from broker import create_smartconnect
+
+    # Broker limit poore pool ka hai, har process ko apna hissa
+    candle_fetcher.HIST_LIMITER = candle_fetcher.TokenBucket(
+        SMARTAPI_HIST_RATE_PER_SEC / workers,
+        max(1, SMARTAPI_HIST_BURST // workers),
+    )
+
+    # Apna SmartConnect (apna requests.Session), parent ke jwt se - dobara login nahi
+    session = dict(session)
+    api_key = session.pop("api_key", None) or APIKEY
+    _WORKER_API = create_smartconnect(api_key, **session)
+
+
+def run_day(trade_date: str, expiry: str, api=None) -> Dict[str, Any]:
+    """Ek din: inline (api diya) ya worker process me (_WORKER_API)."""
+    from vix_server import build_v2_backtest_request, run_v2_backtest_day
+
+    api = api if api is not None else _WORKER_API
+    started = time.time()
+    try:
+        v1req = build_v2_backtest_request(trade_date, expiry)
+        result = _json_safe(run_v2_backtest_day(api, v1req))
+        status = result.get("status")
+    except Exception as e:
+        result = {"status": "error", "message": str(e)}
+        status = "error"
+
+    return {
+        "type": "day",
+        "date": trade_date,
+        "expiry": expiry,
+        "status": status,
+        "mode": result.get("mode") or result.get("orb_mode"),
+        "side": result.get("primary_side"),
+        "pnl": _day_pnl(result),
+        "elapsed": round(time.time() - started, 2),
+        "result": result,
+    }
+
+
+def batch_trading_days(api, date_from: str, date_to: str) -> List[date]:
+    from trading_calendar import get_trading_calendar
+
+    d_from = datetime.strptime(date_from, "%Y-%m-%d").date()
+    d_to = datetime.strptime(date_to, "%Y-%m-%d").date()
+    cal = get_trading_calendar(api, need_until=d_to, need_from=d_from)
+    return cal.sessions_between(d_from, min(d_to, date.today()))
+
+
+def iter_batch(
+    api,
+    days: List[date],
+    expiry_policy: str = "live",
+    workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Day records, jis order me complete hon."""
+    from prefetch_history import pick_expiry
+
+    jobs = [(d.strftime("%Y-%m-%d"), pick_expiry(d, expiry_policy)) for d in days]
+    if not jobs:
+        return
+
+    workers = min(workers or BACKTEST_BATCH_WORKERS, os.cpu_count() or 1, len(jobs))
+    if workers > 1 and (BROKER_MODE or "").lower() == "record":
+        # Cassette ka ek hi writer: har worker same file pe gzip members
+        # interleave karke cassette corrupt kar deta
+        print("[BATCH] record mode: running inline, one cassette writer")
+        workers = 1
+
+    if workers <= 1:
+        for ds, expiry in jobs:
+            yield run_day(ds, expiry, api)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(workers, session_args(api)),
+    ) as pool:
+        futures = {pool.submit(run_day, ds, expiry): ds for ds, expiry in jobs}
+        for fut in as_completed(futures):
+            try:
+                yield fut.result()
+            except Exception as e:
+                # worker crash (BrokenProcessPool etc.)
+                yield {"type": "day", "date": futures[fut], "status": "error",
+                       "pnl": None, "result": {"status": "error", "message": str(e)}}
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Date order me cumulative P&L se win rate / drawdown."""
+    ordered = sorted(records, key=lambda r: r["date"])
+    pnls = [r["pnl"] for r in ordered if r.get("pnl") is not None]
+
+    equity = peak = max_dd = 0.0
+    for p in pnls:
+        equity += p
+        peak = max(peak, equity)
+        max_dd = max(max_dd, peak - equity)
+
+    wins = sum(1 for p in pnls if p > 0)
+    losses = sum(1 for p in pnls if p < 0)
+    status_counts: Dict[str, int] = {}
+    for r in ordered:
+        key = str(r.get("status"))
+        status_counts[key] = status_counts.get(key, 0) + 1
+
+    return {
+        "type": "summary",
+        "days": len(ordered),
+        "traded": len(pnls),
+        "wins": wins,
+        "losses": losses,
+        "win_rate": round(wins / len(pnls), 4) if pnls else 0.0,
+        "total_pnl": round(sum(pnls), 2),
+        "avg_pnl": round(sum(pnls) / len(pnls), 2) if pnls else 0.0,
+        "max_drawdown": round(max_dd, 2),
+        "status_counts": status_counts,
+        "errors": [r["date"] for r in ordered if r.get("status") == "error"],
+    }
+
+
+def iter_batch_ndjson(
+    api,
+    days: List[date],
+    expiry_policy: str = "live",
+    workers: Optional[int] = None,
+) -> Iterator[str]:
+    """NDJSON lines: har din, phir summary."""
+    started = time.time()
+    records: List[Dict[str, Any]] = []
+    for rec in iter_batch(api, days, expiry_policy, workers):
+        records.append(rec)
+        yield json.dumps(rec, default=_json_default) + "\n"
+
+    summary = summarize(records)
+    summary["elapsed"] = round(time.time() - started, 1)
+    yield json.dumps(summary) + "\n"
+
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="V2 backtest over a date range (process pool)")
+    p.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+    p.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+    p.add_argument("--expiry", default="live",
+                   help="live | current | INDEX | YYYY-MM-DD (default live)")
+    p.add_argument("--workers", type=int, default=None,
+                   help=f"processes (default min(cpu, {BACKTEST_BATCH_WORKERS}))")
+    p.add_argument("--out", default=None,
+                   help="NDJSON file (default BACKTESTDIR/batch_<from>_<to>.ndjson)")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    from smartapi_helpers import smartlogin
+
+    api = smartlogin()
+    if api is None:
+        print("[BATCH] login failed", file=sys.stderr)
+        return 1
+
+    days = batch_trading_days(api, args.date_from, args.date_to)
+    print(f"[BATCH] sessions={len(days)} expiry={args.expiry}", file=sys.stderr)
+
+    out_path = args.out or os.path.join(
+        BACKTESTDIR, f"batch_{args.date_from}_{args.date_to}.ndjson"
+    )
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+
+    # Engine stdout pe bahut print karta hai, isliye results file me
+    line = ""
+    with open(out_path, "w", encoding="utf-8") as out:
+        for line in iter_batch_ndjson(api, days, args.expiry, args.workers):
+            out.write(line)
+            out.flush()
+
+    print("[BATCH] wrote", out_path, file=sys.stderr)
+    print("[BATCH] summary", line.strip(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,15 @@ from typing import Dict, Any
 import math
 from datetime import datetime, time
 
+import numpy as np
 import pandas as pd
 
 from config import BOT3_HIGH_VOL_THRESHOLD
 
+from breakout_scanner import BOT3_915, scan_day
+from multi_timeframe import bars_for
 from gann_engine import get_gann_row_from_json
+from gann_mapping_engine import BOT3_ATR_MULT, levels_to_ladder, map_bot3_batch
 
 
 # ===== Common Helpers =====
@@ -69,17 +73,13 @@ def run_bot3_method_a(
     late_cutoff = datetime.combine(tradedate, time(13, 30))
     eod_cutoff = datetime.combine(tradedate, time(15, 0))
 
-    search_df = idx1m[(idx1m.index >= entry_cutoff)
-                      & (idx1m.index <= eod_cutoff)]
-
     entry_time = None
     entry_rule = None
-    for ts, row in search_df.iterrows():
-        if row["low"] <= primary_entry <= row["high"]:
-            entry_time = ts
-            is_late = ts >= late_cutoff
-            entry_rule = "ORB_LATE" if is_late else "ATR_NORMAL"
-            break
+    pos = bars_for(idx1m).passage.first_touch(primary_entry, after=entry_cutoff, until=eod_cutoff)
+    if pos is not None:
+        entry_time = idx1m.index[pos]
+        is_late = entry_time >= late_cutoff
+        entry_rule = "ORB_LATE" if is_late else "ATR_NORMAL"
 
     if entry_time is None:
         return {"status": "SKIP_METHOD_A", "reason": "NO_ENTRY_CANDLE"}
@@ -172,12 +172,7 @@ def detect_bot3_method(
             "ratio_915_atr": 0.0,
         }
 
-    tradedate = idx1m.index[0].date()
-
-    start_915 = datetime.combine(tradedate, time(9, 15))
-    end_930 = datetime.combine(tradedate, time(9, 30))
-
-    win_915 = idx1m[(idx1m.index >= start_915) & (idx1m.index < end_930)]
+    win_915 = bars_for(idx1m).session_frame("ORB_915")
     if win_915.empty:
         return {
             "method": "B",
@@ -240,15 +235,9 @@ def build_bot3_breakout_context(
                 "marked_low": None,
             }
 
-    tradedate = idx1m.index[0].date()
-
-    # 9:15–9:30 marking window (ORB style, bas time alag)
-    mark_start = datetime.combine(tradedate, time(9, 15))
-    mark_end = datetime.combine(tradedate, time(9, 30))
-    bo_window_end = datetime.combine(tradedate, time(12, 15))
-
-    marking = idx1m[(idx1m.index >= mark_start) & (idx1m.index < mark_end)]
-    if marking.empty:
+    # 9:15–9:30 marking, 9:30–12:15 bars ki 15-min candles (breakout_scanner kernel)
+    day = scan_day(idx1m, BOT3_915)
+    if not day.has_mark:
         return {
             "status": "ERROR",
             "bo_side": None,
@@ -259,18 +248,13 @@ def build_bot3_breakout_context(
         }
 
     # ORB pattern: raw mark, phir rounded triggers
-    marked_high = float(marking["high"].max())
-    marked_low = float(marking["low"].min())
+    marked_high = day.marked_high
+    marked_low = day.marked_low
 
     rounded_buy_trigger = round_index_price_for_side(marked_high, "BUY")
     rounded_sell_trigger = round_index_price_for_side(marked_low, "SELL")
 
-    # 9:30–12:15 ORB-style trigger window
-    trigger_df = idx1m[
-        (idx1m.index >= mark_end) &
-        (idx1m.index <= bo_window_end)
-    ]
-    if trigger_df.empty:
+    if day.scan_bars == 0:
         return {
             "status": "NO_BO",
             "bo_side": None,
@@ -280,38 +264,19 @@ def build_bot3_breakout_context(
             "marked_low": marked_low,
         }
 
-    # 15-min resample
-    agg = {"open": "first", "high": "max", "low": "min", "close": "last"}
-    trigger15 = trigger_df.resample("15min").agg(agg).dropna()
-
-    bo_side = None
-    bo_time = None
-    bo_close = None
-
-    for ts, row in trigger15.iterrows():
-        close_price = float(row["close"])
-        high_price = float(row["high"])
-        low_price = float(row["low"])
-
+    checked = day.candles if day.hit < 0 else day.candles.iloc[: day.hit + 1]
+    for ts, close_price, high_price, low_price in zip(
+        checked.index, checked["close"].tolist(), checked["high"].tolist(), checked["low"].tolist()
+    ):
         print(
             f"[BOT3-ORB-STYLE-15M] {ts} close={close_price} "
             f"high={high_price} low={low_price} "
             f"rbuy={rounded_buy_trigger} rsell={rounded_sell_trigger}"
         )
 
-        # BUY breakout
-        if close_price >= rounded_buy_trigger:
-            bo_side = "BUY"
-            bo_time = ts
-            bo_close = round_index_price_for_side(close_price, "BUY")
-            break
-
-        # SELL breakout
-        if close_price <= rounded_sell_trigger:
-            bo_side = "SELL"
-            bo_time = ts
-            bo_close = round_index_price_for_side(close_price, "SELL")
-            break
+    bo_side = day.side
+    bo_time = day.time
+    bo_close = day.price  # close, BUY ceil / SELL floor
 
     if bo_side is None:
         return {
@@ -351,76 +316,42 @@ def map_bot3_gann_levels(
 
     Target dono me same: base_entry +/- ATR * 1.5 closest level
     SL dono me same: BUY SL = sell_entry, SELL SL = buy_entry
-    """
-
-    def pick_buy_target(base_entry: float) -> float:
-        if atr14 <= 0:
-            return float(gann_levels.get("buy_t2", 0.0))
-        raw_target = base_entry + atr14 * 1.5
-        candidates = [
-            gann_levels.get("buy_t2", 0.0),
-            gann_levels.get("buy_t25", 0.0),
-            gann_levels.get("buy_t3", 0.0),
-            gann_levels.get("buy_t35", 0.0),
-            gann_levels.get("buy_t4", 0.0),
-        ]
-        below = [x for x in candidates if x <= raw_target]
-        result = max(below) if below else min(candidates)
-        print(
-            f"[BOT3-TARGET] BUY base={base_entry:.2f} raw={raw_target:.2f} target={result:.2f}"
-        )
-        return float(result)
-
-    def pick_sell_target(base_entry: float) -> float:
-        if atr14 <= 0:
-            return float(gann_levels.get("sell_t2", 0.0))
-        raw_target = base_entry - atr14 * 1.5
-        candidates = [
-            gann_levels.get("sell_t2", 0.0),
-            gann_levels.get("sell_t25", 0.0),
-            gann_levels.get("sell_t3", 0.0),
-            gann_levels.get("sell_t35", 0.0),
-            gann_levels.get("sell_t4", 0.0),
-        ]
-        above = [x for x in candidates if x >= raw_target]
-        result = min(above) if above else max(candidates)
-        print(
-            f"[BOT3-TARGET] SELL base={base_entry:.2f} raw={raw_target:.2f} target={result:.2f}"
-        )
-        return float(result)
 
-    # OPP entry method ke hisaab se
-    if method == "A":
-        opp_buy_entry_key = "buy_t2"
-        opp_sell_entry_key = "sell_t2"
-    else:  # Method B
-        opp_buy_entry_key = "buy_entry"
-        opp_sell_entry_key = "sell_entry"
-
-    if bo_side == "BUY":
-        primary_entry = float(gann_levels.get("buy_t15", 0.0))
-        primary_sl = float(gann_levels.get("sell_entry", 0.0))
-        primary_target = pick_buy_target(
-            float(gann_levels.get("buy_entry", 0.0)))
-
-        opp_entry = float(gann_levels.get(opp_sell_entry_key, 0.0))
-        opp_sl = float(gann_levels.get("buy_entry", 0.0))
-        opp_target = pick_sell_target(
-            float(gann_levels.get("sell_entry", 0.0)))
-
-    elif bo_side == "SELL":
-        primary_entry = float(gann_levels.get("sell_t15", 0.0))
-        primary_sl = float(gann_levels.get("buy_entry", 0.0))
-        primary_target = pick_sell_target(
-            float(gann_levels.get("sell_entry", 0.0)))
-
-        opp_entry = float(gann_levels.get(opp_buy_entry_key, 0.0))
-        opp_sl = float(gann_levels.get("sell_entry", 0.0))
-        opp_target = pick_buy_target(float(gann_levels.get("buy_entry", 0.0)))
+    Rules gann_mapping_engine.map_bot3_batch me hain (n=1 call).
+    """
 
-    else:
+    if bo_side not in ("BUY", "SELL"):
         return {}
 
+    m = map_bot3_batch(
+        levels_to_ladder(gann_levels, mark_missing_t15=False),
+        is_buy_bo=np.array([bo_side == "BUY"]),
+        atr14=np.array([float(atr14)]),
+        is_method_a=np.array([method == "A"]),
+    )
+    primary_entry = float(m["primary_entry"][0])
+    primary_sl = float(m["primary_sl"][0])
+    primary_target = float(m["primary_target"][0])
+    opp_entry = float(m["opp_entry"][0])
+    opp_sl = float(m["opp_sl"][0])
+    opp_target = float(m["opp_target"][0])
+
+    if atr14 > 0:
+        buy_base = float(gann_levels.get("buy_entry", 0.0))
+        sell_base = float(gann_levels.get("sell_entry", 0.0))
+        buy_t = primary_target if bo_side == "BUY" else opp_target
+        sell_t = opp_target if bo_side == "BUY" else primary_target
+        legs = [
+            ("BUY", buy_base, buy_base + atr14 * BOT3_ATR_MULT, buy_t),
+            ("SELL", sell_base, sell_base - atr14 * BOT3_ATR_MULT, sell_t),
+        ]
+        if bo_side == "SELL":
+            legs.reverse()
+        for side, base, raw, tgt in legs:
+            print(
+                f"[BOT3-TARGET] {side} base={base:.2f} raw={raw:.2f} target={tgt:.2f}"
+            )
+
     print(
         f"[BOT3-GANN-MAP] method={method} bo_side={bo_side}\n"
         f"  PRIMARY: entry={primary_entry} sl={primary_sl} target={primary_target}\n"
@@ -521,13 +452,8 @@ def run_bot3_high_vol_strategy(
         f"threshold={BOT3_HIGH_VOL_THRESHOLD}"
     )
 
-    # ---------- 1) 1-min -> 15-min ----------
-    idx15 = (
-        idxdf_1min
-        .resample("15min")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-        .dropna()
-    )
+    # ---------- 1) 1-min -> 15-min (multi_timeframe cache, breakout scan bhi yahi use karta hai) ----------
+    idx15 = bars_for(idxdf_1min).bars_15m
 
     # ---------- 2) 15-min ATR(14) ----------
     high_low = idx15["high"] - idx15["low"]
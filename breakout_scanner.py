@@ -0,0 +1,291 @@
+# breakout_scanner.py
+"""
+ORB breakout scanner - sab ORB variants ka ek array kernel.
+
+Har variant same kaam karta hai: ek window ka high/low mark, scan window ke
+1-min bars ko 15-min candles me jodo, pehli candle jiska close mark ke
+bahar band ho. Farak sirf windows, strict vs inclusive compare, level
+rounding aur trigger price (candle high/low ya close) ka hai - wo
+BreakoutSpec me hai.
+
+    scan = scan_breakouts(idx1m_many_days, ORB_10AM_MARKING)   # batch, per-bar Python nahi
+    scan.frame()                                                # per day ek row
+
+    day = scan_day(idx1m, ORB_10AM_MARKING)                     # single day (rules ke liye)
+
+Index sorted, tz-naive DatetimeIndex hona chahiye (candle data hota hai).
+15-min buckets pandas resample("15min") jaise hi: :00/:15/:30/:45, khali
+ya NaN buckets drop.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from multi_timeframe import (
+    DAY_NS,
+    RULE_NS,
+    MultiTimeframeBars,
+    aggregate_ohlc,
+    as_ns,
+    bars_for,
+    segment_starts,
+)
+from price_rounding import round_index_price_for_side
+
+
+BUCKET_NS = RULE_NS["15min"]
+_NO_END = np.iinfo(np.int64).max
+
+
+@dataclass(frozen=True)
+class BreakoutSpec:
+    mark_start: Optional[time]          # marking bars [mark_start, mark_end)
+    mark_end: Optional[time]
+    scan_start: Optional[time]          # scan bars (1-min) window
+    scan_end: Optional[time] = None     # None -> din ke end tak
+    scan_start_inclusive: bool = True
+    scan_end_inclusive: bool = True
+    strict: bool = True                 # close > high / close < low; False -> >= / <=
+    level_rounding: Optional[str] = None  # None | "next_int" | "ceil" (mark levels pe)
+    price: str = "extreme"              # "extreme" (BUY high / SELL low) | "close"
+    price_rounding: Optional[str] = None  # price="close" ke liye
+
+
+# 10:00 ORB, full 15-min candles 10:15 .. 12:15 (get_orb_breakout_15min)
+ORB_10AM_15M = BreakoutSpec(time(10, 0), time(10, 15), time(10, 15), time(12, 30),
+                            scan_end_inclusive=False)
+# 12:30 mid-day ORB, 12:45 ke baad EOD tak (get_midday_orb_breakout_15min)
+MIDDAY_1230 = BreakoutSpec(time(12, 30), time(12, 45), time(12, 45), None,
+                           strict=False, level_rounding="next_int",
+                           price="close", price_rounding="next_int")
+# 10:00 marking, 10:15-12:30 bars (get_marking_and_trigger)
+ORB_10AM_MARKING = BreakoutSpec(time(10, 0), time(10, 15), time(10, 15), time(12, 30),
+                                strict=False, level_rounding="next_int",
+                                price="close", price_rounding="next_int")
+# Bot-3 9:15 marking, 9:30-12:15 bars (build_bot3_breakout_context)
+BOT3_915 = BreakoutSpec(time(9, 15), time(9, 30), time(9, 30), time(12, 15),
+                        strict=False, level_rounding="ceil",
+                        price="close", price_rounding="ceil")
+# 9:15 ORB bot, 9:30 se EOD (run_915_orb_gann_backtest_logic)
+ORB_915 = BreakoutSpec(time(9, 15), time(9, 30), time(9, 30), None,
+                       price="close", price_rounding="next_int")
+# CHOTI re-ORB: marks + scan start caller deta hai, 12:00 tak (apply_choti_rule)
+CHOTI_REORB = BreakoutSpec(None, None, None, time(12, 0), scan_start_inclusive=False)
+
+
+def _tod_ns(t: time) -> int:
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 10**9 + t.microsecond * 1000
+
+
+def _round_up(x: np.ndarray, rule: Optional[str]) -> np.ndarray:
+    if rule == "next_int":
+        return np.floor(x) + 1
+    if rule == "ceil":
+        return np.ceil(x)
+    return x
+
+
+def _round_down(x: np.ndarray, rule: Optional[str]) -> np.ndarray:
+    return np.floor(x) if rule else x
+
+
+def round_price(price: float, side: str, rule: Optional[str]):
+    """Scalar version - rules ke result dicts me purane types (int / float) rehte hain."""
+    if rule == "next_int":
+        return round_index_price_for_side(price, side)
+    if rule == "ceil":
+        return float(math.ceil(price)) if side == "BUY" else float(math.floor(price))
+    return price
+
+
+@dataclass
+class BreakoutScan:
+    """Per-day arrays (days order me) + scanned 15-min candles (flat)."""
+    spec: BreakoutSpec
+    days: np.ndarray            # datetime64[D]
+    has_mark: np.ndarray
+    marked_high: np.ndarray
+    marked_low: np.ndarray
+    scan_bars: np.ndarray       # scan window me 1-min bars
+    hit: np.ndarray             # candle position (flat), -1 = breakout nahi
+    side: np.ndarray            # "BUY" / "SELL" / ""
+    price: np.ndarray           # trigger price (vectorized rounding), NaN = nahi
+    candle_time: np.ndarray     # int64 ns
+    candle_day: np.ndarray      # day position
+    candle_open: np.ndarray
+    candle_high: np.ndarray
+    candle_low: np.ndarray
+    candle_close: np.ndarray
+
+    def frame(self) -> pd.DataFrame:
+        """Multi-day studies ke liye: per day ek row."""
+        ok = self.hit >= 0
+        times = np.full(len(self.days), np.datetime64("NaT"), dtype="datetime64[ns]")
+        times[ok] = self.candle_time[self.hit[ok]].astype("datetime64[ns]")
+        return pd.DataFrame({
+            "has_mark": self.has_mark,
+            "marked_high": self.marked_high,
+            "marked_low": self.marked_low,
+            "scan_bars": self.scan_bars,
+            "scan_candles": np.bincount(self.candle_day, minlength=len(self.days)),
+            "side": self.side,
+            "trigger_time": times,
+            "trigger_price": self.price,
+        }, index=pd.DatetimeIndex(self.days, name="date"))
+
+
+def scan_breakouts(
+    df,
+    spec: BreakoutSpec,
+    marked_high=None,
+    marked_low=None,
+    scan_from=None,
+) -> BreakoutScan:
+    """
+    df ke har din pe spec ka breakout scan. marked_high / marked_low /
+    scan_from (per day arrays ya scalar) diye ho to marking window ki jagah
+    wahi use hote hain (CHOTI re-ORB). df: 1-min frame ya MultiTimeframeBars.
+    """
+    bars = df if isinstance(df, MultiTimeframeBars) else bars_for(df)
+    ts, o, h, l, c = bars.ts, bars.open, bars.high, bars.low, bars.close
+
+    day_ns = ts // DAY_NS
+    days = np.unique(day_ns)
+    dpos = np.searchsorted(days, day_ns)
+    tod = ts - day_ns * DAY_NS
+    nd = len(days)
+
+    # ---------- marking ----------
+    if marked_high is None or marked_low is None:
+        mh = np.full(nd, np.nan)
+        ml = np.full(nd, np.nan)
+        m = (tod >= _tod_ns(spec.mark_start)) & (tod < _tod_ns(spec.mark_end))
+        if m.any():
+            md = dpos[m]
+            starts = segment_starts(md)
+            mh[md[starts]] = np.fmax.reduceat(h[m], starts)
+            ml[md[starts]] = np.fmin.reduceat(l[m], starts)
+    else:
+        mh = np.broadcast_to(np.asarray(marked_high, dtype=float), (nd,)).copy()
+        ml = np.broadcast_to(np.asarray(marked_low, dtype=float), (nd,)).copy()
+    has_mark = ~np.isnan(mh) & ~np.isnan(ml)
+
+    # ---------- scan window (1-min bars) ----------
+    if scan_from is not None:
+        lo = np.broadcast_to(as_ns(pd.DatetimeIndex(np.atleast_1d(scan_from))), (nd,))
+    else:
+        lo = days * DAY_NS + _tod_ns(spec.scan_start)
+    hi = days * DAY_NS + _tod_ns(spec.scan_end) if spec.scan_end is not None else np.full(nd, _NO_END)
+    rlo, rhi = lo[dpos], hi[dpos]
+    s = (ts >= rlo) if spec.scan_start_inclusive else (ts > rlo)
+    s &= (ts <= rhi) if spec.scan_end_inclusive else (ts < rhi)
+    scan_bars = np.bincount(dpos[s], minlength=nd)
+
+    # ---------- 15-min candles (resample + dropna jaisa) ----------
+    c_time, c_open, c_high, c_low, c_close, first_row = aggregate_ohlc(
+        ts[s], o[s], h[s], l[s], c[s], BUCKET_NS
+    )
+    c_day = dpos[s][first_row]
+
+    # ---------- breakout ----------
+    up = _round_up(mh, spec.level_rounding)[c_day]
+    down = _round_down(ml, spec.level_rounding)[c_day]
+    if spec.strict:
+        buy, sell = c_close > up, c_close < down
+    else:
+        buy, sell = c_close >= up, c_close <= down
+    hits = np.flatnonzero((buy | sell) & has_mark[c_day])
+
+    hit = np.full(nd, -1, dtype=np.int64)
+    hit_days, first_hit = np.unique(c_day[hits], return_index=True)
+    hit[hit_days] = hits[first_hit]
+
+    side = np.full(nd, "", dtype="<U4")
+    price = np.full(nd, np.nan)
+    if len(hit_days):
+        k = hit[hit_days]
+        is_buy = buy[k]
+        side[hit_days] = np.where(is_buy, "BUY", "SELL")
+        if spec.price == "extreme":
+            price[hit_days] = np.where(is_buy, c_high[k], c_low[k])
+        else:
+            close_k = c_close[k]
+            price[hit_days] = np.where(
+                is_buy,
+                _round_up(close_k, spec.price_rounding),
+                _round_down(close_k, spec.price_rounding),
+            )
+
+    return BreakoutScan(
+        spec=spec,
+        days=(days * DAY_NS).astype("datetime64[ns]").astype("datetime64[D]"),
+        has_mark=has_mark,
+        marked_high=mh,
+        marked_low=ml,
+        scan_bars=scan_bars,
+        hit=hit,
+        side=side,
+        price=price,
+        candle_time=c_time,
+        candle_day=c_day,
+        candle_open=c_open,
+        candle_high=c_high,
+        candle_low=c_low,
+        candle_close=c_close,
+    )
+
+
+class DayBreakout(NamedTuple):
+    trade_date: date
+    has_mark: bool
+    marked_high: float
+    marked_low: float
+    scan_bars: int              # scan window me 1-min bars
+    candles: pd.DataFrame       # scanned 15-min candles (open/high/low/close)
+    hit: int                    # candles me breakout position, -1 = nahi
+    side: Optional[str]
+    time: Optional[pd.Timestamp]
+    price: Optional[float]      # spec ke hisaab se (price_rounding ke purane types ke liye round_price)
+
+
+def scan_day(
+    df: pd.DataFrame,
+    spec: BreakoutSpec,
+    marked_high: Optional[float] = None,
+    marked_low: Optional[float] = None,
+    scan_from: Optional[datetime] = None,
+) -> DayBreakout:
+    """
+    df ke pehle din ka scan (rules isi din ko trade date maante hain).
+    Arrays frame ke cached MultiTimeframeBars se aate hain.
+    """
+    trade_date = df.index[0].date()
+    scan = scan_breakouts(bars_for(df), spec, marked_high, marked_low, scan_from)
+
+    candles = pd.DataFrame(
+        {
+            "open": scan.candle_open,
+            "high": scan.candle_high,
+            "low": scan.candle_low,
+            "close": scan.candle_close,
+        },
+        index=pd.DatetimeIndex(scan.candle_time.astype("datetime64[ns]")),
+    )
+    hit = int(scan.hit[0])
+    return DayBreakout(
+        trade_date=trade_date,
+        has_mark=bool(scan.has_mark[0]),
+        marked_high=float(scan.marked_high[0]),
+        marked_low=float(scan.marked_low[0]),
+        scan_bars=int(scan.scan_bars[0]),
+        candles=candles,
+        hit=hit,
+        side=str(scan.side[0]) if hit >= 0 else None,
+        time=candles.index[hit] if hit >= 0 else None,
+        price=float(scan.price[0]) if hit >= 0 else None,
+    )
@@ -0,0 +1,216 @@
+# broker.py
+
+import gzip
+import json
+import threading
+from collections import deque
+from datetime import date
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from config import BROKER_MODE, BROKER_CASSETTE, CASSETTE_DIR
+
+
+# Sirf yahi calls record / replay hoti hain; baaki live API pe pass-through
+RECORDED_METHODS = ("getCandleData", "ltpData", "placeOrder", "generateSession")
+
+# Cassette me secrets nahi likhne
+_REDACT_KEYS = ("jwtToken", "refreshToken", "feedToken")
+
+
+def _call_key(method: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """
+    Deterministic key for one call.
+    generateSession me password/totp key me nahi aate (sirf client code).
+    """
+    if method == "generateSession":
+        args = args[:1]
+        kwargs = {}
+    return json.dumps([list(args), kwargs], sort_keys=True, default=str)
+
+
+def _redact(resp: Any) -> Any:
+    if isinstance(resp, dict):
+        return {
+            k: ("REDACTED" if k in _REDACT_KEYS else _redact(v))
+            for k, v in resp.items()
+        }
+    return resp
+
+
+def default_cassette_path() -> Path:
+    if BROKER_CASSETTE:
+        return Path(BROKER_CASSETTE)
+    return Path(CASSETTE_DIR) / f"{date.today():%Y-%m-%d}.jsonl.gz"
+
+
+# ========== RECORD ==========
+
+
+class RecordingBroker:
+    """
+    Live SmartConnect ka wrapper: RECORDED_METHODS ka har response
+    gzip JSONL cassette me append hota hai ({"m", "k", "r"} per line).
+    Baaki attributes seedha live object pe jaate hain.
+
+    Candle cache isko bypass karta hai (bypass_candle_cache) - warna cache
+    hit wale din cassette me aate hi nahi aur replay me miss hote.
+    """
+
+    bypass_candle_cache = True
+
+    def __init__(self, api, cassette_path: Path) -> None:
+        self._api = api
+        self._path = Path(cassette_path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        print("[BROKER] recording to", self._path)
+
+    def _record(self, method: str, key: str, resp: Any) -> None:
+        line = json.dumps(
+            {"m": method, "k": key, "r": _redact(resp)}, default=str
+        )
+        with self._lock:
+            # Har line alag gzip member; crash pe bhi pichla data readable rehta hai
+            with gzip.open(self._path, "at", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _wrap(self, method: str):
+        real = getattr(self._api, method)
+
+        def call(*args, **kwargs):
+            resp = real(*args, **kwargs)
+            try:
+                self._record(method, _call_key(method, args, kwargs), resp)
+            except Exception as e:
+                print("[BROKER] record error", method, e)
+            return resp
+
+        return call
+
+    def __getattr__(self, name: str) -> Any:
+        if name in RECORDED_METHODS:
+            return self._wrap(name)
+        return getattr(self._api, name)
+
+
+# ========== REPLAY ==========
+
+
+def load_cassette(path: Path) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except Exception:
+                # Adhuri last line (crash ke waqt) ignore
+                continue
+    return records
+
+
+class ReplayBroker:
+    """
+    Cassette se responses serve karta hai, network nahi.
+
+    - Same (method, key) ke multiple responses record order me milte hain;
+      khatam hone pe last wala repeat.
+    - placeOrder ka exact key na mile to placeOrder ka next unused response.
+    - getCandleData / ltpData miss -> SmartAPI jaisa status False response.
+    """
+
+    bypass_candle_cache = True
+
+    def __init__(self, cassette_path: Path) -> None:
+        self._path = Path(cassette_path)
+        self._lock = threading.Lock()
+        self._responses: List[Any] = []
+        self._by_key: Dict[Tuple[str, str], Deque[int]] = {}
+        self._last: Dict[Tuple[str, str], Any] = {}
+        # Key-less fallback sirf placeOrder ke liye (record order me)
+        self._orders: Deque[int] = deque()
+        self._used: Set[int] = set()
+
+        records = load_cassette(self._path)
+        for i, rec in enumerate(records):
+            self._responses.append(rec["r"])
+            self._by_key.setdefault((rec["m"], rec["k"]), deque()).append(i)
+            if rec["m"] == "placeOrder":
+                self._orders.append(i)
+
+        print("[BROKER] replay from", self._path, "records", len(records))
+
+    @staticmethod
+    def _pop_unused(q: Optional[Deque[int]], used: Set[int]) -> Optional[int]:
+        while q:
+            i = q.popleft()
+            if i not in used:
+                used.add(i)
+                return i
+        return None
+
+    def _next(self, method: str, key: str) -> Tuple[bool, Any]:
+        k = (method, key)
+        with self._lock:
+            i = self._pop_unused(self._by_key.get(k), self._used)
+            if i is not None:
+                resp = self._responses[i]
+                self._last[k] = resp
+                return True, resp
+            if k in self._last:
+                return True, self._last[k]
+            if method == "placeOrder":
+                i = self._pop_unused(self._orders, self._used)
+                if i is not None:
+                    return True, self._responses[i]
+        return False, None
+
+    def _miss(self, method: str) -> Any:
+        print("[BROKER] replay miss", method)
+        if method == "placeOrder":
+            return None
+        if method == "generateSession":
+            return {"status": True, "message": "REPLAY", "errorcode": "", "data": {}}
+        return {
+            "status": False,
+            "message": "not in cassette",
+            "errorcode": "REPLAY404",
+            "data": None,
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in RECORDED_METHODS:
+            def unsupported(*args, **kwargs):
+                print("[BROKER] replay: unsupported call", name)
+                return {"status": False, "message": f"replay: {name} not recorded", "data": None}
+            return unsupported
+
+        def call(*args, **kwargs):
+            hit, resp = self._next(name, _call_key(name, args, kwargs))
+            return resp if hit else self._miss(name)
+
+        return call
+
+
+# ========== FACTORY ==========
+
+
+def create_smartconnect(api_key: str, mode: Optional[str] = None, **kwargs) -> Any:
+    """
+    SmartConnect banane ki single jagah.
+    mode (ya VIXBOT_BROKER_MODE): live | record | replay.
+    """
+    mode = (mode or BROKER_MODE or "live").lower()
+
+    if mode == "replay":
+        return ReplayBroker(default_cassette_path())
+
+    from SmartApi import SmartConnect
+
+    api = SmartConnect(api_key=api_key, **kwargs)
+    if mode == "record":
+        return RecordingBroker(api, default_cassette_path())
+    return api
@@ -0,0 +1,228 @@
+# candle_cache.py
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone, time as dtime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import CANDLE_CACHE_DIR, CANDLE_CACHE_TODAY_TTL
+from candle_fetcher import fetch_candles
+from candle_decode import (
+    CandleArrays,
+    MINUTES_PER_DAY,
+    decode_rows,
+    encode_rows,
+    day_index,
+    minute_of,
+)
+
+
+PAYLOAD_FMT = "%Y-%m-%d %H:%M"
+
+# Cache miss pe poora session fetch karte hain (15:31 taaki closing candle bhi aa jaye),
+# phir caller ki window read time pe filter hoti hai.
+FULL_DAY_FROM = "09:15"
+FULL_DAY_TO = "15:31"
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SESSION_CLOSE = dtime(15, 30)
+
+# v2: minute (int64 epoch-minute) + ohlcv (float64) arrays; v1 string entries ignore
+CACHE_FORMAT = "v2"
+
+
+def session_closed(day: date) -> bool:
+    """IST me us din ka 15:30 nikal chuka? Tabhi us din ka data final hai."""
+    return datetime.now(IST).replace(tzinfo=None) >= datetime.combine(day, SESSION_CLOSE)
+
+
+def _day_path(exchange: str, token: str, interval: str, day: date) -> Path:
+    return (
+        Path(CANDLE_CACHE_DIR) / CACHE_FORMAT / exchange / token / interval
+        / f"{day:%Y-%m-%d}.npz"
+    )
+
+
+def _read_day(
+    exchange: str, token: str, interval: str, day: date
+) -> Optional[CandleArrays]:
+    """
+    Cached arrays for one day, ya None agar miss / stale.
+    Complete day (us din 15:30 IST ke baad fetch hua) kabhi stale nahi hota;
+    baaki har entry (session ke beech fetch, ya purani entry bina flag ke)
+    sirf CANDLE_CACHE_TODAY_TTL tak valid - date roll hone ke baad bhi.
+    """
+    path = _day_path(exchange, token, interval, day)
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path) as z:
+            fetched_at = float(z["fetched_at"])
+            complete = bool(z["complete"]) if "complete" in z.files else False
+            if not complete and time.time() - fetched_at > CANDLE_CACHE_TODAY_TTL:
+                return None
+            return CandleArrays.from_ohlcv(z["minute"], z["ohlcv"])
+    except Exception as e:
+        print("[CANDLE-CACHE] corrupt entry", path, e)
+        return None
+
+
+def _write_day(
+    exchange: str, token: str, interval: str, day: date, arr: CandleArrays
+) -> None:
+    # Future din cache nahi karte (data abhi aaya hi nahi)
+    if day > date.today():
+        return
+
+    path = _day_path(exchange, token, interval, day)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(
+            path.name + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        # Session close ke baad fetch hua tabhi din complete (partial 09:30 /
+        # intraday ONE_DAY candle kabhi permanent nahi banti). Khali din tabhi
+        # jab calendar bhi kahe session nahi tha - warna transient empty
+        # response hamesha ke liye cache ho jaata
+        complete = session_closed(day) and (len(arr) > 0 or _known_non_session(day))
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                minute=arr.minute,
+                ohlcv=arr.ohlcv(),
+                fetched_at=np.float64(time.time()),
+                complete=np.bool_(complete),
+            )
+        os.replace(tmp, path)
+    except Exception as e:
+        print("[CANDLE-CACHE] write error", path, e)
+
+
+def _known_non_session(day: date) -> bool:
+    # Sirf memory / disk wala calendar - yaha se fetch nahi (calendar khud cache use karta hai)
+    from trading_calendar import peek_trading_calendar
+
+    cal = peek_trading_calendar()
+    return cal is not None and cal.known_non_session(day)
+
+
+def _missing_runs(days: List[date], by_day: Dict[date, CandleArrays]) -> List[List[date]]:
+    """Cache miss wale days, lagataar dates ke groups me (har group ek fetch)."""
+    runs: List[List[date]] = []
+    for d in days:
+        if d in by_day:
+            continue
+        if runs and runs[-1][-1] == d - timedelta(days=1):
+            runs[-1].append(d)
+        else:
+            runs.append([d])
+    return runs
+
+
+def _split_by_day(arr: CandleArrays, days: List[date]) -> Dict[date, CandleArrays]:
+    by_day: Dict[date, CandleArrays] = {}
+    day_idx = arr.minute // MINUTES_PER_DAY
+    for d in days:
+        k = day_index(d)
+        i = int(np.searchsorted(day_idx, k, side="left"))
+        j = int(np.searchsorted(day_idx, k, side="right"))
+        by_day[d] = arr.take(slice(i, j))
+    return by_day
+
+
+def _direct_arrays(api, payload: Dict[str, Any]) -> Dict[str, Any]:
+    hist = fetch_candles(api, payload)
+    if not hist.get("status"):
+        return dict(hist, arrays=None)
+    return {
+        "status": True, "message": "SUCCESS", "errorcode": "",
+        "arrays": decode_rows(hist.get("data") or []),
+    }
+
+
+def get_candle_arrays(api, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    getCandleData ka array-native version.
+
+    Returns {"status", "message", "errorcode", "arrays": CandleArrays}.
+    - Har (exchange, token, interval, date) ek alag cache entry hai.
+    - Closed trading day dobara kabhi fetch nahi hota; holiday/weekend ka
+      empty din bhi cache hota hai (calendar confirm kare tab hi final).
+    - Sirf miss wale days fetch hote hain: lagataar missing dates ka poora
+      session ek call me, phir per-day likh dete hain.
+    - Record / replay broker (bypass_candle_cache) pe cache skip: har call
+      broker tak jaani chahiye taaki cassette me aaye / cassette se mile.
+    """
+    if getattr(api, "bypass_candle_cache", False):
+        return _direct_arrays(api, payload)
+
+    try:
+        exchange = str(payload["exchange"])
+        token = str(payload["symboltoken"])
+        interval = str(payload["interval"])
+        from_dt = datetime.strptime(payload["fromdate"], PAYLOAD_FMT)
+        to_dt = datetime.strptime(payload["todate"], PAYLOAD_FMT)
+    except Exception as e:
+        print("[CANDLE-CACHE] uncacheable payload, direct call:", e)
+        return _direct_arrays(api, payload)
+
+    days = [
+        from_dt.date() + timedelta(days=i)
+        for i in range((to_dt.date() - from_dt.date()).days + 1)
+    ]
+
+    by_day: Dict[date, CandleArrays] = {}
+    for d in days:
+        arr = _read_day(exchange, token, interval, d)
+        if arr is not None:
+            by_day[d] = arr
+
+    for run in _missing_runs(days, by_day):
+        full_payload = dict(payload)
+        full_payload["fromdate"] = f"{run[0]:%Y-%m-%d} {FULL_DAY_FROM}"
+        full_payload["todate"] = f"{run[-1]:%Y-%m-%d} {FULL_DAY_TO}"
+
+        hist = fetch_candles(api, full_payload)
+        if not hist.get("status"):
+            return dict(hist, arrays=None)
+
+        print(
+            "[CANDLE-CACHE] fetched",
+            exchange, token, interval, run[0], "->", run[-1],
+            "rows", len(hist.get("data") or []),
+        )
+
+        fetched = _split_by_day(decode_rows(hist.get("data") or []), run)
+        for d in run:
+            _write_day(exchange, token, interval, d, fetched[d])
+            by_day[d] = fetched[d]
+
+    arr = CandleArrays.concat([by_day[d] for d in days])
+
+    # Daily candles ka timestamp 00:00 hota hai, unpe time window nahi lagti
+    if interval != "ONE_DAY":
+        arr = arr.between(minute_of(from_dt), minute_of(to_dt))
+
+    return {"status": True, "message": "SUCCESS", "errorcode": "", "arrays": arr}
+
+
+def get_candle_data(api, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    api.getCandleData ka drop-in replacement (same payload, same response shape).
+    Naya code get_candle_arrays use kare; yeh sirf row-list chahne walon ke liye.
+    """
+    res = get_candle_arrays(api, payload)
+    if not res.get("status"):
+        res = dict(res)
+        res.pop("arrays", None)
+        res.setdefault("data", None)
+        return res
+    return {
+        "status": True, "message": "SUCCESS", "errorcode": "",
+        "data": encode_rows(res["arrays"]),
+    }
@@ -0,0 +1,191 @@
+# candle_decode.py
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# SmartAPI timestamp: "2026-01-05T09:15:00+05:30" (IST). Hum wall-clock minute
+# rakhte hain (tz drop) - wahi jo pd.to_datetime(...).dt.tz_localize(None) deta tha.
+IST_SUFFIX = ":00+05:30"
+
+MINUTES_PER_DAY = 1440
+_EPOCH = date(1970, 1, 1)
+
+_ZERO = ord("0")
+
+
+def _days_from_civil(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """Vectorized proleptic Gregorian (y, m, d) -> days since 1970-01-01."""
+    y = y - (m <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    mp = np.where(m > 2, m - 3, m + 9)
+    doy = (153 * mp + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def parse_iso_minutes(ts: Sequence[str]) -> np.ndarray:
+    """
+    Fixed-format "YYYY-MM-DDTHH:MM..." strings -> int64 epoch minutes (wall clock).
+    Format match na ho to pandas generic parse pe fallback.
+    """
+    n = len(ts)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Sirf pehle 16 chars ("YYYY-MM-DDTHH:MM") chahiye; U16 = 16 x uint32 code points
+    s = np.asarray(ts, dtype="U16")
+    c = s.view(np.uint32).reshape(n, 16).astype(np.int32)
+
+    ok = (
+        (c[:, 4] == ord("-"))
+        & (c[:, 7] == ord("-"))
+        & ((c[:, 10] == ord("T")) | (c[:, 10] == ord(" ")))
+        & (c[:, 13] == ord(":"))
+    )
+    if not ok.all():
+        parsed = pd.to_datetime(pd.Series(list(ts)))
+        if parsed.dt.tz is not None:
+            parsed = parsed.dt.tz_localize(None)
+        return parsed.values.astype("datetime64[m]").astype(np.int64)
+
+    c -= _ZERO
+    year = c[:, 0] * 1000 + c[:, 1] * 100 + c[:, 2] * 10 + c[:, 3]
+    month = c[:, 5] * 10 + c[:, 6]
+    day = c[:, 8] * 10 + c[:, 9]
+    hour = c[:, 11] * 10 + c[:, 12]
+    minute = c[:, 14] * 10 + c[:, 15]
+
+    days = _days_from_civil(year, month, day).astype(np.int64)
+    return days * MINUTES_PER_DAY + hour * 60 + minute
+
+
+def minute_of(dt: datetime) -> int:
+    """Naive datetime -> epoch minute (same scale as parse_iso_minutes)."""
+    days = (dt.date() - _EPOCH).days
+    return days * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+
+def day_index(d: date) -> int:
+    """date -> days since epoch (minute // MINUTES_PER_DAY ke scale pe)."""
+    return (d - _EPOCH).days
+
+
+def day_of_minute(m: int) -> date:
+    return _EPOCH + timedelta(days=int(m) // MINUTES_PER_DAY)
+
+
+@dataclass
+class CandleArrays:
+    """
+    Contiguous candle columns. minute = epoch minute (IST wall clock), sorted.
+    """
+
+    minute: np.ndarray  # int64
+    open: np.ndarray    # float64
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray  # int64
+
+    def __len__(self) -> int:
+        return int(self.minute.shape[0])
+
+    @classmethod
+    def empty(cls) -> "CandleArrays":
+        f = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), f, f, f, f, np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_ohlcv(cls, minute: np.ndarray, ohlcv: np.ndarray) -> "CandleArrays":
+        ohlcv = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 5)
+        return cls(
+            np.ascontiguousarray(minute, dtype=np.int64),
+            np.ascontiguousarray(ohlcv[:, 0]),
+            np.ascontiguousarray(ohlcv[:, 1]),
+            np.ascontiguousarray(ohlcv[:, 2]),
+            np.ascontiguousarray(ohlcv[:, 3]),
+            ohlcv[:, 4].astype(np.int64),
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence["CandleArrays"]) -> "CandleArrays":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return cls(
+            *(np.concatenate([getattr(p, f) for p in parts])
+              for f in ("minute", "open", "high", "low", "close", "volume"))
+        )
+
+    def ohlcv(self) -> np.ndarray:
+        return np.column_stack(
+            [self.open, self.high, self.low, self.close, self.volume.astype(np.float64)]
+        )
+
+    def take(self, sel) -> "CandleArrays":
+        return CandleArrays(
+            self.minute[sel], self.open[sel], self.high[sel],
+            self.low[sel], self.close[sel], self.volume[sel],
+        )
+
+    def between(self, lo_minute: int, hi_minute: int) -> "CandleArrays":
+        """Inclusive [lo, hi] window (minute sorted hona chahiye)."""
+        i = int(np.searchsorted(self.minute, lo_minute, side="left"))
+        j = int(np.searchsorted(self.minute, hi_minute, side="right"))
+        return self.take(slice(i, j))
+
+    def times(self) -> np.ndarray:
+        return self.minute.astype("datetime64[m]").astype("datetime64[ns]")
+
+    def to_frame(self) -> pd.DataFrame:
+        """Thin pandas view: DatetimeIndex 'time' + open/high/low/close/volume."""
+        return pd.DataFrame(
+            {
+                "open": self.open,
+                "high": self.high,
+                "low": self.low,
+                "close": self.close,
+                "volume": self.volume,
+            },
+            index=pd.DatetimeIndex(self.times(), name="time"),
+        )
+
+
+def decode_rows(rows: Sequence[Sequence]) -> CandleArrays:
+    """Broker payload rows [[ts, o, h, l, c, v], ...] -> CandleArrays (sorted)."""
+    if not rows:
+        return CandleArrays.empty()
+
+    minute = parse_iso_minutes([r[0] for r in rows])
+    ohlcv = np.fromiter(
+        (x for r in rows for x in r[1:6]), dtype=np.float64, count=len(rows) * 5
+    )
+    arr = CandleArrays.from_ohlcv(minute, ohlcv)
+
+    if len(arr) > 1 and np.any(np.diff(arr.minute) < 0):
+        arr = arr.take(np.argsort(arr.minute, kind="stable"))
+    return arr
+
+
+def encode_rows(arr: CandleArrays) -> List[list]:
+    """CandleArrays -> SmartAPI row shape (ts string with +05:30)."""
+    stamps = np.datetime_as_string(arr.minute.astype("datetime64[m]"), unit="m")
+    return [
+        [f"{t}{IST_SUFFIX}", o, h, l, c, v]
+        for t, o, h, l, c, v in zip(
+            stamps.tolist(),
+            arr.open.tolist(),
+            arr.high.tolist(),
+            arr.low.tolist(),
+            arr.close.tolist(),
+            arr.volume.tolist(),
+        )
+    ]
@@ -0,0 +1,123 @@
+# candle_fetcher.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config import (
+    SMARTAPI_HIST_RATE_PER_SEC,
+    SMARTAPI_HIST_BURST,
+    FETCH_MAX_WORKERS,
+    FETCH_MAX_RETRIES,
+    FETCH_BACKOFF_BASE,
+)
+
+
+class TokenBucket:
+    """
+    Simple thread-safe token bucket.
+    `rate` tokens/sec refill, max `capacity` tokens jama ho sakte hain.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Process-wide limiter: saare getCandleData calls isi se guzarte hain
+HIST_LIMITER = TokenBucket(SMARTAPI_HIST_RATE_PER_SEC, SMARTAPI_HIST_BURST)
+
+
+def _is_retryable(hist: Dict[str, Any]) -> bool:
+    """Rate-limit / transient broker errors pe retry, baaki pe nahi."""
+    msg = str(hist.get("message") or "").lower()
+    code = str(hist.get("errorcode") or "").upper()
+    return (
+        "rate" in msg
+        or "exceed" in msg
+        or "too many" in msg
+        or "timeout" in msg
+        or "timed out" in msg
+        or code in ("AB1004", "AB2001")
+    )
+
+
+def fetch_candles(api, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rate-limited api.getCandleData with retry + exponential backoff.
+    Response shape same as SmartAPI.
+    """
+    last: Dict[str, Any] = {"status": False, "message": "not attempted", "data": None}
+
+    for attempt in range(FETCH_MAX_RETRIES + 1):
+        HIST_LIMITER.acquire()
+        try:
+            hist = api.getCandleData(payload)
+        except Exception as e:
+            hist = {"status": False, "message": f"exception: {e}", "errorcode": "", "data": None}
+            retryable = True
+        else:
+            if hist is None:
+                hist = {"status": False, "message": "empty response", "errorcode": "", "data": None}
+            retryable = not hist.get("status") and _is_retryable(hist)
+
+        if hist.get("status") or not retryable:
+            return hist
+
+        last = hist
+        if attempt < FETCH_MAX_RETRIES:
+            delay = FETCH_BACKOFF_BASE * (2 ** attempt)
+            print(
+                "[FETCH] retry", attempt + 1, "in", delay, "s",
+                payload.get("symboltoken"), payload.get("interval"),
+                "-", hist.get("message"),
+            )
+            time.sleep(delay)
+
+    print("[FETCH] giving up", payload.get("symboltoken"), "-", last.get("message"))
+    return last
+
+
+def fetch_many(
+    jobs: Dict[Hashable, Callable[[], Any]],
+    max_workers: Optional[int] = None,
+) -> Dict[Hashable, Any]:
+    """
+    Independent fetch jobs ko thread pool me chalao, sab complete hone pe return.
+    Latency = slowest single job (limiter ke andar).
+    Kisi job ka exception log hota hai aur uska result None.
+    """
+    if not jobs:
+        return {}
+
+    workers = min(max_workers or FETCH_MAX_WORKERS, len(jobs))
+    results: Dict[Hashable, Any] = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+        futures = {key: pool.submit(fn) for key, fn in jobs.items()}
+        for key, fut in futures.items():
+            try:
+                results[key] = fut.result()
+            except Exception as e:
+                print("[FETCH] job failed", key, e)
+                results[key] = None
+
+    return results
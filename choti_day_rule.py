@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
+from breakout_scanner import CHOTI_REORB, scan_day
 from smartapi_helpers import get_midday_orb_breakout_15min
 
 
@@ -69,14 +70,11 @@ def run_choti_new_orb(
     new_orb_end = datetime.combine(
         trade_date, datetime.strptime("12:00", "%H:%M").time())
 
-    new_trigger_df = full_idxdf[
-        (full_idxdf.index > new_mark_start) & (full_idxdf.index <= new_orb_end)
-    ]
-    new_trigger_15m = (
-        new_trigger_df.resample("15min")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-        .dropna()
-    )
+    # (new_mark_start, 12:00] 1-min bars ki 15-min candles (breakout_scanner kernel)
+    new_trigger_15m = scan_day(
+        full_idxdf, CHOTI_REORB,
+        marked_high=new_marked_high, marked_low=new_marked_low, scan_from=new_mark_start,
+    ).candles
 
     print("CHOTI-NEW-ORB-WINDOW",
           "start", new_mark_start, "end", new_orb_end,
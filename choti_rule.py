@@ -3,6 +3,8 @@ from typing import Any, Dict, Optional, Tuple
 
 import pandas as pd
 
+from breakout_scanner import CHOTI_REORB, scan_day
+
 
 def apply_choti_rule(
     full_idxdf: pd.DataFrame,
@@ -143,23 +145,6 @@ def apply_choti_rule(
         trade_date, datetime.strptime("12:00", "%H:%M").time()
     )
 
-    # 1-min window
-    new_trigger_df = full_idxdf[
-        (full_idxdf.index > new_mark_start)
-        & (full_idxdf.index <= new_orb_end)
-    ]
-
-    # 15-min resample for breakout decision
-    new_trigger_15m = (
-        new_trigger_df.resample("15min")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-        .dropna()
-    )
-
-    new_trigger_time: Optional[datetime] = None
-    new_trigger_price: Optional[float] = None
-    new_trigger_side: Optional[str] = None
-
     print(
         "CHOTI-NEW-ORB-WINDOW",
         "start", new_mark_start,
@@ -168,25 +153,19 @@ def apply_choti_rule(
         "marked_low", marked_low,
     )
 
-    # 15-min CLOSE-based breakout
-    for ts, row in new_trigger_15m.iterrows():
-        close_price = float(row["close"])
-        high_price = float(row["high"])
-        low_price = float(row["low"])
+    # 1-min (new_mark_start, 12:00] -> 15-min CLOSE-based breakout
+    # BUY BO: CMP = 15-min HIGH, SELL BO: CMP = 15-min LOW
+    day = scan_day(
+        full_idxdf, CHOTI_REORB,
+        marked_high=marked_high, marked_low=marked_low, scan_from=new_mark_start,
+    )
 
+    for ts, close_price in zip(day.candles.index, day.candles["close"].tolist()):
         print("CHOTI-NEW-ORB-CHECK-15M", ts, "close", close_price)
 
-        if new_trigger_side is None:
-            # BUY BO: close breakout, CMP = 15-min HIGH
-            if close_price > marked_high:
-                new_trigger_side = "BUY"
-                new_trigger_time = ts
-                new_trigger_price = high_price  # BUY = HIGH
-            # SELL BO: close breakout, CMP = 15-min LOW
-            elif close_price < marked_low:
-                new_trigger_side = "SELL"
-                new_trigger_time = ts
-                new_trigger_price = low_price   # SELL = LOW
+    new_trigger_side: Optional[str] = day.side
+    new_trigger_time: Optional[datetime] = day.time
+    new_trigger_price: Optional[float] = day.price
 
     if new_trigger_time is None:
         print("CHOTI-NEW-ORB NO BREAKOUT TILL 12:00, SHIFT TO MIDDAY")
@@ -1,5 +1,6 @@
 # config.py
 
+import os
 from pathlib import Path
 from datetime import time as dtime
 
@@ -23,9 +24,58 @@ VIXINDEXTOKEN = "99926017"
 
 # ========= FILE PATHS =========
 SCRIPMASTERFILE = ROOT / "OpenAPIScripMaster.json"
+# Traded instruments ka compact snapshot (scrip_snapshot.py)
+SCRIP_SNAPSHOT_FILE = ROOT / "scrip_snapshot.npz"
+SCRIP_SNAPSHOT_OPTIONS = (("NFO", "NIFTY"), ("BFO", "SENSEX"))  # (exch_seg, name) OPTIDX
+SCRIP_SNAPSHOT_MCX_NAMES = ("CRUDEOILM",)
+# /admin/update-openapi source (URL ya local file path)
+SCRIPMASTER_URL = os.environ.get(
+    "VIXBOT_SCRIPMASTER_URL",
+    "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json",
+)
+SCRIP_REFRESH_TIMEOUT = 60  # seconds, socket read timeout
+# Har refresh ka dated snapshot + merged as-of index (scrip_archive.py)
+SCRIP_ARCHIVE_DIR = ROOT / "scrip_archive"
 BACKTESTDIR = "../backtests"
 EXPIRY_STORE_FILE = "../nifty_expiries.json"
 
+# ========= BROKER MODE (live / record / replay) =========
+# VIXBOT_BROKER_MODE=record  -> live API + har response cassette me
+# VIXBOT_BROKER_MODE=replay  -> cassette se, network nahi
+BROKER_MODE = os.environ.get("VIXBOT_BROKER_MODE", "live").strip().lower()
+CASSETTE_DIR = ROOT / "cassettes"
+BROKER_CASSETTE = os.environ.get("VIXBOT_CASSETTE", "")
+
+# ========= CANDLE CACHE =========
+# getCandleData ka read-through cache: (exchange, token, interval, date) -> 1 file
+CANDLE_CACHE_DIR = ROOT / "candle_cache"
+# Aaj ke din ka data abhi badal raha hai, isliye chhota TTL (seconds)
+CANDLE_CACHE_TODAY_TTL = 60
+
+# ========= HISTORICAL DATA FETCH =========
+# SmartAPI getCandleData limit ~3 req/sec per client
+SMARTAPI_HIST_RATE_PER_SEC = 3.0
+SMARTAPI_HIST_BURST = 3
+FETCH_MAX_WORKERS = 6
+FETCH_MAX_RETRIES = 3
+FETCH_BACKOFF_BASE = 0.5  # seconds, har retry pe double
+# Batch backtest process pool (default = cpu count, isse zyada nahi)
+BACKTEST_BATCH_WORKERS = 8
+
+# ========= GANN TABLE (compiled) =========
+# Gann JSON ladders ka .npy compiled form (gann_table.py)
+GANN_TABLE_DIR = ROOT / "gann_cache"
+# /gann/levels ek request me max kitne CMP
+GANN_LEVELS_MAX_ROWS = 20000
+
+# ========= TRADING CALENDAR =========
+# NIFTY daily candles se bana session index (disk pe cached)
+TRADING_CALENDAR_FILE = ROOT / "trading_calendar.json"
+# Optional: future holidays ki list ["YYYY-MM-DD", ...] (NSE circular se)
+NSE_HOLIDAYS_FILE = ROOT / "nse_holidays.json"
+# Calendar kitna peeche tak daily candles se banana hai
+TRADING_CALENDAR_START = "2024-01-01"
+
 # Low premium bot hata rahe hain, isliye ye dirs ki zarurat nahi:
 # LOW_PREMIUM_SNAPSHOT_DIR = "../low_premium_snapshots"
 # LOW_PREMIUM_BACKTEST_DIR = "../low_premium_backtests"
@@ -0,0 +1,195 @@
+# day_context.py
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from config import NIFTYINDEXTOKEN, SENSEXINDEXTOKEN
+from smartapi_helpers import (
+    getindex1min,
+    getoption1min,
+    get_nifty_daily_history_for_atr,
+)
+from half_gap_rule import fetch_angel_15min_history, atr_14_from_15min_history
+from trading_calendar import get_trading_calendar
+from candle_fetcher import fetch_many
+from intraday_bar_store import IntradayBarStore
+from scrip_index import get_scrip_index
+
+
+ATR_SEED_READY = "09:31"  # 09:15-09:30 bar close + 1 min buffer
+
+
+class DayContext:
+    """
+    Ek trading date ke liye request-scoped market data.
+
+    Har series pehli baar maangne pe broker/cache se aati hai, phir memoized:
+    ek /v2/vixbacktest call me NIFTY 1-min, prev day, daily history,
+    15-min ATR window aur option bars sirf ek-ek baar fetch honge.
+
+    Returned DataFrames shared hain - modify karna ho to caller .copy() kare.
+
+    Thread-safe: har key ka apna lock hai, to prefetch() ke threads aur
+    main flow ek hi series dobara fetch nahi karte.
+
+    live=True (live loop): aaj ke index/option bars IntradayBarStore se aate
+    hain; refresh_intraday() har loop pe sirf naye minutes laata hai.
+    History (prev day, ATR, daily) din bhar memoized rehti hai.
+    """
+
+    PREV_DAY_LOOKBACK = 3  # calendar miss hone pe kitne sessions aur peeche dekhna
+
+    def __init__(self, api, trade_date: str, live: bool = False) -> None:
+        self.api = api
+        self.trade_date = trade_date
+        self.live = live
+        self._stores: Dict[Tuple[str, str], IntradayBarStore] = {}
+        self._memo: Dict[Any, Any] = {}
+        self._locks: Dict[Any, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _get(self, key: Any, loader: Callable[[], Any]) -> Any:
+        if key in self._memo:
+            return self._memo[key]
+
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key not in self._memo:
+                self._memo[key] = loader()
+        return self._memo[key]
+
+    def prefetch(
+        self,
+        option_tokens: Iterable[str] = (),
+        include_sensex: bool = True,
+    ) -> None:
+        """
+        Is din ki saari independent series concurrently warm karo
+        (NIFTY, SENSEX, prev day, 15-min ATR window, daily history, options).
+        Baad ke accessor calls memo se turant milte hain.
+        """
+        jobs: Dict[Any, Callable[[], Any]] = {
+            "nifty": self.nifty_1min,
+            "prev_day": self.prev_day,
+            "atr15": self.atr15_history,
+            "daily": self.daily_history,
+        }
+        if include_sensex:
+            jobs["sensex"] = self.sensex_1min
+        for tok in option_tokens:
+            if tok:
+                jobs[("option", str(tok))] = (lambda t=tok: self.option_1min(t))
+
+        fetch_many(jobs)
+
+    # ---------- TODAY ----------
+
+    def _store(self, exchange: str, token: str) -> IntradayBarStore:
+        def load() -> IntradayBarStore:
+            store = IntradayBarStore(self.api, self.trade_date, exchange, token)
+            store.refresh()
+            self._stores[(exchange, str(token))] = store
+            return store
+
+        return self._get(("store", exchange, str(token)), load)
+
+    def refresh_intraday(self) -> None:
+        """Live: har registered instrument ka delta fetch (concurrently)."""
+        fetch_many({key: store.refresh for key, store in list(self._stores.items())})
+
+    def index_1min(self, token: str = NIFTYINDEXTOKEN) -> pd.DataFrame:
+        if self.live:
+            exch = "BSE" if token == SENSEXINDEXTOKEN else "NSE"
+            return self._store(exch, token).frame()
+        return self._get(
+            ("index_1min", token),
+            lambda: getindex1min(self.api, self.trade_date, symboltoken=token),
+        )
+
+    def nifty_1min(self) -> pd.DataFrame:
+        return self.index_1min(NIFTYINDEXTOKEN)
+
+    def sensex_1min(self) -> pd.DataFrame:
+        return self.index_1min(SENSEXINDEXTOKEN)
+
+    def option_1min(self, token: str, exchange: Optional[str] = None) -> pd.DataFrame:
+        if self.live:
+            if exchange is None:
+                # Scrip hit ka segment (NFO / BFO ...); master me na ho tabhi NFO
+                hit = get_scrip_index().by_token(token)
+                exchange = hit.exch_seg if hit and hit.exch_seg else "NFO"
+            return self._store(exchange, token).frame()
+        return self._get(
+            ("option_1min", str(token)),
+            lambda: getoption1min(self.api, token, self.trade_date),
+        )
+
+    # ---------- PREVIOUS TRADING DAY ----------
+
+    def _load_prev_day(self) -> Tuple[Optional[date], pd.DataFrame]:
+        trade_day = datetime.strptime(self.trade_date, "%Y-%m-%d").date()
+        cal = get_trading_calendar(
+            self.api, need_until=trade_day - timedelta(days=1), need_from=trade_day
+        )
+
+        prev_day = cal.prev_session(trade_day)
+        # Calendar galat ho (unknown holiday) to agle purane session pe jao
+        for _ in range(self.PREV_DAY_LOOKBACK):
+            if prev_day is None:
+                break
+            df = getindex1min(
+                self.api, prev_day.strftime("%Y-%m-%d"), symboltoken=NIFTYINDEXTOKEN
+            )
+            if not df.empty:
+                return prev_day, df
+            print("[DAY-CTX] no bars on calendar session", prev_day)
+            prev_day = cal.prev_session(prev_day)
+
+        print("[DAY-CTX] Previous trading day not found within lookback window")
+        return None, pd.DataFrame()
+
+    def prev_day(self) -> Tuple[Optional[date], pd.DataFrame]:
+        """(prev trading date, NIFTY 1-min bars of that day)."""
+        return self._get("prev_day", self._load_prev_day)
+
+    def prev_day_1min(self) -> pd.DataFrame:
+        return self.prev_day()[1]
+
+    # ---------- HISTORY ----------
+
+    def daily_history(self, lookback_days: int = 40) -> Optional[pd.DataFrame]:
+        return self._get(
+            ("daily_history", lookback_days),
+            lambda: get_nifty_daily_history_for_atr(
+                self.api, self.trade_date, lookback_days=lookback_days
+            ),
+        )
+
+    def _atr_window_closed(self) -> bool:
+        # Live me 09:30 ka 15-min bar close hone se pehle ATR memoize nahi karte
+        if not self.live:
+            return True
+        return datetime.now() >= datetime.strptime(
+            f"{self.trade_date} {ATR_SEED_READY}", "%Y-%m-%d %H:%M"
+        )
+
+    def atr15_history(self) -> pd.DataFrame:
+        """NIFTY 15-min bars, trade_date - 7 din se 09:30 tak (ATR14 seed)."""
+        loader = lambda: fetch_angel_15min_history(
+            self.api, NIFTYINDEXTOKEN, self.trade_date
+        )
+        if not self._atr_window_closed():
+            return loader()
+        return self._get("atr15_history", loader)
+
+    def atr_14(self) -> float:
+        """Angel-style 15-min ATR(14) at 09:30."""
+        loader = lambda: atr_14_from_15min_history(self.atr15_history(), self.trade_date)
+        if not self._atr_window_closed():
+            return loader()
+        return self._get("atr_14", loader)
@@ -1,9 +1,18 @@
-from datetime import datetime, date as ddate
-from typing import List
+from datetime import date as ddate
+from typing import List, Optional, Tuple
+import hashlib
 import json
 import os
+import threading
 
-from config import SCRIPMASTERFILE, EXPIRY_STORE_FILE
+from config import EXPIRY_STORE_FILE
+from scrip_index import get_scrip_index
+
+
+# Merged (store file + scrip master) expiries, scrip index ke stamp tak valid.
+# Poll pe sirf os.stat; naya scrip master aaye tabhi merge + (change ho to) write.
+_CACHE: dict = {"stamp": None, "merged": []}
+_CACHE_LOCK = threading.Lock()
 
 
 def load_expiry_store() -> List[str]:
@@ -23,59 +32,70 @@ def load_expiry_store() -> List[str]:
 def save_expiry_store(expiries: List[str]) -> None:
     try:
         uniq = sorted(set(expiries))
-        with open(EXPIRY_STORE_FILE, "w", encoding="utf-8") as f:
+        tmp = f"{EXPIRY_STORE_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(uniq, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, EXPIRY_STORE_FILE)
     except Exception as e:
         print("save_expiry_store error", e)
 
 
 def fetch_expiries_from_scripmaster() -> List[str]:
     try:
-        with open(SCRIPMASTERFILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        records = data if isinstance(data, list) else data.get("data", [])
-        expiries: set[str] = set()
-
-        for row in records:
-            if (
-                row.get("exch_seg") == "NFO"
-                and row.get("name") == "NIFTY"
-                and row.get("instrumenttype") == "OPTIDX"
-            ):
-                raw_exp = row.get("expiry", "")
-                if not raw_exp:
-                    continue
-
-                dt = None
-                try:
-                    dt = datetime.strptime(raw_exp.upper(), "%d%b%Y")
-                except Exception:
-                    try:
-                        dt = datetime.strptime(raw_exp, "%Y-%m-%d")
-                    except Exception:
-                        dt = None
-
-                if dt is not None:
-                    expiries.add(dt.strftime("%Y-%m-%d"))
-
-        return sorted(expiries)
+        return get_scrip_index().expiries("NFO", "NIFTY", "OPTIDX")
     except Exception as e:
         print("fetch_expiries_from_scripmaster error", e)
         return []
 
 
-def refresh_and_get_expiries(include_past: bool = False) -> List[str]:
-    local = load_expiry_store()
-    from_scrip = fetch_expiries_from_scripmaster()
+def _merged_expiries() -> List[str]:
+    try:
+        stamp = get_scrip_index().stamp
+    except Exception as e:
+        print("expiry index error", e)
+        stamp = None
+
+    cached = _CACHE
+    if stamp is not None and cached["stamp"] == stamp:
+        return cached["merged"]
+
+    with _CACHE_LOCK:
+        if stamp is not None and _CACHE["stamp"] == stamp:
+            return _CACHE["merged"]
 
-    merged = sorted(set(local) | set(from_scrip))
-    save_expiry_store(merged)
+        local = load_expiry_store()
+        from_scrip = fetch_expiries_from_scripmaster()
+        merged = sorted(set(local) | set(from_scrip))
+
+        # File sirf tab likho jab set badla ho
+        if merged != sorted(set(local)):
+            save_expiry_store(merged)
+            print("[EXPIRY-STORE] updated", len(local), "->", len(merged))
+
+        _CACHE["stamp"] = stamp
+        _CACHE["merged"] = merged
+        return merged
+
+
+def refresh_and_get_expiries(include_past: bool = False) -> List[str]:
+    merged = _merged_expiries()
 
     if not include_past:
-        today = ddate.today()
-        merged = [
-            e for e in merged
-            if datetime.strptime(e, "%Y-%m-%d").date() >= today
-        ]
-    return merged
+        today = ddate.today().strftime("%Y-%m-%d")
+        # ISO dates string compare pe bhi sahi order dete hain
+        merged = [e for e in merged if e >= today]
+    return list(merged)
+
+
+def expiries_with_etag(include_past: bool = False) -> Tuple[List[str], str]:
+    """Expiries + ETag (list ka hash) - endpoints 304 ke liye."""
+    expiries = refresh_and_get_expiries(include_past=include_past)
+    digest = hashlib.sha1(json.dumps(expiries).encode("utf-8")).hexdigest()[:16]
+    return expiries, f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
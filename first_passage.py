@@ -0,0 +1,170 @@
+# first_passage.py
+"""
+Ek din ke 1-min bars pe first-passage index: "time t ke baad level L pehli
+baar kab touch hua" aur "SL ya target me pehle kaun laga".
+
+    fp = bars_for(idx1m).passage                  # frame pe ek baar (cached)
+    fp.first_touch(24810, after=ts)               # -> bar position ya None
+    fp.first_touch_many(levels, after=ts)         # -> positions array (-1 = nahi)
+    fp.first_touch_many(levels, after=starts, until=ends)   # har level ki apni window
+    fp.race(sl=24750, target=24900, direction="BUY", after=ts)
+
+Build: high ke block-max aur low ke block-min (1, 2, 4, ... bars) - kisi
+bhi start se running high / low. Query: doubling search, O(log n) per
+level; time -> position searchsorted se. Index sorted hona chahiye (candle
+data hamesha hota hai). NaN bars kabhi hit nahi maane jaate.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class RaceResult(NamedTuple):
+    event: Optional[str]          # "SL" / "TARGET" / None
+    pos: Optional[int]            # bar position (frame me)
+    time: Optional[pd.Timestamp]
+
+
+class FirstPassage:
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self.index = df.index
+        self.n = len(df)
+        self.high = df["high"].to_numpy(dtype=float) if self.n else np.empty(0)
+        self.low = df["low"].to_numpy(dtype=float) if self.n else np.empty(0)
+
+        # tables[k][i] = bars i .. i+2^k-1 ka max high / min low
+        self._hi = [np.where(np.isnan(self.high), -np.inf, self.high)]
+        self._lo = [np.where(np.isnan(self.low), np.inf, self.low)]
+        width = 1
+        while width * 2 <= self.n:
+            hi, lo = self._hi[-1], self._lo[-1]
+            self._hi.append(np.maximum(hi[:-width], hi[width:]))
+            self._lo.append(np.minimum(lo[:-width], lo[width:]))
+            width *= 2
+
+    # ---------- positions ----------
+
+    def pos_at(self, after=None) -> int:
+        """after (inclusive) ke baad ka pehla bar; None -> 0."""
+        if after is None:
+            return 0
+        return int(self.index.searchsorted(pd.Timestamp(after), side="left"))
+
+    def _end(self, until=None) -> int:
+        """until (inclusive) tak ke bars -> exclusive end position."""
+        if until is None:
+            return self.n
+        return int(self.index.searchsorted(pd.Timestamp(until), side="right"))
+
+    def _next(self, tables, levels: np.ndarray, start: np.ndarray, above: bool) -> np.ndarray:
+        """
+        start se pehla bar jaha high >= level (above) / low <= level;
+        na mile to n. Blocks jo pura miss karte hain unhe skip karte jaate hain.
+        """
+        pos = start.copy()
+        for k in range(len(tables) - 1, -1, -1):
+            table = tables[k]
+            ok = pos + (1 << k) <= self.n
+            if not ok.any():
+                continue
+            ext = np.where(ok, table[np.minimum(pos, len(table) - 1)], 0.0)
+            miss = (ext < levels) if above else (ext > levels)
+            pos = np.where(ok & miss, pos + (1 << k), pos)
+        return pos
+
+    # ---------- queries ----------
+
+    def _starts(self, after, start) -> np.ndarray:
+        if start is not None:
+            return np.atleast_1d(np.asarray(start, dtype=np.int64))
+        if after is None:
+            return np.zeros(1, dtype=np.int64)
+        after = pd.DatetimeIndex(np.atleast_1d(after))
+        return self.index.searchsorted(after, side="left").astype(np.int64)
+
+    def _ends(self, until) -> np.ndarray:
+        if until is None:
+            return np.full(1, self.n, dtype=np.int64)
+        until = pd.DatetimeIndex(np.atleast_1d(until))
+        return self.index.searchsorted(until, side="right").astype(np.int64)
+
+    def first_touch_many(self, levels, after=None, until=None, start=None) -> np.ndarray:
+        """
+        Har level ke liye pehla bar (after/start se, until tak) jisme
+        low <= level <= high; na mile to -1. after / until / start scalar
+        ya per-level arrays (alag windows wale legs ek hi query me).
+        """
+        levels = np.atleast_1d(np.asarray(levels, dtype=float))
+        out = np.full(len(levels), -1, dtype=np.int64)
+        if self.n == 0 or len(levels) == 0:
+            return out
+
+        pos = np.broadcast_to(self._starts(after, start), levels.shape).copy()
+        end = np.broadcast_to(self._ends(until), levels.shape)
+        todo = ~np.isnan(levels) & (pos < end)
+        # Gap bars (poora bar level ke upar/neeche kood gaya) pe aage badhna padta hai;
+        # 1-min data me ye loop 1-2 baar hi chalta hai.
+        while todo.any():
+            ids = np.flatnonzero(todo)
+            lv, ps, en = levels[ids], pos[ids], end[ids]
+            up = self._next(self._hi, lv, ps, above=True)
+            down = self._next(self._lo, lv, ps, above=False)
+            cand = np.maximum(up, down)
+
+            found = cand < en
+            inside = np.zeros(len(cand), dtype=bool)
+            inside[found] = (self._lo[0][cand[found]] <= lv[found]) & (lv[found] <= self._hi[0][cand[found]])
+
+            out[ids[inside]] = cand[inside]
+            pos[ids] = cand + 1
+            todo[ids[inside | ~found]] = False
+        return out
+
+    def first_touch(self, level: float, after=None, until=None, start: Optional[int] = None) -> Optional[int]:
+        pos = int(self.first_touch_many([level], after, until, start)[0])
+        return pos if pos >= 0 else None
+
+    def first_cross(self, level: float, direction: str, after=None, until=None,
+                    start: Optional[int] = None) -> Optional[int]:
+        """Pehla bar jaha high >= level ("UP") / low <= level ("DOWN")."""
+        end = self._end(until)
+        p0 = self.pos_at(after) if start is None else int(start)
+        if self.n == 0 or p0 >= end or np.isnan(level):
+            return None
+        above = direction.upper() == "UP"
+        pos = int(self._next(
+            self._hi if above else self._lo,
+            np.array([float(level)]), np.array([p0], dtype=np.int64), above,
+        )[0])
+        return pos if pos < end else None
+
+    def race(
+        self,
+        sl: float,
+        target: float,
+        direction: str,
+        after=None,
+        until=None,
+        start: Optional[int] = None,
+        sl_first: bool = True,
+    ) -> RaceResult:
+        """
+        BUY: SL = low <= sl, TARGET = high >= target; SELL ulta.
+        sl / target <= 0 -> wo leg off (processnormal jaisa). Ek hi bar pe
+        dono lage to sl_first decide karta hai.
+        """
+        buy = direction.upper() == "BUY"
+        sl_pos = self.first_cross(sl, "DOWN" if buy else "UP", after, until, start) if sl > 0 else None
+        tg_pos = self.first_cross(target, "UP" if buy else "DOWN", after, until, start) if target > 0 else None
+
+        if sl_pos is None and tg_pos is None:
+            return RaceResult(None, None, None)
+        if tg_pos is None or (sl_pos is not None and (sl_pos < tg_pos or (sl_pos == tg_pos and sl_first))):
+            return RaceResult("SL", sl_pos, self.index[sl_pos])
+        return RaceResult("TARGET", tg_pos, self.index[tg_pos])
+
+    def time_of(self, pos: Optional[int]) -> Optional[pd.Timestamp]:
+        return None if pos is None else self.index[pos]
@@ -0,0 +1,94 @@
+# gann_compile.py
+"""
+Build step: compiled ladder tables (.npy) banao aur verify karo.
+
+    python gann_compile.py            # compile + checks, fail -> exit 1
+
+Ladder ka source gann_formula hai; .npy gann_table.compile_table hi likhta
+hai (runtime pe bhi wahi, agar file missing / stale ho). Runtime pe Excel /
+openpyxl / xlwings kabhi load nahi hote.
+
+Workbook se table nahi banti - "15 min NIFTY" sheet me sirf ek CMP ke
+cached levels hote hain. Ye step do checks chalata hai aur koi bhi fail ho
+to exception / exit code 1:
+- formula vs shipped JSON table (bit-for-bit)
+- workbook ke cached levels compiled table ki kisi row se match (workbook ke
+  factors badle to yahin pakda jaata hai; gann_formula update karna hoga)
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from gann_table import FIELD_INDEX, compile_table, load_matrix
+
+
+# Workbook ke cached (rounded) values vs formula
+WORKBOOK_TOLERANCE = 0.05
+
+
+def _workbook(midday: bool) -> Path:
+    from gann_engine import GANN_EXCEL_PATH, GANNEXCELPATH_MIDDAY
+
+    return Path(GANNEXCELPATH_MIDDAY if midday else GANN_EXCEL_PATH)
+
+
+def check_workbook(xlsx_path: Path, mat: np.ndarray) -> Dict[str, Any]:
+    """
+    Workbook ke "15 min NIFTY" cached levels ko compiled table me dhundo.
+    buy_entry se row match, phir sell_entry / t2 same row pe hone chahiye.
+    """
+    from gann_engine import read_gann_levels_from_excel
+
+    xl = read_gann_levels_from_excel(xlsx_path)
+
+    i = int(np.argmin(np.abs(mat[:, FIELD_INDEX["buy_entry"]] - xl["buy_entry"])))
+    row = mat[i]
+    diffs = {
+        key: abs(float(row[FIELD_INDEX[key]]) - float(xl[key]))
+        for key in ("buy_entry", "sell_entry", "buy_t2", "sell_t2")
+    }
+    worst = max(diffs.values())
+    if worst > WORKBOOK_TOLERANCE:
+        raise ValueError(
+            f"{xlsx_path.name}: workbook levels table se match nahi karte "
+            f"(cmp~{int(row[FIELD_INDEX['cmp']])}, diffs={diffs})"
+        )
+    return {"cmp": int(row[FIELD_INDEX["cmp"]]), "max_diff": worst}
+
+
+def compile_and_check(midday: bool) -> Dict[str, Any]:
+    """Table compile + dono checks; mismatch pe ValueError."""
+    from gann_formula import validate_against_table
+
+    out = compile_table(midday)
+    mat = np.asarray(load_matrix(midday))
+
+    json_diff = validate_against_table(midday)
+    if json_diff != 0.0:
+        raise ValueError(f"formula vs JSON table max diff {json_diff}")
+
+    xlsx = _workbook(midday)
+    workbook = check_workbook(xlsx, mat) if xlsx.exists() else None
+    if workbook is None:
+        print("[GANN-COMPILE] workbook missing, check skipped:", xlsx)
+
+    return {"path": str(out), "rows": int(mat.shape[0]), "workbook_check": workbook}
+
+
+def main() -> int:
+    failed = False
+    for midday in (False, True):
+        name = "midday" if midday else "morning"
+        try:
+            print("[GANN-COMPILE]", name, compile_and_check(midday))
+        except Exception as e:
+            print("[GANN-COMPILE]", name, "FAILED:", e)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
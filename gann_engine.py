@@ -1,8 +1,15 @@
 # gann_engine.py
-import json
 from pathlib import Path
 from typing import Dict, Optional, Any
 
+from gann_table import (
+    GANN_BASE_CMP,
+    GANN_MAX_CMP,
+    GannTableView,
+    get_gann_table,
+)
+from gann_formula import gann_ladder_row
+
 ROOT = Path(__file__).resolve().parent
 
 GANN_EXCEL_PATH = ROOT / "GANN ONLY NIFTY BOT.xlsx"
@@ -10,11 +17,9 @@ GANNEXCELPATH_MIDDAY = ROOT / "GANN ONLY NIFTY MIDDAY BOT.xlsx"
 GANN_JSON_PATH = ROOT / "gann_lookup_24000_27000.json"
 GANN_MIDDAY_JSON_PATH = ROOT / "gann_midday_lookup_24000_27000.json"
 
-with open(GANN_JSON_PATH, "r") as f:
-    GANN_TABLE = json.load(f)
-
-with open(GANN_MIDDAY_JSON_PATH, "r") as f:
-    GANN_MIDDAY_TABLE = json.load(f)
+# JSON import pe parse nahi hota; compiled .npy pehli lookup pe mmap hota hai
+GANN_TABLE = GannTableView(midday=False)
+GANN_MIDDAY_TABLE = GannTableView(midday=True)
 
 
 def cut_dec(x: float) -> float:
@@ -23,10 +28,15 @@ def cut_dec(x: float) -> float:
 
 
 def get_gann_row_from_json(cmp_price: float, midpoint: bool = False) -> dict:
+    """
+    24000-27000 ke andar compiled JSON table; bahar formula se ladder
+    (pehle edge row pe clamp hota tha).
+    """
     cmp_int = int(round(cmp_price))
-    cmp_int = max(24000, min(27000, cmp_int))
-    table = GANN_MIDDAY_TABLE if midpoint else GANN_TABLE
-    return table[str(cmp_int)]
+    if GANN_BASE_CMP <= cmp_int <= GANN_MAX_CMP:
+        return get_gann_table(midpoint).row(cmp_int)
+    print(f"[GANN] cmp={cmp_int} outside JSON band, formula ladder use ho raha hai")
+    return gann_ladder_row(cmp_int, midday=midpoint)
 
 
 def read_gann_levels_from_excel(excel_path: Path) -> dict:
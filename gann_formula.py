@@ -0,0 +1,98 @@
+# gann_formula.py
+"""
+Gann ladder ka native (Excel-free) formula, vectorized.
+
+Square-of-9 style: root = floor(sqrt(cmp) * 8) / 8, phir har level
+(root ± k/8)^2 * factor. Factors "GANN ONLY NIFTY BOT.xlsx" (morning) aur
+"... MIDDAY BOT.xlsx" (midday) sheets se hain; JSON tables se bit-for-bit match
+(validate_against_table).
+
+    levels = gann_ladder(np.arange(20000, 30001), midday=False)   # (10001, 19)
+"""
+
+from functools import lru_cache
+from typing import Dict
+
+import numpy as np
+
+from gann_table import GANN_FIELDS, FIELD_INDEX
+
+
+# (buy factor, sell factor, buy t4 factor, sell t4 factor)
+MORNING_FACTORS = (0.9995, 1.0005, 0.9993, 1.0007)
+MIDDAY_FACTORS = (0.9996, 1.0004, 0.9996, 1.0004)
+
+# root se kitne 1/8 steps upar (BUY) / neeche (SELL)
+BUY_STEPS = {"entry": 0.25, "t2": 0.375, "t3": 0.5, "t4": 0.625}
+SELL_STEPS = {"entry": 0.125, "t2": 0.25, "t3": 0.375, "t4": 0.5}
+
+
+def gann_ladder(cmp, midday: bool = False) -> np.ndarray:
+    """
+    cmp (scalar / array) -> (n, len(GANN_FIELDS)) float64, columns GANN_FIELDS order.
+    Midday sheet me t35 nahi hota (0.0), baaki same layout.
+    """
+    cmp = np.atleast_1d(np.asarray(cmp, dtype=np.float64))
+    fb, fs, fb4, fs4 = MIDDAY_FACTORS if midday else MORNING_FACTORS
+
+    root = np.floor(np.sqrt(cmp) * 8.0) / 8.0
+
+    buy_entry = (root + BUY_STEPS["entry"]) ** 2 * fb
+    buy_t2 = (root + BUY_STEPS["t2"]) ** 2 * fb
+    buy_t3 = (root + BUY_STEPS["t3"]) ** 2 * fb
+    buy_t4 = (root + BUY_STEPS["t4"]) ** 2 * fb4
+
+    sell_entry = (root - SELL_STEPS["entry"]) ** 2 * fs
+    sell_t2 = (root - SELL_STEPS["t2"]) ** 2 * fs
+    sell_t3 = (root - SELL_STEPS["t3"]) ** 2 * fs
+    sell_t4 = (root - SELL_STEPS["t4"]) ** 2 * fs4
+
+    zero = np.zeros_like(cmp)
+    cols = {
+        "cmp": cmp,
+        "buy_entry": buy_entry,
+        "buy_t15": (buy_entry + buy_t2) / 2,
+        "buy_t2": buy_t2,
+        "buy_t25": (buy_t2 + buy_t3) / 2,
+        "buy_t3": buy_t3,
+        "buy_t35": zero if midday else (buy_t3 + buy_t4) / 2,
+        "buy_t4": buy_t4,
+        "buy_entry_opp": buy_entry,
+        "sell_entry": sell_entry,
+        "sell_t15": (sell_entry + sell_t2) / 2,
+        "sell_t2": sell_t2,
+        "sell_t25": (sell_t2 + sell_t3) / 2,
+        "sell_t3": sell_t3,
+        "sell_t35": zero if midday else (sell_t3 + sell_t4) / 2,
+        "sell_t4": sell_t4,
+        "sell_entry_opp": sell_entry,
+        "buy_sl": sell_entry,
+        "sell_sl": buy_entry,
+    }
+    return np.column_stack([cols[name] for name in GANN_FIELDS])
+
+
+@lru_cache(maxsize=8192)
+def _ladder_row_cached(cmp_int: int, midday: bool) -> tuple:
+    return tuple(gann_ladder(cmp_int, midday)[0].tolist())
+
+
+def gann_ladder_row(cmp_int: int, midday: bool = False) -> Dict[str, float]:
+    """Single CMP -> JSON row jaisa dict (per CMP cached)."""
+    out = dict(zip(GANN_FIELDS, _ladder_row_cached(int(cmp_int), bool(midday))))
+    out["cmp"] = int(out["cmp"])
+    return out
+
+
+def validate_against_table(midday: bool = False) -> float:
+    """Formula vs shipped JSON table: max abs difference (0.0 expected)."""
+    from gann_table import _json_path, json_matrix
+
+    mat = json_matrix(_json_path(midday))
+    diff = np.abs(gann_ladder(mat[:, FIELD_INDEX["cmp"]], midday) - mat)
+    return float(diff.max())
+
+
+if __name__ == "__main__":
+    for mid in (False, True):
+        print("midday" if mid else "morning", "max diff vs JSON:", validate_against_table(mid))
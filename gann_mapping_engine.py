@@ -0,0 +1,235 @@
+# gann_mapping_engine.py
+"""
+Vectorized Gann mapping: ladder rows -> final entry / t2 / t4 / SL arrays.
+
+Ek call me poora batch (days / sweep). Scalar wrappers
+(map_gann_levels_to_v1req, map_bot3_gann_levels) isi ko n=1 pe use karte hain,
+isliye rules sirf yahan likhe hain.
+
+Target pick = masked reductions over (t2, t25, t3, t35, t4). Midday ladder me
+t35 = 0.0 hota hai, isliye candidates sorted nahi maan sakte - same candidate
+set pe masked max/min se purane list-filter logic ka exact result milta hai.
+"""
+
+import io
+from typing import Dict, Mapping
+
+import numpy as np
+
+from gann_table import GANN_FIELDS, FIELD_INDEX
+
+
+BUY_TARGET_KEYS = ("buy_t2", "buy_t25", "buy_t3", "buy_t35", "buy_t4")
+SELL_TARGET_KEYS = ("sell_t2", "sell_t25", "sell_t3", "sell_t35", "sell_t4")
+
+ATR_NORMAL_MULT = 2.0
+BOT3_ATR_MULT = 1.5
+
+
+def _col(ladders: np.ndarray, name: str) -> np.ndarray:
+    return ladders[:, FIELD_INDEX[name]]
+
+
+def _cands(ladders: np.ndarray, keys) -> np.ndarray:
+    return ladders[:, [FIELD_INDEX[k] for k in keys]]
+
+
+def cut_dec_arr(x: np.ndarray) -> np.ndarray:
+    """cut_dec ka vector version: decimal hata do (toward zero)."""
+    return np.trunc(x)
+
+
+def levels_to_ladder(
+    levels: Mapping[str, float], mark_missing_t15: bool = True
+) -> np.ndarray:
+    """
+    calc_gann_levels_with_excel / JSON row dict -> (1, len(GANN_FIELDS)) row.
+    *_t15 missing ho to NaN (map_levels_batch: entry ke liye *_entry,
+    HALF_GAP opp target ke liye 0.0 - purane mapper jaisa); bot3 me 0.0.
+    """
+    row = [float(levels.get(name, 0.0) or 0.0) for name in GANN_FIELDS]
+    mat = np.array([row], dtype=np.float64)
+    if not mark_missing_t15:
+        return mat
+    for side in ("buy", "sell"):
+        if f"{side}_t15" not in levels:
+            mat[0, FIELD_INDEX[f"{side}_t15"]] = np.nan
+    return mat
+
+
+# ========== TARGET PICK ==========
+
+
+def pick_buy_target(
+    ladders: np.ndarray, raw_target: np.ndarray, fallback: str
+) -> np.ndarray:
+    """
+    Candidates <= raw_target me max; koi na ho to fallback
+    ("max" = ATR_NORMAL mapper, "min" = bot3).
+    """
+    c = _cands(ladders, BUY_TARGET_KEYS)
+    below = c <= raw_target[:, None]
+    best = np.where(below, c, -np.inf).max(axis=1)
+    fb = c.max(axis=1) if fallback == "max" else c.min(axis=1)
+    return np.where(below.any(axis=1), best, fb)
+
+
+def pick_sell_target(
+    ladders: np.ndarray, raw_target: np.ndarray, fallback: str
+) -> np.ndarray:
+    """Candidates >= raw_target me min; koi na ho to fallback ("min" / "max")."""
+    c = _cands(ladders, SELL_TARGET_KEYS)
+    above = c >= raw_target[:, None]
+    best = np.where(above, c, np.inf).min(axis=1)
+    fb = c.min(axis=1) if fallback == "min" else c.max(axis=1)
+    return np.where(above.any(axis=1), best, fb)
+
+
+# ========== 10AM / MIDDAY / 915 MAPPING ==========
+
+
+def map_levels_batch(
+    ladders: np.ndarray,
+    trigger_side: np.ndarray,
+    is_half_gap: np.ndarray,
+    high_vol_orb: np.ndarray,
+    atr14: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    map_gann_levels_to_v1req ka batch version.
+
+    Inputs (n,) arrays; ladders (n, len(GANN_FIELDS)); trigger_side
+    "BUY" / "SELL" (aur kuch ho to SELL jaisa map, par high-vol shift nahi).
+    Returns buy_level/buy_t2/buy_t4/buy_sl + sell_* arrays.
+    HALF_GAP rows me t2 set nahi hota -> NaN.
+    """
+    ladders = np.asarray(ladders, dtype=np.float64)
+    n = ladders.shape[0]
+    side = np.broadcast_to(np.char.upper(np.asarray(trigger_side, dtype=str)), (n,))
+    is_buy = side == "BUY"
+    is_sell = side == "SELL"
+    half_gap = np.broadcast_to(np.asarray(is_half_gap, dtype=bool), (n,))
+    high_vol = np.broadcast_to(np.asarray(high_vol_orb, dtype=bool), (n,))
+    atr = np.broadcast_to(np.asarray(atr14, dtype=np.float64), (n,))
+
+    buy_entry = _col(ladders, "buy_entry")
+    sell_entry = _col(ladders, "sell_entry")
+    # NaN t15 (levels_to_ladder, key missing): entry pe *_entry, HALF_GAP target 0.0
+    buy_t15_raw = _col(ladders, "buy_t15")
+    sell_t15_raw = _col(ladders, "sell_t15")
+    buy_t15 = np.where(np.isnan(buy_t15_raw), buy_entry, buy_t15_raw)
+    sell_t15 = np.where(np.isnan(sell_t15_raw), sell_entry, sell_t15_raw)
+    buy_t2 = _col(ladders, "buy_t2")
+    sell_t2 = _col(ladders, "sell_t2")
+
+    # High-vol: sirf opp leg t15 pe shift
+    sell_opp = np.where(high_vol & is_buy, sell_t15, sell_entry)
+    buy_opp = np.where(high_vol & is_sell, buy_t15, buy_entry)
+
+    buy_level = cut_dec_arr(np.where(is_buy, buy_t15, buy_opp))
+    sell_level = cut_dec_arr(np.where(is_buy, sell_opp, sell_t15))
+
+    # ---- ATR_NORMAL targets (base = cut level) ----
+    has_atr = atr > 0
+    buy_pick = pick_buy_target(ladders, buy_level + ATR_NORMAL_MULT * atr, fallback="max")
+    sell_pick = pick_sell_target(ladders, sell_level - ATR_NORMAL_MULT * atr, fallback="min")
+    buy_t4_atr = cut_dec_arr(np.where(has_atr, buy_pick, _col(ladders, "buy_t4")))
+    sell_t4_atr = cut_dec_arr(np.where(has_atr, sell_pick, _col(ladders, "sell_t4")))
+
+    # ---- HALF_GAP fixed targets ----
+    buy_t4_hg = cut_dec_arr(np.where(is_buy, buy_t2, np.nan_to_num(buy_t15_raw)))
+    sell_t4_hg = cut_dec_arr(np.where(is_buy, np.nan_to_num(sell_t15_raw), sell_t2))
+
+    nan = np.full(n, np.nan)
+    return {
+        "buy_level": buy_level,
+        "buy_t2": np.where(half_gap, nan, cut_dec_arr(buy_t2)),
+        "buy_t4": np.where(half_gap, buy_t4_hg, buy_t4_atr),
+        "buy_sl": cut_dec_arr(sell_level),
+        "sell_level": sell_level,
+        "sell_t2": np.where(half_gap, nan, cut_dec_arr(sell_t2)),
+        "sell_t4": np.where(half_gap, sell_t4_hg, sell_t4_atr),
+        "sell_sl": cut_dec_arr(buy_level),
+    }
+
+
+# ========== BOT-3 MAPPING ==========
+
+
+def map_bot3_batch(
+    ladders: np.ndarray,
+    is_buy_bo: np.ndarray,
+    atr14: np.ndarray,
+    is_method_a: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    map_bot3_gann_levels ka batch version (1.5 x ATR target rule).
+    Returns primary_/opp_ entry, sl, target arrays.
+    """
+    ladders = np.asarray(ladders, dtype=np.float64)
+    n = ladders.shape[0]
+    is_buy = np.broadcast_to(np.asarray(is_buy_bo, dtype=bool), (n,))
+    atr = np.broadcast_to(np.asarray(atr14, dtype=np.float64), (n,))
+    method_a = np.broadcast_to(np.asarray(is_method_a, dtype=bool), (n,))
+
+    buy_entry = _col(ladders, "buy_entry")
+    sell_entry = _col(ladders, "sell_entry")
+
+    has_atr = atr > 0
+    buy_target = np.where(
+        has_atr,
+        pick_buy_target(ladders, buy_entry + atr * BOT3_ATR_MULT, fallback="min"),
+        _col(ladders, "buy_t2"),
+    )
+    sell_target = np.where(
+        has_atr,
+        pick_sell_target(ladders, sell_entry - atr * BOT3_ATR_MULT, fallback="max"),
+        _col(ladders, "sell_t2"),
+    )
+
+    opp_buy_entry = np.where(method_a, _col(ladders, "buy_t2"), buy_entry)
+    opp_sell_entry = np.where(method_a, _col(ladders, "sell_t2"), sell_entry)
+
+    return {
+        "primary_entry": np.where(is_buy, _col(ladders, "buy_t15"), _col(ladders, "sell_t15")),
+        "primary_sl": np.where(is_buy, sell_entry, buy_entry),
+        "primary_target": np.where(is_buy, buy_target, sell_target),
+        "opp_entry": np.where(is_buy, opp_sell_entry, opp_buy_entry),
+        "opp_sl": np.where(is_buy, buy_entry, sell_entry),
+        "opp_target": np.where(is_buy, sell_target, buy_target),
+    }
+
+
+# ========== CMP CONVENIENCE ==========
+
+
+def ladders_for_cmps(cmps: np.ndarray, midday: bool = False) -> np.ndarray:
+    """
+    CMP array -> ladder rows: 24000-27000 band compiled table se,
+    bahar formula se (get_gann_row_from_json jaisa).
+    """
+    from gann_table import GANN_BASE_CMP, GANN_MAX_CMP, get_gann_table
+    from gann_formula import gann_ladder
+
+    cmp_int = np.rint(np.asarray(cmps, dtype=np.float64)).astype(np.int64)
+    out = gann_ladder(cmp_int, midday)
+    in_band = (cmp_int >= GANN_BASE_CMP) & (cmp_int <= GANN_MAX_CMP)
+    if in_band.any():
+        out[in_band] = get_gann_table(midday).rows(cmp_int[in_band])
+    return out
+
+
+def ladder_columns(ladders: np.ndarray) -> Dict[str, list]:
+    """(n, len(GANN_FIELDS)) -> {field: [n values]} (columnar JSON ke liye)."""
+    out = {name: ladders[:, i].tolist() for i, name in enumerate(GANN_FIELDS)}
+    out["cmp"] = [int(x) for x in out["cmp"]]
+    return out
+
+
+def ladder_npz_bytes(ladders: np.ndarray) -> bytes:
+    """Ladder rows -> .npz bytes, har field ek array (np.load se wapas)."""
+    buf = io.BytesIO()
+    cols = {name: ladders[:, i] for i, name in enumerate(GANN_FIELDS)}
+    cols["cmp"] = cols["cmp"].astype(np.int64)
+    np.savez(buf, **cols)
+    return buf.getvalue()
@@ -0,0 +1,180 @@
+# gann_table.py
+"""
+Gann ladder -> float64 matrix (.npy), mmap se load.
+
+Row = cmp - GANN_BASE_CMP, column = GANN_FIELDS ka index.
+Source gann_formula hai (JSON tables se bit-for-bit match); .npy sirf
+compile_table likhta hai - missing ho, formula file se purana ho ya layout
+badla ho tab. JSON ab sirf reference hai (json_matrix / validate_against_table),
+Excel sirf gann_compile.py ke build-time check me.
+
+    python gann_table.py        # dono tables compile
+"""
+
+import json
+import os
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from config import GANN_TABLE_DIR
+
+
+GANN_BASE_CMP = 24000
+GANN_MAX_CMP = 27000
+
+GANN_FIELDS = (
+    "cmp",
+    "buy_entry", "buy_t15", "buy_t2", "buy_t25", "buy_t3", "buy_t35", "buy_t4",
+    "buy_entry_opp",
+    "sell_entry", "sell_t15", "sell_t2", "sell_t25", "sell_t3", "sell_t35", "sell_t4",
+    "sell_entry_opp",
+    "buy_sl", "sell_sl",
+)
+FIELD_INDEX: Dict[str, int] = {name: i for i, name in enumerate(GANN_FIELDS)}
+
+
+def _json_path(midday: bool) -> Path:
+    from gann_engine import GANN_JSON_PATH, GANN_MIDDAY_JSON_PATH
+
+    return Path(GANN_MIDDAY_JSON_PATH if midday else GANN_JSON_PATH)
+
+
+def compiled_path(midday: bool) -> Path:
+    return Path(GANN_TABLE_DIR) / (_json_path(midday).stem + ".npy")
+
+
+def json_matrix(json_path: Path) -> np.ndarray:
+    """JSON ladder -> (n_rows, len(GANN_FIELDS)) float64 (reference / validation ke liye)."""
+    json_path = Path(json_path)
+    with open(json_path, "r") as f:
+        raw = json.load(f)
+
+    n = GANN_MAX_CMP - GANN_BASE_CMP + 1
+    mat = np.full((n, len(GANN_FIELDS)), np.nan, dtype=np.float64)
+    for key, row in raw.items():
+        i = int(key) - GANN_BASE_CMP
+        if not 0 <= i < n:
+            continue
+        mat[i] = [float(row.get(name, 0.0)) for name in GANN_FIELDS]
+
+    if np.isnan(mat[:, 0]).any():
+        missing = int(np.isnan(mat[:, 0]).sum())
+        raise ValueError(f"{json_path.name}: {missing} cmp rows missing in {GANN_BASE_CMP}-{GANN_MAX_CMP}")
+    return mat
+
+
+def compile_table(midday: bool, out_path: Optional[Path] = None) -> Path:
+    """gann_formula ladder (GANN_BASE_CMP..GANN_MAX_CMP) -> .npy (atomic write)."""
+    from gann_formula import gann_ladder
+
+    out_path = Path(out_path) if out_path else compiled_path(midday)
+    cmps = np.arange(GANN_BASE_CMP, GANN_MAX_CMP + 1, dtype=np.float64)
+    mat = gann_ladder(cmps, midday)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, mat)
+    os.replace(tmp, out_path)
+
+    print("[GANN-TABLE] compiled", "midday" if midday else "morning", "->", out_path, mat.shape)
+    return out_path
+
+
+def load_matrix(midday: bool) -> np.ndarray:
+    """Compiled matrix (read-only mmap). Missing / stale ho to pehle compile."""
+    import gann_formula
+
+    npy = compiled_path(midday)
+    stale = (
+        not npy.exists()
+        or os.stat(gann_formula.__file__).st_mtime > npy.stat().st_mtime
+    )
+    if stale:
+        compile_table(midday, npy)
+
+    mat = np.load(npy, mmap_mode="r")
+    if mat.ndim != 2 or mat.shape[1] != len(GANN_FIELDS):
+        # Purana / alag layout - dobara compile
+        compile_table(midday, npy)
+        mat = np.load(npy, mmap_mode="r")
+    return mat
+
+
+class GannTable:
+    """Row / column access over the compiled ladder matrix."""
+
+    def __init__(self, matrix: np.ndarray) -> None:
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return int(self.matrix.shape[0])
+
+    def index_of(self, cmp_int: int) -> int:
+        i = int(cmp_int) - GANN_BASE_CMP
+        if not 0 <= i < len(self):
+            raise KeyError(cmp_int)
+        return i
+
+    def row(self, cmp_int: int) -> Dict[str, float]:
+        """JSON row jaisa dict (cmp int rehta hai)."""
+        vals = self.matrix[self.index_of(cmp_int)].tolist()
+        out = dict(zip(GANN_FIELDS, vals))
+        out["cmp"] = int(out["cmp"])
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """Poora column (view) - vectorized kaam ke liye."""
+        return self.matrix[:, FIELD_INDEX[name]]
+
+    def rows(self, cmp_ints: np.ndarray) -> np.ndarray:
+        """cmp array -> (n, len(GANN_FIELDS)) matrix (fancy indexing, copy)."""
+        idx = np.asarray(cmp_ints, dtype=np.int64) - GANN_BASE_CMP
+        return self.matrix[idx]
+
+
+class GannTableView(Mapping):
+    """
+    Purane GANN_TABLE dict ka read-only stand-in: table["24000"] -> row dict.
+    Matrix pehli access pe load hota hai.
+    """
+
+    def __init__(self, midday: bool) -> None:
+        self.midday = midday
+
+    def _table(self) -> GannTable:
+        return get_gann_table(self.midday)
+
+    def __getitem__(self, key) -> Dict[str, float]:
+        return self._table().row(int(key))
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(GANN_BASE_CMP + i) for i in range(len(self._table())))
+
+    def __len__(self) -> int:
+        return len(self._table())
+
+
+_TABLES: Dict[bool, GannTable] = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def get_gann_table(midday: bool = False) -> GannTable:
+    """Process-wide loaded table (morning / midday)."""
+    table = _TABLES.get(midday)
+    if table is not None:
+        return table
+
+    with _TABLES_LOCK:
+        if midday not in _TABLES:
+            _TABLES[midday] = GannTable(load_matrix(midday))
+        return _TABLES[midday]
+
+
+if __name__ == "__main__":
+    for mid in (False, True):
+        compile_table(mid)
@@ -1,11 +1,11 @@
 # half_gap_rule.py
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any
 
-from config import NIFTYINDEXTOKEN
-from smartapi_helpers import getindex1min
+from candle_cache import get_candle_arrays
+from multi_timeframe import bars_for
 
 
 def atr_tradingview_style(df: pd.DataFrame, length: int = 14) -> float:
@@ -29,13 +29,17 @@ def atr_tradingview_style(df: pd.DataFrame, length: int = 14) -> float:
     return float(round(float(last_atr), 2)) if pd.notna(last_atr) else 0.0
 
 
-def get_angel_atr_14(api, symbol_token: str, trade_date: str) -> float:
+def fetch_angel_15min_history(api, symbol_token: str, trade_date: str) -> pd.DataFrame:
+    """
+    trade_date - 7 din se trade_date 09:30 tak ki 15-min candles
+    (columns ts/o/h/l/c, ts sorted). Error pe empty DF.
+    """
     try:
         start_dt = pd.to_datetime(trade_date) - pd.Timedelta(days=7)
         from_date = start_dt.strftime("%Y-%m-%d") + " 09:15"
         to_date = f"{trade_date} 09:30"
 
-        hist = api.getCandleData({
+        hist = get_candle_arrays(api, {
             "exchange":    "NSE",
             "symboltoken": symbol_token,
             "interval":    "FIFTEEN_MINUTE",
@@ -43,16 +47,31 @@ def get_angel_atr_14(api, symbol_token: str, trade_date: str) -> float:
             "todate":      to_date,
         })
 
-        if hist.get("status") != True or not hist.get("data"):
+        arr = hist.get("arrays")
+        if hist.get("status") != True or arr is None or len(arr) == 0:
             print("[ATR-15M-HIST-DEBUG] status=", hist.get("status"),
-                  "rows=", len(hist.get("data") or []))
-            return 0.0
+                  "rows=", len(arr) if arr is not None else 0)
+            return pd.DataFrame()
+
+        # arrays already minute-sorted hain
+        return pd.DataFrame({
+            "ts": arr.times(),
+            "o": arr.open,
+            "h": arr.high,
+            "l": arr.low,
+            "c": arr.close,
+            "v": arr.volume,
+        })
+
+    except Exception as e:
+        print("[ATR-15M-ERROR]", e)
+        return pd.DataFrame()
 
-        df = pd.DataFrame(hist["data"], columns=[
-                          "ts", "o", "h", "l", "c", "v"])
-        df["ts"] = pd.to_datetime(df["ts"])
-        df[["o", "h", "l", "c"]] = df[["o", "h", "l", "c"]].astype(float)
-        df = df.sort_values("ts")
+
+def atr_14_from_15min_history(df: pd.DataFrame, trade_date: str) -> float:
+    try:
+        if df.empty:
+            return 0.0
 
         cutoff_naive = pd.to_datetime(f"{trade_date} 09:30")
         cutoff = (cutoff_naive.tz_localize(df["ts"].dt.tz)
@@ -72,7 +91,24 @@ def get_angel_atr_14(api, symbol_token: str, trade_date: str) -> float:
         return 0.0
 
 
-def detect_half_gap(api, nifty_idxdf: pd.DataFrame, trade_date: str) -> Dict[str, Any]:
+def get_angel_atr_14(api, symbol_token: str, trade_date: str) -> float:
+    df = fetch_angel_15min_history(api, symbol_token, trade_date)
+    return atr_14_from_15min_history(df, trade_date)
+
+
+def _day_context(api, trade_date: str, ctx):
+    if ctx is None:
+        from day_context import DayContext
+        ctx = DayContext(api, trade_date)
+    return ctx
+
+
+def detect_half_gap(
+    api,
+    nifty_idxdf: pd.DataFrame,
+    trade_date: str,
+    ctx=None,
+) -> Dict[str, Any]:
     base = {
         "half_gap_type": "NO_HALF_GAP",
         "daily_open":    0.0,
@@ -104,7 +140,8 @@ def detect_half_gap(api, nifty_idxdf: pd.DataFrame, trade_date: str) -> Dict[str
     daily_open = float(first_candle["open"].iloc[0])
     base["daily_open"] = daily_open
 
-    atr_14 = get_angel_atr_14(api, NIFTYINDEXTOKEN, trade_date)
+    ctx = _day_context(api, trade_date, ctx)
+    atr_14 = ctx.atr_14()
     print("[ATR-15M-DEBUG] trade_date=", trade_date, "ATR14_15m=", atr_14)
     base["atr_14"] = atr_14
 
@@ -112,9 +149,8 @@ def detect_half_gap(api, nifty_idxdf: pd.DataFrame, trade_date: str) -> Dict[str
         base["half_gap_type"] = "NO_ATR"
         return base
 
-    prev_date = (pd.to_datetime(trade_date) -
-                 timedelta(days=1)).strftime("%Y-%m-%d")
-    prev_df = getindex1min(api, prev_date, NIFTYINDEXTOKEN)
+    # Prev TRADING day (Monday / holiday ke baad bhi sahi)
+    prev_df = ctx.prev_day_1min()
     prev_close = float(prev_df["close"].iloc[-1]
                        ) if not prev_df.empty else daily_open
     base["prev_close"] = prev_close
@@ -140,60 +176,33 @@ def detect_half_gap(api, nifty_idxdf: pd.DataFrame, trade_date: str) -> Dict[str
     return base
 
 
-def detect_hook_930_exact(api, trade_date: str) -> Dict[str, Any]:
+def detect_hook_930_exact(api, trade_date: str, ctx=None) -> Dict[str, Any]:
     """
     9:30 Hook Detection (cross/touch logic):
     - Gap DOWN: today 9:15-9:30 HIGH >= prev last candle LOW  → HOOKED
     - Gap UP:   today 9:15-9:30 LOW  <= prev last candle HIGH → HOOKED
-    - 10-day lookback for prev day (weekend/holiday handle)
+    - Prev trading day DayContext se (weekend/holiday handle)
     """
+    ctx = _day_context(api, trade_date, ctx)
 
-    # ---------- Prev day last candle (10-day lookback) ----------
-    trade_dt = datetime.strptime(trade_date, "%Y-%m-%d")
-    prev_day = trade_dt - timedelta(days=1)
-    max_lookback = 10
-
+    # ---------- Prev day last candle ----------
     prev_last = None
-    prev_found_date = None
-
-    for _ in range(max_lookback):
-        fromdt = prev_day.replace(hour=9, minute=15)
-        todt = prev_day.replace(hour=15, minute=30)
-
-        payload = {
-            "exchange": "NSE",
-            "symboltoken": NIFTYINDEXTOKEN,
-            "interval": "ONE_MINUTE",
-            "fromdate": fromdt.strftime("%Y-%m-%d %H:%M"),
-            "todate":   prev_day.replace(hour=15, minute=31).strftime("%Y-%m-%d %H:%M"),
-        }
+    prev_found_date, df = ctx.prev_day()
+
+    if not df.empty:
+        # Last 15-min candle (15:15–15:30)
+        df15 = bars_for(df).bars_15m
 
-        hist = api.getCandleData(payload)
-        if hist.get("status") and hist.get("data"):
-            df = pd.DataFrame(
-                hist["data"],
-                columns=["time", "open", "high", "low", "close", "volume"],
-            )
-            df["time"] = pd.to_datetime(df["time"]).dt.tz_localize(None)
-            df = df.set_index("time")
-
-            # Last 15-min candle (15:15–15:30)
-            df15 = df.resample("15min").agg(
-                {"open": "first", "high": "max", "low": "min", "close": "last"}
-            ).dropna()
-
-            prev_last = df15.iloc[-1]
-            prev_found_date = prev_day.date()
-            print(
-                f"[HOOK] Prev day found: {prev_found_date} last 15min candle time={prev_last.name}")
-            break
+        prev_last = df15.iloc[-1]
+        print(
+            f"[HOOK] Prev day found: {prev_found_date} last 15min candle time={prev_last.name}")
 
     prev_close = float(prev_last["close"])
     prev_high = float(prev_last["high"])
     prev_low = float(prev_last["low"])
 
     # ---------- Today 9:15–9:30 ----------
-    today_df = getindex1min(api, trade_date, NIFTYINDEXTOKEN)
+    today_df = ctx.nifty_1min()
     if today_df.empty:
         print("[HOOK] NO_TODAY_DATA – treating as HOOKED")
         return {
@@ -204,7 +213,7 @@ def detect_hook_930_exact(api, trade_date: str) -> Dict[str, Any]:
 
     t_915 = pd.Timestamp(f"{trade_date} 09:15")
     t_930 = pd.Timestamp(f"{trade_date} 09:30")
-    today_15m = today_df[(today_df.index >= t_915) & (today_df.index < t_930)]
+    today_15m = bars_for(today_df).window(t_915, t_930)
 
     if today_15m.empty:
         print("[HOOK] NO_915_930 – treating as HOOKED")
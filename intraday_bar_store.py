@@ -0,0 +1,109 @@
+# intraday_bar_store.py
+
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+
+from candle_decode import CandleArrays, decode_rows, minute_of
+from candle_fetcher import fetch_candles
+
+
+PAYLOAD_FMT = "%Y-%m-%d %H:%M"
+SESSION_OPEN = "09:15"
+SESSION_CLOSE = "15:30"
+
+
+class IntradayBarStore:
+    """
+    Ek instrument ke aaj ke 1-min bars, live loop ke liye.
+
+    refresh() sirf last held bar se abhi tak ka delta maangta hai (last bar
+    inclusive, kyunki wo abhi ban raha ho sakta hai) aur append karta hai.
+    Poora 09:15-15:30 har loop pe dobara download nahi hota.
+    """
+
+    def __init__(
+        self,
+        api,
+        trade_date: str,
+        exchange: str,
+        token: str,
+        interval: str = "ONE_MINUTE",
+    ) -> None:
+        self.api = api
+        self.trade_date = trade_date
+        self.exchange = exchange
+        self.token = str(token)
+        self.interval = interval
+
+        self._bars = CandleArrays.empty()
+        self._frame: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+        self._open = datetime.strptime(f"{trade_date} {SESSION_OPEN}", PAYLOAD_FMT)
+        self._close = datetime.strptime(f"{trade_date} {SESSION_CLOSE}", PAYLOAD_FMT)
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+    def _window(self, now: datetime):
+        if len(self._bars):
+            last = int(self._bars.minute[-1])
+            from_dt = self._open + timedelta(minutes=last - minute_of(self._open))
+        else:
+            from_dt = self._open
+        to_dt = min(now, self._close)
+        return from_dt, to_dt
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        """Delta fetch + append. Returns naye + updated bars ki count (-1 on error)."""
+        now = now or datetime.now()
+
+        with self._lock:
+            from_dt, to_dt = self._window(now)
+            if to_dt < from_dt:
+                return 0
+
+            hist = fetch_candles(self.api, {
+                "exchange": self.exchange,
+                "symboltoken": self.token,
+                "interval": self.interval,
+                "fromdate": from_dt.strftime(PAYLOAD_FMT),
+                "todate": to_dt.strftime(PAYLOAD_FMT),
+            })
+            if not hist.get("status"):
+                print(
+                    "[BAR-STORE] delta fetch error", self.exchange, self.token,
+                    hist.get("message"),
+                )
+                return -1
+
+            new = decode_rows(hist.get("data") or [])
+            if len(new) == 0:
+                return 0
+
+            # Overlap (last forming bar) replace karo, baaki append
+            keep = self._bars.minute < int(new.minute[0])
+            before = int(keep.sum())
+            self._bars = CandleArrays.concat([self._bars.take(keep), new])
+            self._frame = None
+
+            added = len(self._bars) - before
+            print(
+                "[BAR-STORE] refresh", self.exchange, self.token,
+                from_dt.strftime("%H:%M"), "->", to_dt.strftime("%H:%M"),
+                "bars", len(self._bars),
+            )
+            return added
+
+    def arrays(self) -> CandleArrays:
+        return self._bars
+
+    def frame(self) -> pd.DataFrame:
+        """getindex1min jaisa DataFrame (DatetimeIndex 'time'); refresh tak cached."""
+        with self._lock:
+            if self._frame is None:
+                self._frame = self._bars.to_frame() if len(self._bars) else pd.DataFrame()
+            return self._frame
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 # =============== ACCOUNT CONFIG (MULTI-ACCOUNT) ===============
 
@@ -56,3 +56,23 @@ class SimpleVixConfig(BaseModel):
 class LiveTradeSimpleRequest(BaseModel):
     account_name: str       # app yahi field bhej raha hai
     config: SimpleVixConfig # sirf date + expiry
+
+
+# =============== GANN LEVELS (BATCH) ===============
+
+class GannLevelsRequest(BaseModel):
+    cmps: Optional[List[float]] = None   # explicit CMP list (e.g. har 15m close)
+    start: Optional[int] = None          # ya range: start..end (inclusive)
+    end: Optional[int] = None
+    step: int = 1
+    midday: bool = False
+    format: Literal["json", "npz"] = "json"
+
+
+# =============== BATCH BACKTEST ===============
+
+class BacktestBatchRequest(BaseModel):
+    date_from: str                 # "YYYY-MM-DD"
+    date_to: str                   # "YYYY-MM-DD" (inclusive)
+    expiry: str = "live"           # live | current | INDEX | YYYY-MM-DD
+    workers: Optional[int] = None  # default BACKTEST_BATCH_WORKERS
@@ -0,0 +1,207 @@
+# multi_timeframe.py
+"""
+Ek din ke 1-min bars se 15-min / 1-hour / daily bars - ek hi baar.
+
+Pehle har rule apna resample("15min").agg(...) chalata tha (aksar same din
+ke overlapping slices pe). Ab:
+
+    bars = bars_for(full_idxdf)       # frame ke liye cached
+    bars.bars_15m                     # == resample("15min").agg(OHLC).dropna()
+    bars.bars_1h, bars.daily
+    bars.session("ORB_915")           # (lo, hi) integer offsets 1-min arrays me
+    bars.window(t_915, t_930)         # 1-min slice, searchsorted se
+    bars.passage                      # FirstPassage (first_passage.py), cached
+
+Buckets pandas resample jaise: midnight se 15 min / 1 h / 1 din, khali ya
+NaN buckets drop, first/last NaN skip karte hain. Returned frames shared
+hain - modify karna ho to .copy().
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from first_passage import FirstPassage
+
+
+MINUTE_NS = 60 * 10**9
+RULE_NS = {
+    "15min": 15 * MINUTE_NS,
+    "1h": 60 * MINUTE_NS,
+    "1D": 24 * 60 * MINUTE_NS,
+}
+DAY_NS = RULE_NS["1D"]
+
+# Rules ke fixed session windows: [start, end)
+SESSION_WINDOWS: Dict[str, Tuple[time, time]] = {
+    "ORB_915": (time(9, 15), time(9, 30)),
+    "ORB_10AM": (time(10, 0), time(10, 15)),
+    "MIDDAY_ORB": (time(12, 30), time(12, 45)),
+    "MARKET": (time(9, 15), time(15, 30)),
+}
+
+_CACHE_SIZE = 8
+
+
+def as_ns(values) -> np.ndarray:
+    """Datetimes -> int64 ns (index ka unit ns / us kuch bhi ho)."""
+    return np.asarray(values, dtype="datetime64[ns]").view(np.int64)
+
+
+def segment_starts(keys: np.ndarray) -> np.ndarray:
+    """Sorted keys me har naye key ka pehla position."""
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def aggregate_ohlc(
+    ts: np.ndarray,
+    o: np.ndarray,
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    width_ns: int,
+) -> Tuple[np.ndarray, ...]:
+    """
+    Sorted 1-min arrays -> (bucket_ns, open, high, low, close, first_row).
+    resample(width).agg(OHLC).dropna() jaisa; first_row = bucket ka pehla
+    input row (caller day / window map kar sake).
+    """
+    bucket = ts // width_ns
+    starts = segment_starts(bucket)
+    if len(starts) == 0:
+        empty = np.empty(0)
+        return np.empty(0, dtype=np.int64), empty, empty, empty, empty, np.empty(0, dtype=np.int64)
+
+    n = len(ts)
+    pos = np.arange(n)
+    first = np.minimum.reduceat(np.where(np.isnan(o), n, pos), starts)
+    last = np.maximum.reduceat(np.where(np.isnan(c), -1, pos), starts)
+    b_open = np.where(first < n, o[np.minimum(first, n - 1)], np.nan)
+    b_close = np.where(last >= 0, c[np.maximum(last, 0)], np.nan)
+    b_high = np.fmax.reduceat(h, starts)
+    b_low = np.fmin.reduceat(l, starts)
+
+    keep = ~(np.isnan(b_open) | np.isnan(b_high) | np.isnan(b_low) | np.isnan(b_close))
+    return (
+        (bucket[starts] * width_ns)[keep],
+        b_open[keep],
+        b_high[keep],
+        b_low[keep],
+        b_close[keep],
+        starts[keep],
+    )
+
+
+class MultiTimeframeBars:
+    """1-min frame ke arrays + lazily derived (phir cached) higher timeframes."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self.index = df.index
+        self.n = len(df)
+        self.ts = as_ns(df.index)
+        self.open = df["open"].to_numpy(dtype=float)
+        self.high = df["high"].to_numpy(dtype=float)
+        self.low = df["low"].to_numpy(dtype=float)
+        self.close = df["close"].to_numpy(dtype=float)
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._passage: Optional[FirstPassage] = None
+        self._lock = threading.Lock()
+
+    # ---------- higher timeframes ----------
+
+    def resampled(self, rule: str) -> pd.DataFrame:
+        """rule: "15min" / "1h" / "1D"."""
+        frame = self._frames.get(rule)
+        if frame is not None:
+            return frame
+        with self._lock:
+            if rule not in self._frames:
+                t, o, h, l, c, _ = aggregate_ohlc(
+                    self.ts, self.open, self.high, self.low, self.close, RULE_NS[rule]
+                )
+                index = pd.DatetimeIndex(t.astype("datetime64[ns]"), name=self.index.name)
+                self._frames[rule] = pd.DataFrame(
+                    {"open": o, "high": h, "low": l, "close": c},
+                    index=index.astype(self.index.dtype),
+                )
+            return self._frames[rule]
+
+    @property
+    def bars_15m(self) -> pd.DataFrame:
+        return self.resampled("15min")
+
+    @property
+    def bars_1h(self) -> pd.DataFrame:
+        return self.resampled("1h")
+
+    @property
+    def daily(self) -> pd.DataFrame:
+        return self.resampled("1D")
+
+    @property
+    def passage(self) -> FirstPassage:
+        """Frame ka first-passage index (level touch / SL-target race), ek hi baar."""
+        if self._passage is None:
+            with self._lock:
+                if self._passage is None:
+                    self._passage = FirstPassage(self.df)
+        return self._passage
+
+    # ---------- session windows ----------
+
+    def offsets(self, start: datetime, end: Optional[datetime] = None,
+                include_end: bool = False) -> Tuple[int, int]:
+        """[start, end) (include_end -> [start, end]) ke 1-min positions (lo, hi)."""
+        lo = int(np.searchsorted(self.ts, as_ns([start])[0], side="left"))
+        if end is None:
+            return lo, self.n
+        hi = int(np.searchsorted(self.ts, as_ns([end])[0], side="right" if include_end else "left"))
+        return lo, max(lo, hi)
+
+    def session(self, name: str, trade_date=None) -> Tuple[int, int]:
+        """SESSION_WINDOWS[name] ke offsets; trade_date default pehle bar ka din."""
+        if trade_date is None:
+            trade_date = self.index[0].date()
+        start, end = SESSION_WINDOWS[name]
+        return self.offsets(datetime.combine(trade_date, start), datetime.combine(trade_date, end))
+
+    def window(self, start: datetime, end: Optional[datetime] = None,
+               include_end: bool = False) -> pd.DataFrame:
+        lo, hi = self.offsets(start, end, include_end)
+        return self.df.iloc[lo:hi]
+
+    def session_frame(self, name: str, trade_date=None) -> pd.DataFrame:
+        lo, hi = self.session(name, trade_date)
+        return self.df.iloc[lo:hi]
+
+
+_BARS: "OrderedDict[int, MultiTimeframeBars]" = OrderedDict()
+_BARS_LOCK = threading.Lock()
+
+
+def bars_for(df: pd.DataFrame) -> MultiTimeframeBars:
+    """
+    df (sorted 1-min, DatetimeIndex) ka MultiTimeframeBars - same frame
+    object ke liye dobara nahi banta. Index reassign / length badle to rebuild.
+    """
+    key = id(df)
+    with _BARS_LOCK:
+        bars = _BARS.get(key)
+        if bars is not None and bars.df is df and bars.index is df.index and bars.n == len(df):
+            _BARS.move_to_end(key)
+            return bars
+
+    bars = MultiTimeframeBars(df)
+    with _BARS_LOCK:
+        _BARS[key] = bars
+        _BARS.move_to_end(key)
+        while len(_BARS) > _CACHE_SIZE:
+            _BARS.popitem(last=False)
+    return bars
@@ -0,0 +1,131 @@
+# option_chain.py
+"""
+Option chain slice: spot ke ±N strikes x ek ya zyada expiries, ek call me.
+
+Har (expiry, strike, CE/PE) scrip index ka O(1) hit hai; result columnar
+arrays me aata hai - bulk quote (getMarketData) ya bulk history (fetch_many)
+ke liye seedha ready.
+
+    chain = option_chain_slice(24987.5, ["2026-03-03", "2026-03-10"], n_steps=5)
+    chain.token_for(25000, "2026-03-03", "CE")
+    chain.quote_payload()            # {"NFO": [...tokens]}
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from scrip_index import get_scrip_index
+from smartapi_helpers import normalize_expiry_to_code
+
+
+NIFTY_STRIKE_STEP = 50
+STRIKE_FILE_UNITS = 100.0  # scrip master me strike * 100
+
+
+@dataclass
+class OptionChainSlice:
+    exchange: str
+    expiry: np.ndarray      # "02MAR2026" codes
+    strike: np.ndarray      # int64
+    opttype: np.ndarray     # "CE" / "PE"
+    token: np.ndarray
+    symbol: np.ndarray
+    lotsize: np.ndarray     # int64
+    tick_size: np.ndarray   # float64
+
+    def __len__(self) -> int:
+        return int(len(self.token))
+
+    def token_for(self, strike: int, expiry: str, opttype: str) -> Optional[str]:
+        code = normalize_expiry_to_code(expiry)
+        hit = np.flatnonzero(
+            (self.strike == int(strike))
+            & (self.expiry == code)
+            & (self.opttype == opttype.upper())
+        )
+        return str(self.token[hit[0]]) if len(hit) else None
+
+    def quote_payload(self) -> Dict[str, List[str]]:
+        """getMarketData(mode, exchangeTokens) ke liye."""
+        return {self.exchange: self.token.tolist()}
+
+    def candle_payloads(self, trade_date: str, interval: str = "ONE_MINUTE") -> Dict[str, Dict[str, Any]]:
+        """token -> getCandleData payload (09:15-15:30), fetch_many jobs ke liye."""
+        return {
+            tok: {
+                "exchange": self.exchange,
+                "symboltoken": tok,
+                "interval": interval,
+                "fromdate": f"{trade_date} 09:15",
+                "todate": f"{trade_date} 15:30",
+            }
+            for tok in self.token.tolist()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Columnar JSON (API / logs)."""
+        return {
+            "exchange": self.exchange,
+            "expiry": self.expiry.tolist(),
+            "strike": self.strike.tolist(),
+            "opttype": self.opttype.tolist(),
+            "token": self.token.tolist(),
+            "symbol": self.symbol.tolist(),
+            "lotsize": self.lotsize.tolist(),
+            "tick_size": self.tick_size.tolist(),
+        }
+
+
+def resolve_chain(
+    strikes: Iterable[int],
+    expiries: Iterable[str],
+    opttypes: Iterable[str] = ("CE", "PE"),
+    exchange: str = "NFO",
+    name: str = "NIFTY",
+) -> OptionChainSlice:
+    """Diye strikes x expiries x opttypes; jo scrip master me nahi wo skip."""
+    idx = get_scrip_index()
+    codes = [c for c in (normalize_expiry_to_code(e) for e in expiries) if c]
+    strikes = sorted({int(s) for s in strikes})
+    opttypes = [t.upper() for t in opttypes]
+
+    rows = []
+    for code in codes:
+        for strike in strikes:
+            for opttype in opttypes:
+                hit = idx.option(
+                    exchange, name, "OPTIDX", code, strike * STRIKE_FILE_UNITS, opttype,
+                )
+                if hit:
+                    rows.append((code, strike, opttype, hit))
+
+    missing = len(codes) * len(strikes) * len(opttypes) - len(rows)
+    if missing:
+        print(f"[CHAIN] {missing} contracts not in scrip master ({name} {codes})")
+
+    return OptionChainSlice(
+        exchange=exchange,
+        expiry=np.array([r[0] for r in rows], dtype=str),
+        strike=np.array([r[1] for r in rows], dtype=np.int64),
+        opttype=np.array([r[2] for r in rows], dtype=str),
+        token=np.array([r[3].token for r in rows], dtype=str),
+        symbol=np.array([r[3].symbol for r in rows], dtype=str),
+        lotsize=np.array([r[3].lotsize for r in rows], dtype=np.int64),
+        tick_size=np.array([r[3].tick_size for r in rows], dtype=np.float64),
+    )
+
+
+def option_chain_slice(
+    spot: float,
+    expiries: Iterable[str],
+    n_steps: int = 10,
+    step: int = NIFTY_STRIKE_STEP,
+    exchange: str = "NFO",
+    name: str = "NIFTY",
+) -> OptionChainSlice:
+    """Spot ke nearest strike ke ±n_steps strikes, sab expiries, CE + PE."""
+    atm = int(round(spot / step) * step)
+    strikes = range(atm - n_steps * step, atm + (n_steps + 1) * step, step)
+    return resolve_chain(strikes, expiries, exchange=exchange, name=name)
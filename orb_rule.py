@@ -3,6 +3,8 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from price_rounding import round_index_price_for_side
+from breakout_scanner import ORB_10AM_MARKING, scan_day
+from multi_timeframe import bars_for
 
 
 def detect_orb_atr_ratio(nifty_idxdf: pd.DataFrame, atr_14: float) -> Dict[str, Any]:
@@ -29,12 +31,7 @@ def detect_orb_atr_ratio(nifty_idxdf: pd.DataFrame, atr_14: float) -> Dict[str,
     else:
         df = nifty_idxdf
 
-    trade_date = df.index[0].date()
-    orb_start = datetime.combine(
-        trade_date, datetime.strptime("10:00", "%H:%M").time())
-    orb_end = datetime.combine(
-        trade_date, datetime.strptime("10:15", "%H:%M").time())
-    orb_candle = df[(df.index >= orb_start) & (df.index < orb_end)]
+    orb_candle = bars_for(df).session_frame("ORB_10AM")
 
     if orb_candle.empty:
         return result
@@ -135,31 +132,15 @@ def get_marking_and_trigger(idxdf: pd.DataFrame) -> Dict[str, Any]:
         else:
             return {"status": "error", "message": "No datetime index/time column"}
 
-    trade_date = idxdf.index[0].date()
-    mark_start = datetime.combine(
-        trade_date, datetime.strptime("10:00", "%H:%M").time()
-    )
-    mark_end = datetime.combine(
-        trade_date, datetime.strptime("10:15", "%H:%M").time()
-    )
-    orb_window_end = datetime.combine(
-        trade_date, datetime.strptime("12:30", "%H:%M").time()
-    )
-
-    marking = idxdf[(idxdf.index >= mark_start) & (idxdf.index < mark_end)]
-    if marking.empty:
+    # 10:00-10:15 mark, 10:15-12:30 bars ki 15-min candles (breakout_scanner kernel)
+    day = scan_day(idxdf, ORB_10AM_MARKING)
+    if not day.has_mark:
         return {"status": "error", "message": "No 10:00–10:15 data"}
 
-    marked_high = float(marking["high"].max())
-    marked_low = float(marking["low"].min())
-
-    # NIFTY index ke rounded trigger levels
-    rounded_buy_trigger = round_index_price_for_side(marked_high, "BUY")
-    rounded_sell_trigger = round_index_price_for_side(marked_low, "SELL")
+    marked_high = day.marked_high
+    marked_low = day.marked_low
 
-    trigger_df = idxdf[(idxdf.index >= mark_end) &
-                       (idxdf.index <= orb_window_end)]
-    if trigger_df.empty:
+    if day.scan_bars == 0:
         return {
             "status":      "no_orb_window",
             "message":     "No candles in ORB window",
@@ -167,42 +148,26 @@ def get_marking_and_trigger(idxdf: pd.DataFrame) -> Dict[str, Any]:
             "marked_low":  marked_low,
         }
 
-    agg_dict = {"open": "first", "high": "max", "low": "min", "close": "last"}
-    trigger_df15m = trigger_df.resample("15min").agg(agg_dict).dropna()
-
-    for ts, row in trigger_df15m.iterrows():
-        close_price = float(row["close"])
-        high_price = float(row["high"])
-        low_price = float(row["low"])
+    checked = day.candles if day.hit < 0 else day.candles.iloc[: day.hit + 1]
+    for ts, close_price, high_price, low_price in zip(
+        checked.index, checked["close"].tolist(), checked["high"].tolist(), checked["low"].tolist()
+    ):
         print(
             f"ORB-15M-CHECK {ts} close {close_price} high {high_price} low {low_price}"
         )
 
-        # BUY breakout: close must reach rounded_buy_trigger
-        if close_price >= rounded_buy_trigger:
-            # trigger_price = breakout candle ka CLOSE
-            rounded_trigger = round_index_price_for_side(close_price, "BUY")
-            return {
-                "status": "ok",
-                "trigger_side": "BUY",
-                "trigger_time": ts,
-                "trigger_price": rounded_trigger,
-                "marked_high": marked_high,
-                "marked_low": marked_low,
-            }
-
-        # SELL breakout: close must reach rounded_sell_trigger
-        if close_price <= rounded_sell_trigger:
-            # trigger_price = breakout candle ka CLOSE
-            rounded_trigger = round_index_price_for_side(close_price, "SELL")
-            return {
-                "status": "ok",
-                "trigger_side": "SELL",
-                "trigger_time": ts,
-                "trigger_price": rounded_trigger,
-                "marked_high": marked_high,
-                "marked_low": marked_low,
-            }
+    # Close rounded trigger (high ceil to next int / low floor) tak pahunche;
+    # trigger_price = breakout candle ka CLOSE (rounded)
+    if day.hit >= 0:
+        close_price = float(day.candles["close"].iloc[day.hit])
+        return {
+            "status": "ok",
+            "trigger_side": day.side,
+            "trigger_time": day.time,
+            "trigger_price": round_index_price_for_side(close_price, day.side),
+            "marked_high": marked_high,
+            "marked_low": marked_low,
+        }
 
     return {
         "status":      "no_orb_breakout",
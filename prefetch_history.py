@@ -0,0 +1,288 @@
+# prefetch_history.py
+"""
+Multi-month backtest se pehle saara market data candle cache me warm karo.
+
+    python prefetch_history.py --from 2025-10-01 --to 2026-01-31
+    python prefetch_history.py --from 2025-10-01 --to 2026-01-31 --strike-band 2 --workers 4
+
+Har trading session ke liye:
+  1. NIFTY / SENSEX / VIX 1-min, prev session, 15-min ATR seed, daily history
+  2. NIFTY bars se wahi triggers nikaalo jo engine use karta hai
+     (9:15 ORB, 10:00 ORB, MIDDAY ORB) -> Gann levels -> CE/PE strikes (± band)
+  3. Un strikes ke option 1-min bars
+
+Completed dates state file me likhe jaate hain; dobara chalane pe wahi se resume.
+Aaj ka session 15:30 IST close ke baad hi done mark hota hai.
+Fetch khud bhi idempotent hai (closed day cache se dobara nahi aata).
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import CANDLE_CACHE_DIR, VIXINDEXTOKEN
+from candle_cache import session_closed
+from day_context import DayContext
+from gann_engine import (
+    GANN_EXCEL_PATH,
+    GANNEXCELPATH_MIDDAY,
+    calc_gann_levels_with_excel,
+)
+from orb_rule import get_marking_and_trigger
+from bot3_high_vol_rule import build_bot3_breakout_context
+from smartapi_helpers import (
+    smartlogin,
+    getoptiontoken,
+    get_orb_breakout_15min,
+    get_midday_orb_breakout_15min,
+)
+from trading_calendar import get_trading_calendar, weekly_expiry_for
+
+
+DEFAULT_STATE_FILE = Path(CANDLE_CACHE_DIR) / "prefetch_state.json"
+
+# Mapping engine in levels ko entry/opp entry ke liye use karta hai
+ENTRY_LEVEL_KEYS = ("buy_entry", "buy_t15", "sell_entry", "sell_t15")
+
+
+def _round_to_50(x: float) -> int:
+    return int(round(x / 50.0) * 50)
+
+
+# ---------- STATE (resume) ----------
+
+def _load_state(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {"done": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        state.setdefault("done", {})
+        return state
+    except Exception as e:
+        print("[PREFETCH] state file unreadable, starting fresh:", e)
+        return {"done": {}}
+
+
+def _save_state(path: Path, state: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# ---------- PLANNING ----------
+
+def plan_triggers(nifty_idxdf) -> List[Tuple[str, float, str]]:
+    """
+    (side, trigger_price, table) jo engine is din choose kar sakta hai.
+    table: "MORNING" ya "MIDDAY" (Gann JSON).
+    """
+    triggers: List[Tuple[str, float, str]] = []
+
+    def add(info: Dict[str, Any], side_key: str, price_key: str, table: str) -> None:
+        side = info.get(side_key)
+        price = info.get(price_key)
+        if side in ("BUY", "SELL") and price:
+            triggers.append((side, float(price), table))
+
+    try:
+        add(build_bot3_breakout_context(nifty_idxdf), "bo_side", "bo_close", "MORNING")
+    except Exception as e:
+        print("[PREFETCH] 9:15 ORB plan error:", e)
+    try:
+        add(get_marking_and_trigger(nifty_idxdf), "trigger_side", "trigger_price", "MORNING")
+    except Exception as e:
+        print("[PREFETCH] 10:00 ORB plan error:", e)
+    try:
+        add(get_orb_breakout_15min(nifty_idxdf), "trigger_side", "trigger_price", "MORNING")
+    except Exception as e:
+        print("[PREFETCH] 10:00 ORB (15m) plan error:", e)
+    try:
+        add(get_midday_orb_breakout_15min(nifty_idxdf), "trigger_side", "trigger_price", "MIDDAY")
+    except Exception as e:
+        print("[PREFETCH] MIDDAY ORB plan error:", e)
+
+    return triggers
+
+
+def plan_strikes(
+    triggers: List[Tuple[str, float, str]],
+    band: int,
+) -> Set[int]:
+    """Triggers -> Gann entry levels -> ATM strikes (± band * 50)."""
+    strikes: Set[int] = set()
+    for side, price, table in triggers:
+        excel_path = GANNEXCELPATH_MIDDAY if table == "MIDDAY" else GANN_EXCEL_PATH
+        try:
+            levels = calc_gann_levels_with_excel(int(price), side=side, excel_path=excel_path)
+        except Exception as e:
+            print("[PREFETCH] gann error", side, price, e)
+            continue
+        for key in ENTRY_LEVEL_KEYS:
+            lvl = levels.get(key) or 0.0
+            if lvl <= 0:
+                continue
+            atm = _round_to_50(lvl)
+            for k in range(-band, band + 1):
+                strikes.add(atm + 50 * k)
+    return strikes
+
+
+def pick_expiry(trade_date: date, policy: str) -> str:
+    """
+    live    -> pick_expiry_for_live jaisa (expiry day pe next week)
+    current -> is hafte ka expiry, expiry day pe wahi din
+    YYYY-MM-DD -> fixed
+    """
+    if policy == "live":
+        return weekly_expiry_for(trade_date).strftime("%Y-%m-%d")
+    if policy == "current":
+        return weekly_expiry_for(trade_date, roll_on_expiry_day=False).strftime("%Y-%m-%d")
+    return policy
+
+
+# ---------- ONE DAY ----------
+
+def warm_day(
+    api,
+    trade_date: date,
+    band: int,
+    expiry_policy: str,
+    with_options: bool,
+) -> Dict[str, Any]:
+    ds = trade_date.strftime("%Y-%m-%d")
+    ctx = DayContext(api, ds)
+
+    # Phase 1: index series (parallel inside prefetch)
+    ctx.prefetch()
+    ctx.index_1min(VIXINDEXTOKEN)
+
+    nifty = ctx.nifty_1min()
+    if nifty.empty:
+        return {"status": "no_index_data", "options": 0}
+
+    if not with_options:
+        return {"status": "ok", "options": 0}
+
+    # Phase 2: strikes from the levels engine would choose
+    triggers = plan_triggers(nifty.copy())
+    strikes = plan_strikes(triggers, band)
+    expiry = pick_expiry(trade_date, expiry_policy)
+
+    tokens: List[str] = []
+    for strike in sorted(strikes):
+        for opttype in ("CE", "PE"):
+            tok = getoptiontoken(strike, expiry, opttype, as_of=ds)
+            if tok:
+                tokens.append(tok)
+
+    # Phase 3: option bars (parallel)
+    ctx.prefetch(option_tokens=tokens)
+
+    return {
+        "status": "ok",
+        "expiry": expiry,
+        "triggers": len(triggers),
+        "strikes": sorted(strikes),
+        "options": len(tokens),
+    }
+
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Warm candle cache for a backtest date range")
+    p.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+    p.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+    p.add_argument("--strike-band", type=int, default=1,
+                   help="ATM ke dono taraf kitne 50-pt strikes (default 1)")
+    p.add_argument("--expiry", default="live",
+                   help="live | current | YYYY-MM-DD (default live)")
+    p.add_argument("--workers", type=int, default=3,
+                   help="kitne dates ek saath (rate limit fir bhi global hai)")
+    p.add_argument("--no-options", action="store_true", help="sirf index/history")
+    p.add_argument("--state-file", default=str(DEFAULT_STATE_FILE))
+    p.add_argument("--restart", action="store_true", help="state ignore karke sab dobara")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    d_from = datetime.strptime(args.date_from, "%Y-%m-%d").date()
+    d_to = datetime.strptime(args.date_to, "%Y-%m-%d").date()
+
+    api = smartlogin()
+    if api is None:
+        print("[PREFETCH] login failed")
+        return 1
+
+    cal = get_trading_calendar(api, need_until=d_to, need_from=d_from)
+    sessions = cal.sessions_between(d_from, min(d_to, date.today()))
+
+    state_path = Path(args.state_file)
+    state = {"done": {}} if args.restart else _load_state(state_path)
+    todo = [d for d in sessions if d.isoformat() not in state["done"]]
+
+    print(
+        f"[PREFETCH] sessions={len(sessions)} already_done={len(sessions) - len(todo)} "
+        f"todo={len(todo)} band={args.strike_band} expiry={args.expiry}"
+    )
+
+    lock = threading.Lock()
+    started = time.time()
+    failed: List[str] = []
+    completed = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(
+                warm_day, api, d, args.strike_band, args.expiry, not args.no_options
+            ): d
+            for d in todo
+        }
+        for fut in as_completed(futures):
+            d = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"status": f"error: {e}"}
+
+            with lock:
+                completed += 1
+                if res.get("status") != "ok":
+                    failed.append(d.isoformat())
+                # Aaj ka session 15:30 se pehle partial hai: warm hua, done nahi
+                elif session_closed(d):
+                    state["done"][d.isoformat()] = {
+                        "options": res.get("options", 0),
+                        "expiry": res.get("expiry"),
+                    }
+                    _save_state(state_path, state)
+
+                elapsed = time.time() - started
+                eta = elapsed / completed * (len(todo) - completed)
+                print(
+                    f"[PREFETCH] {completed}/{len(todo)} {d} {res.get('status')} "
+                    f"options={res.get('options', 0)} "
+                    f"elapsed={elapsed:.0f}s eta={eta:.0f}s"
+                )
+
+    if failed:
+        print("[PREFETCH] failed dates (rerun to retry):", ", ".join(sorted(failed)))
+        return 2
+
+    print(f"[PREFETCH] done in {time.time() - started:.0f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
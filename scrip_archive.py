@@ -0,0 +1,221 @@
+# scrip_archive.py
+"""
+Scrip master ka dated archive - expired contracts ke tokens backtest ke liye.
+
+Har refresh pe traded-instrument snapshot SCRIP_ARCHIVE_DIR/YYYY-MM-DD.npz me
+jaata hai, aur merged.npz me fold hota hai: har contract version ek row,
+saath me first_seen / last_seen date. Lookup:
+
+    get_archive_index().option("NFO", "NIFTY", "OPTIDX", "06JAN2026", 2520000.0, "CE",
+                               as_of="2026-01-02")
+
+Purani JSON files (jo haath se rakhi thi) bhi import ho sakti hain:
+
+    python scrip_archive.py add OpenAPIScripMaster_2025-12-01.json --date 2025-12-01
+    python scrip_archive.py rebuild
+"""
+
+import argparse
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import SCRIP_ARCHIVE_DIR
+from scrip_index import ScripHit, ScripKey, _opttype_of, load_records
+from scrip_snapshot import filter_columns, read_snapshot, write_snapshot
+
+
+MERGED_NAME = "merged.npz"
+# Version identity: same key + same token = same contract
+_COLS = ("exch_seg", "name", "instrumenttype", "expiry", "strike", "symbol",
+         "token", "lotsize", "tick_size")
+
+
+def _archive_dir() -> Path:
+    return Path(SCRIP_ARCHIVE_DIR)
+
+
+def merge_snapshot(
+    merged: Optional[Dict[str, np.ndarray]],
+    cols: Dict[str, np.ndarray],
+    day: str,
+) -> Dict[str, np.ndarray]:
+    """Ek din ka snapshot merged columns me fold (first_seen / last_seen update)."""
+    if merged is None or len(merged["token"]) == 0:
+        out = {k: cols[k] for k in _COLS}
+        n = len(cols["token"])
+        out["first_seen"] = np.full(n, day, dtype="<U10")
+        out["last_seen"] = np.full(n, day, dtype="<U10")
+        return out
+
+    pos = {
+        (e, n_, i, x, s, t): j
+        for j, (e, n_, i, x, s, t) in enumerate(zip(
+            merged["exch_seg"].tolist(), merged["name"].tolist(),
+            merged["instrumenttype"].tolist(), merged["expiry"].tolist(),
+            merged["strike"].tolist(), merged["token"].tolist(),
+        ))
+    }
+    first = merged["first_seen"].astype("<U10")
+    last = merged["last_seen"].astype("<U10")
+
+    new_rows: List[int] = []
+    for j, key in enumerate(zip(
+        cols["exch_seg"].tolist(), cols["name"].tolist(),
+        cols["instrumenttype"].tolist(), cols["expiry"].tolist(),
+        cols["strike"].tolist(), cols["token"].tolist(),
+    )):
+        i = pos.get(key)
+        if i is None:
+            new_rows.append(j)
+            continue
+        if day < first[i]:
+            first[i] = day
+        if day > last[i]:
+            last[i] = day
+
+    out = {k: np.concatenate([merged[k], cols[k][new_rows]]) for k in _COLS}
+    out["first_seen"] = np.concatenate([first, np.full(len(new_rows), day, dtype="<U10")])
+    out["last_seen"] = np.concatenate([last, np.full(len(new_rows), day, dtype="<U10")])
+    return out
+
+
+def _read_merged() -> Optional[Dict[str, np.ndarray]]:
+    snap = read_snapshot(_archive_dir() / MERGED_NAME)
+    return snap[1] if snap else None
+
+
+def archive_snapshot(
+    cols: Dict[str, np.ndarray],
+    day: Optional[str] = None,
+    stamp: Tuple[float, int] = (0.0, 0),
+) -> Path:
+    """Dated snapshot likho aur merged archive update karo."""
+    day = day or date.today().strftime("%Y-%m-%d")
+    out_dir = _archive_dir()
+    dated = write_snapshot(cols, stamp, out_dir / f"{day}.npz")
+
+    with _MERGE_LOCK:
+        merged = merge_snapshot(_read_merged(), cols, day)
+        write_snapshot(merged, stamp, out_dir / MERGED_NAME)
+
+    print("[SCRIP-ARCHIVE]", day, "rows", len(cols["token"]), "merged", len(merged["token"]))
+    return dated
+
+
+def rebuild_merged() -> int:
+    """Sab dated snapshots se merged.npz dobara (date order me)."""
+    merged = None
+    for path in sorted(_archive_dir().glob("????-??-??.npz")):
+        snap = read_snapshot(path)
+        if snap:
+            merged = merge_snapshot(merged, snap[1], path.stem)
+    if merged is None:
+        return 0
+    with _MERGE_LOCK:
+        write_snapshot(merged, (0.0, 0), _archive_dir() / MERGED_NAME)
+    return int(len(merged["token"]))
+
+
+class ArchiveIndex:
+    """merged.npz -> key -> [(first_seen, last_seen, ScripHit), ...]."""
+
+    def __init__(self, merged: Dict[str, np.ndarray], mtime: float = 0.0) -> None:
+        self.mtime = mtime
+        self._versions: Dict[ScripKey, List[Tuple[str, str, ScripHit]]] = {}
+
+        rows = zip(*(merged[k].tolist() for k in _COLS + ("first_seen", "last_seen")))
+        for exch, name, inst, expiry, strike, symbol, token, lotsize, tick, first, last in rows:
+            opttype = _opttype_of(symbol)
+            if not opttype:
+                continue
+            key = (exch, name, inst, expiry.upper(), float(strike), opttype)
+            self._versions.setdefault(key, []).append(
+                (first, last, ScripHit(token, symbol, int(lotsize), float(tick), exch))
+            )
+        for versions in self._versions.values():
+            versions.sort(key=lambda v: v[0])
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def option(
+        self,
+        exch_seg: str,
+        name: str,
+        instrumenttype: str,
+        expiry_code: str,
+        strike_file_units: float,
+        opttype: str,
+        as_of: Optional[str] = None,
+    ) -> Optional[ScripHit]:
+        """
+        as_of (YYYY-MM-DD) pe jo version listed tha; exact window na mile to
+        as_of se pehle ka latest, warna sabse purana. as_of None -> latest.
+        """
+        versions = self._versions.get((
+            exch_seg, name, instrumenttype, expiry_code.upper(),
+            float(strike_file_units), opttype.upper(),
+        ))
+        if not versions:
+            return None
+        if as_of is None:
+            return versions[-1][2]
+        for first, last, hit in versions:
+            if first <= as_of <= last:
+                return hit
+        before = [v for v in versions if v[0] <= as_of]
+        return (before[-1] if before else versions[0])[2]
+
+
+_MERGE_LOCK = threading.Lock()
+_INDEX: Optional[ArchiveIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_archive_index() -> Optional[ArchiveIndex]:
+    """Process-wide archive index; merged.npz badle to reload. Archive na ho to None."""
+    global _INDEX
+
+    path = _archive_dir() / MERGED_NAME
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    idx = _INDEX
+    if idx is not None and idx.mtime == mtime:
+        return idx
+
+    with _INDEX_LOCK:
+        if _INDEX is not None and _INDEX.mtime == mtime:
+            return _INDEX
+        merged = _read_merged()
+        if merged is None:
+            return _INDEX
+        _INDEX = ArchiveIndex(merged, mtime)
+        print("[SCRIP-ARCHIVE] index loaded, contracts", len(_INDEX))
+        return _INDEX
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scrip master archive")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    add = sub.add_parser("add", help="purani scrip master JSON archive me daalo")
+    add.add_argument("path")
+    add.add_argument("--date", required=True, help="YYYY-MM-DD (file kis din ki hai)")
+    sub.add_parser("rebuild", help="dated snapshots se merged.npz dobara")
+    args = parser.parse_args()
+
+    if args.cmd == "add":
+        archive_snapshot(filter_columns(load_records(Path(args.path))), args.date)
+    else:
+        print("[SCRIP-ARCHIVE] merged rows", rebuild_merged())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# scrip_index.py
+"""
+OpenAPIScripMaster.json ka process-wide in-memory index.
+
+Key (exch_seg, name, instrumenttype, expiry, strike, opttype) -> ScripHit
+(token, symbol, lotsize, tick_size, exch_seg). Index scrip_snapshot ke pre-filtered
+columns se banta hai; snapshot stale / missing ho tabhi full JSON parse hota
+hai (aur naya snapshot likha jata hai). File ka mtime/size badle
+(update-openapi) to naya index side me banta hai aur ek assignment se swap
+hota hai - readers ko kabhi aadha bana index nahi milta.
+
+    idx = get_scrip_index()
+    hit = idx.option("NFO", "NIFTY", "OPTIDX", "02MAR2026", 2520000.0, "CE")
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import SCRIPMASTERFILE
+from scrip_snapshot import filter_columns, read_snapshot, write_snapshot
+
+
+# (exch_seg, name, instrumenttype, expiry "02MAR2026", strike (file units), "CE"/"PE")
+ScripKey = Tuple[str, str, str, str, float, str]
+
+
+class ScripHit(NamedTuple):
+    token: str
+    symbol: str
+    lotsize: int
+    tick_size: float
+    exch_seg: str = ""
+
+
+def _opttype_of(symbol: str) -> str:
+    tail = symbol[-2:].upper()
+    return tail if tail in ("CE", "PE") else ""
+
+
+def _expiry_to_iso(code: str) -> Optional[str]:
+    for fmt in ("%d%b%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(code, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+class ScripIndex:
+    """Columns (scrip_snapshot.filter_columns format) -> dict lookups."""
+
+    def __init__(self, cols: Dict[str, np.ndarray], stamp: Tuple[float, int] = (0.0, 0)) -> None:
+        self.stamp = stamp
+        self._options: Dict[ScripKey, ScripHit] = {}
+        self._by_token: Dict[str, ScripHit] = {}
+        expiry_codes: Dict[Tuple[str, str, str], set] = {}
+
+        rows = zip(
+            cols["exch_seg"].tolist(),
+            cols["name"].tolist(),
+            cols["instrumenttype"].tolist(),
+            cols["expiry"].tolist(),
+            cols["strike"].tolist(),
+            cols["symbol"].tolist(),
+            cols["token"].tolist(),
+            cols["lotsize"].tolist(),
+            cols["tick_size"].tolist(),
+        )
+        for exch, name, inst, expiry, strike, symbol, token, lotsize, tick in rows:
+            hit = ScripHit(token, symbol, int(lotsize), float(tick), exch)
+            self._by_token.setdefault(token, hit)
+            if expiry:
+                expiry_codes.setdefault((exch, name, inst), set()).add(expiry.upper())
+            opttype = _opttype_of(symbol)
+            if opttype:
+                # duplicate ho to pehla row (purane linear scan jaisa)
+                self._options.setdefault(
+                    (exch, name, inst, expiry.upper(), float(strike), opttype), hit
+                )
+
+        # strptime sirf unique expiries pe, har row pe nahi
+        self._expiries: Dict[Tuple[str, str, str], List[str]] = {
+            seg: sorted(filter(None, (_expiry_to_iso(c) for c in codes)))
+            for seg, codes in expiry_codes.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._options)
+
+    def expiries(self, exch_seg: str, name: str, instrumenttype: str) -> List[str]:
+        """Segment ki sab expiries 'YYYY-MM-DD' sorted."""
+        return list(self._expiries.get((exch_seg, name, instrumenttype), ()))
+
+    def option(
+        self,
+        exch_seg: str,
+        name: str,
+        instrumenttype: str,
+        expiry_code: str,
+        strike_file_units: float,
+        opttype: str,
+    ) -> Optional[ScripHit]:
+        return self._options.get((
+            exch_seg,
+            name,
+            instrumenttype,
+            expiry_code.upper(),
+            float(strike_file_units),
+            opttype.upper(),
+        ))
+
+    def by_token(self, token: str) -> Optional[ScripHit]:
+        return self._by_token.get(str(token))
+
+
+def load_records(path: Path) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else data.get("data", [])
+
+
+def _file_stamp(path: Path) -> Tuple[float, int]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        # Master nahi hai (fresh deploy) -> snapshot ka stamp chalega
+        snap = read_snapshot()
+        if snap is None:
+            raise
+        return snap[0]
+    return (st.st_mtime, st.st_size)
+
+
+_INDEX: Optional[ScripIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_scrip_index(path: Path = SCRIPMASTERFILE) -> ScripIndex:
+    """
+    Current index. Har call pe sirf os.stat; file badli ho to rebuild
+    (ek hi thread build karta hai, baaki purana index use karte rehte hain).
+    """
+    global _INDEX
+
+    stamp = _file_stamp(path)
+    idx = _INDEX
+    if idx is not None and idx.stamp == stamp:
+        return idx
+
+    # Rebuild chal raha ho aur purana index hai to wait mat karo
+    if idx is not None:
+        if not _INDEX_LOCK.acquire(blocking=False):
+            return idx
+    else:
+        _INDEX_LOCK.acquire()
+
+    try:
+        idx = _INDEX
+        if idx is not None and idx.stamp == stamp:
+            return idx
+        new = _build_index(Path(path), stamp)
+        _INDEX = new
+        return new
+    finally:
+        _INDEX_LOCK.release()
+
+
+def _build_index(path: Path, stamp: Tuple[float, int]) -> ScripIndex:
+    """Snapshot ka stamp master se match kare to snapshot, warna JSON parse + snapshot likho."""
+    snap = read_snapshot()
+    if snap is not None and (snap[0] == stamp or not path.exists()):
+        idx = ScripIndex(snap[1], stamp)
+        print("[SCRIP-INDEX] loaded snapshot, options", len(idx))
+        return idx
+
+    cols = filter_columns(load_records(path))
+    try:
+        write_snapshot(cols, stamp)
+    except OSError as e:
+        print("[SCRIP-INDEX] snapshot write error", e)
+    idx = ScripIndex(cols, stamp)
+    print("[SCRIP-INDEX] loaded", path.name, "options", len(idx))
+    return idx
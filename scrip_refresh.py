@@ -0,0 +1,221 @@
+# scrip_refresh.py
+"""
+In-process scrip master refresh (pehle update_openapi_scripmaster.sh tha).
+
+    download (URL / local file) --stream--> tmp file
+                               \\--> incremental JSON parse -> traded-instrument columns
+    os.replace(tmp, OpenAPIScripMaster.json) -> snapshot (naye stamp ke saath)
+    diff vs purana snapshot, dated archive (scrip_archive)
+    -> background thread me scrip index + expiry index rebuild
+
+Memory: ek chunk + ek JSON object + traded instruments ke columns; poora
+30+ MB master kabhi memory me nahi aata. Readers ko ya purani file milti hai
+ya puri nayi (os.replace), aur rebuild ke dauran purana index serve hota rehta hai.
+
+    python scrip_refresh.py [URL_OR_PATH]     # custom source sirf CLI se
+
+HTTP endpoint (/admin/update-openapi) hamesha SCRIPMASTER_URL use karta hai.
+"""
+
+import codecs
+import json
+import os
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from config import SCRIPMASTERFILE, SCRIPMASTER_URL, SCRIP_REFRESH_TIMEOUT
+from scrip_archive import archive_snapshot
+from scrip_snapshot import TEXT_COLUMNS, keep_row, filter_columns, read_snapshot, write_snapshot
+
+
+CHUNK_SIZE = 1 << 20  # 1 MB
+KEEP_FIELDS = TEXT_COLUMNS + ("strike", "lotsize", "tick_size")
+
+_REFRESH_LOCK = threading.Lock()
+
+
+def _open_source(source: str):
+    if source.startswith(("http://", "https://")):
+        return urllib.request.urlopen(source, timeout=SCRIP_REFRESH_TIMEOUT)
+    return open(source, "rb")
+
+
+def iter_json_array(chunks: Iterator[bytes]) -> Iterator[Any]:
+    """
+    Top-level JSON array ke elements ek-ek karke (bytes chunks se).
+    Buffer me sirf unparsed tail rehta hai.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        # whitespace / comma / '[' skip
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            if not more():
+                raise ValueError("scrip master JSON truncated")
+            continue
+
+        if not started:
+            if buf[pos] == "{":
+                # {"data": [...]} wrapper - "[" tak skip
+                i = buf.find("[", pos)
+                if i < 0:
+                    if not more():
+                        raise ValueError("scrip master JSON: array not found")
+                    continue
+                pos = i
+            if buf[pos] != "[":
+                raise ValueError("scrip master JSON: expected array")
+            pos += 1
+            started = True
+            continue
+
+        if buf[pos] == "]":
+            return
+
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if not more():
+                raise ValueError("scrip master JSON truncated")
+            continue
+        pos = end
+        yield obj
+
+
+def _tee_chunks(src, dst) -> Iterator[bytes]:
+    while True:
+        chunk = src.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        dst.write(chunk)
+        yield chunk
+
+
+def _diff(old_cols: Optional[Dict], new_cols: Dict) -> Dict[str, Any]:
+    old_tokens = set(old_cols["token"].tolist()) if old_cols else set()
+    new_tokens = set(new_cols["token"].tolist())
+    added = new_tokens - old_tokens
+    removed = old_tokens - new_tokens
+
+    def sample(tokens, cols):
+        pos = {t: i for i, t in enumerate(cols["token"].tolist())}
+        return [str(cols["symbol"][pos[t]]) for t in sorted(tokens)[:20]]
+
+    return {
+        "instruments": len(new_tokens),
+        "added": len(added),
+        "removed": len(removed),
+        "added_sample": sample(added, new_cols),
+        "removed_sample": sample(removed, old_cols) if old_cols else [],
+    }
+
+
+def _rebuild_indexes() -> None:
+    from scrip_index import get_scrip_index
+    from expiry_store import refresh_and_get_expiries
+
+    try:
+        idx = get_scrip_index()
+        refresh_and_get_expiries(include_past=True)
+        print("[SCRIP-REFRESH] indexes rebuilt, options", len(idx))
+    except Exception as e:
+        print("[SCRIP-REFRESH] index rebuild error", e)
+
+
+def refresh_scripmaster(
+    source: Optional[str] = None,
+    background_rebuild: bool = True,
+) -> Dict[str, Any]:
+    """
+    Stream download + parse + atomic swap. Diff summary return karta hai;
+    index rebuild background thread me (background_rebuild=False -> inline).
+    Ek waqt me ek hi refresh.
+    """
+    source = source or SCRIPMASTER_URL
+    dest = Path(SCRIPMASTERFILE)
+
+    if not _REFRESH_LOCK.acquire(blocking=False):
+        return {"status": "BUSY", "message": "refresh already running"}
+
+    tmp = dest.with_name(dest.name + f".{os.getpid()}.tmp")
+    try:
+        rows = []
+        total = 0
+        with _open_source(str(source)) as src, open(tmp, "wb") as out:
+            for row in iter_json_array(_tee_chunks(src, out)):
+                total += 1
+                if isinstance(row, dict) and keep_row(row):
+                    rows.append({k: row.get(k) for k in KEEP_FIELDS})
+            out.flush()
+            os.fsync(out.fileno())
+
+        if total == 0:
+            raise ValueError("scrip master empty")
+
+        new_cols = filter_columns(rows)
+        old = read_snapshot()
+
+        # Master swap pehle, phir snapshot (swapped file ke stamp ke saath) - swap
+        # fail ho to naye stamp wala snapshot purani file ke saath nahi bachta.
+        # Beech me koi reader aaye to stamp mismatch -> full JSON parse (sahi data).
+        os.replace(tmp, dest)
+        st = os.stat(dest)
+        write_snapshot(new_cols, (st.st_mtime, st.st_size))
+
+        # Dated archive (expired contracts backtest me resolve ho sakein)
+        try:
+            archive_snapshot(new_cols, stamp=(st.st_mtime, st.st_size))
+        except Exception as e:
+            print("[SCRIP-REFRESH] archive error", e)
+
+        diff = _diff(old[1] if old else None, new_cols)
+        result = {"status": "OK", "rows": total, "bytes": st.st_size, **diff}
+        print(
+            "[SCRIP-REFRESH]", dest.name, "rows", total,
+            "traded", diff["instruments"], "+", diff["added"], "-", diff["removed"],
+        )
+    except Exception as e:
+        print("[SCRIP-REFRESH] failed", e)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        result = {"status": "ERROR", "message": str(e)}
+    finally:
+        _REFRESH_LOCK.release()
+
+    if result["status"] == "OK":
+        if background_rebuild:
+            threading.Thread(target=_rebuild_indexes, daemon=True, name="scrip-rebuild").start()
+        else:
+            _rebuild_indexes()
+
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(refresh_scripmaster(sys.argv[1] if len(sys.argv) > 1 else None, background_rebuild=False))
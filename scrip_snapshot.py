@@ -0,0 +1,118 @@
+# scrip_snapshot.py
+"""
+Scrip master ka chhota, pre-filtered snapshot (.npz, columnar).
+
+Sirf wahi instruments jo hum trade / fetch karte hain:
+- NIFTY (NFO) / SENSEX (BFO) OPTIDX
+- index tokens (NIFTY, SENSEX, VIX)
+- SCRIP_SNAPSHOT_MCX_NAMES wale MCX contracts
+
+/admin/update-openapi (scrip_refresh) download ke saath hi snapshot likhta hai. Snapshot me source
+JSON ka (mtime, size) stamp hota hai - scrip_index cold start / rebuild pe
+stamp match ho to 30+ MB JSON parse hi nahi hota.
+
+    python scrip_snapshot.py      # OpenAPIScripMaster.json -> snapshot
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    SCRIPMASTERFILE,
+    SCRIP_SNAPSHOT_FILE,
+    SCRIP_SNAPSHOT_OPTIONS,
+    SCRIP_SNAPSHOT_MCX_NAMES,
+    NIFTYINDEXTOKEN,
+    SENSEXINDEXTOKEN,
+    VIXINDEXTOKEN,
+)
+
+
+TEXT_COLUMNS = ("token", "symbol", "name", "expiry", "instrumenttype", "exch_seg")
+INDEX_TOKENS = (NIFTYINDEXTOKEN, SENSEXINDEXTOKEN, VIXINDEXTOKEN)
+
+
+def keep_row(row: dict) -> bool:
+    exch = row.get("exch_seg")
+    name = row.get("name")
+    if row.get("instrumenttype") == "OPTIDX" and (exch, name) in SCRIP_SNAPSHOT_OPTIONS:
+        return True
+    if str(row.get("token")) in INDEX_TOKENS:
+        return True
+    return exch == "MCX" and name in SCRIP_SNAPSHOT_MCX_NAMES
+
+
+def _num(x, default: float = 0.0) -> float:
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return default
+
+
+def filter_columns(records: List[dict]) -> Dict[str, np.ndarray]:
+    """Full master rows -> traded instruments ke columns."""
+    rows = [r for r in records if keep_row(r)]
+    cols: Dict[str, np.ndarray] = {
+        name: np.array([str(r.get(name) or "") for r in rows], dtype=str)
+        for name in TEXT_COLUMNS
+    }
+    cols["expiry"] = np.char.upper(cols["expiry"]) if len(rows) else cols["expiry"]
+    cols["strike"] = np.array([_num(r.get("strike")) for r in rows], dtype=np.float64)
+    cols["lotsize"] = np.array([int(_num(r.get("lotsize"))) for r in rows], dtype=np.int64)
+    cols["tick_size"] = np.array([_num(r.get("tick_size")) for r in rows], dtype=np.float64)
+    return cols
+
+
+def write_snapshot(
+    cols: Dict[str, np.ndarray],
+    source_stamp: Tuple[float, int],
+    path: Path = SCRIP_SNAPSHOT_FILE,
+) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            source_mtime=np.float64(source_stamp[0]),
+            source_size=np.int64(source_stamp[1]),
+            **cols,
+        )
+    os.replace(tmp, path)
+    return path
+
+
+def read_snapshot(
+    path: Path = SCRIP_SNAPSHOT_FILE,
+) -> Optional[Tuple[Tuple[float, int], Dict[str, np.ndarray]]]:
+    """(source_stamp, columns) ya None (missing / corrupt)."""
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            stamp = (float(z["source_mtime"]), int(z["source_size"]))
+            cols = {k: z[k] for k in z.files if not k.startswith("source_")}
+        return stamp, cols
+    except (OSError, ValueError, KeyError) as e:
+        if Path(path).exists():
+            print("[SCRIP-SNAPSHOT] read error", e)
+        return None
+
+
+def build_snapshot(
+    master_path: Path = SCRIPMASTERFILE,
+    path: Path = SCRIP_SNAPSHOT_FILE,
+) -> Dict[str, np.ndarray]:
+    """Master JSON parse karke snapshot likho; columns return."""
+    from scrip_index import load_records
+
+    st = os.stat(master_path)
+    cols = filter_columns(load_records(master_path))
+    write_snapshot(cols, (st.st_mtime, st.st_size), path)
+    print("[SCRIP-SNAPSHOT] wrote", Path(path).name, "rows", len(cols["token"]))
+    return cols
+
+
+if __name__ == "__main__":
+    build_snapshot()
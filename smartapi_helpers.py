@@ -7,7 +7,6 @@ from config import (
     TOTPSECRET,
     NIFTYINDEXTOKEN,
     SENSEXINDEXTOKEN,
-    SCRIPMASTERFILE,
     MARKING_START,
     MARKING_END,
 )
@@ -17,11 +16,15 @@ from datetime import datetime, timedelta, time as dtime
 import pandas as pd
 from SmartApi import SmartConnect
 from price_rounding import round_index_price_for_side
+from breakout_scanner import MIDDAY_1230, ORB_10AM_15M, scan_day
+from candle_cache import get_candle_arrays
+from broker import create_smartconnect
+from scrip_index import get_scrip_index
+from scrip_archive import get_archive_index
 import pyotp
-import json
 
 
-def _normalize_expiry_to_code(expiry: str) -> Optional[str]:
+def normalize_expiry_to_code(expiry: str) -> Optional[str]:
     """
     expiry ko '%Y-%m-%d' ya '%d%b%Y' se normalize karke '%d%b%Y' (e.g. '02MAR2026') banata hai.
     Galat string (jaise 'PE') aaye to None return karega.
@@ -50,7 +53,7 @@ DRY_RUN = True  # 🔁 test ke liye True, real trade ke liye False
 
 def smartlogin() -> Optional[SmartConnect]:
     totp = pyotp.TOTP(TOTPSECRET).now()
-    api = SmartConnect(api_key=APIKEY)
+    api = create_smartconnect(APIKEY)
     data = api.generateSession(CLIENTID, PASSWORD, totp)
     if not data.get("status"):
         print("SmartAPI login failed", data)
@@ -83,13 +86,13 @@ def getindex1min(
         "todate": todt.strftime("%Y-%m-%d %H:%M"),
     }
 
-    hist = api.getCandleData(payload)
+    hist = get_candle_arrays(api, payload)
     print(
         "DEBUG INDEX HIST:",
         exch,
         token,
         hist.get("status"),
-        len(hist.get("data") or []),
+        len(hist["arrays"]) if hist.get("arrays") is not None else 0,
     )
 
     if not hist.get("status"):
@@ -97,13 +100,7 @@ def getindex1min(
         print("Index getCandleData error:", msg, "token", token)
         return pd.DataFrame()
 
-    df = pd.DataFrame(
-        hist["data"],
-        columns=["time", "open", "high", "low", "close", "volume"],
-    )
-    df["time"] = pd.to_datetime(df["time"]).dt.tz_localize(None)
-    df = df.set_index("time")
-    return df
+    return hist["arrays"].to_frame()
 
 
 # ========== ORB BREAKOUT (15-MIN) ==========
@@ -135,39 +132,18 @@ def get_orb_breakout_15min(idx1: pd.DataFrame) -> Dict[str, Any]:
         else:
             return {"status": "error", "message": "No datetime index/time column"}
 
-    # 1-min -> 15-min
-    idx15 = (
-        idx1.resample("15min")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-        .dropna()
-    )
-
-    if idx15.empty:
-        return {"status": "error", "message": "No 15-min data"}
-
-    trade_date = idx15.index[0].date()
+    # 10:00 ORB candle + 10:15 .. 12:15 15-min candles (breakout_scanner kernel)
+    day = scan_day(idx1, ORB_10AM_15M)
 
-    # ORB candle timestamp = 10:00
-    orb_start = datetime.combine(
-        trade_date, datetime.strptime("10:00", "%H:%M").time())
-    # last VALID breakout candle timestamp = 12:15
-    orb_last = datetime.combine(
-        trade_date, datetime.strptime("12:15", "%H:%M").time())
-
-    # 10:00–10:15 ORB candle
-    if orb_start not in idx15.index:
+    if not day.has_mark:
         return {"status": "error", "message": "No 10:00–10:15 15-min candle"}
 
-    orb_row = idx15.loc[orb_start]
-    marked_high = float(orb_row["high"])
-    marked_low = float(orb_row["low"])
+    marked_high = day.marked_high
+    marked_low = day.marked_low
 
     print("[ORB-DEBUG] ORB 10:00-10:15 High/Low:", marked_high, marked_low)
 
-    # Breakout sirf 10:15 se 12:15 ke beech
-    trigger_df = idx15[(idx15.index > orb_start) & (idx15.index <= orb_last)]
-
-    if trigger_df.empty:
+    if day.candles.empty:
         return {
             "status": "no_orb_breakout",
             "message": "No 15-min candles in ORB breakout window (10:15–12:15)",
@@ -175,32 +151,21 @@ def get_orb_breakout_15min(idx1: pd.DataFrame) -> Dict[str, Any]:
             "marked_low": marked_low,
         }
 
-    for ts, row in trigger_df.iterrows():
+    if day.hit >= 0:
+        row = day.candles.iloc[day.hit]
         c = float(row["close"])
-        h = float(row["high"])
-        l = float(row["low"])
-
-        if c > marked_high:
-            print("[ORB-DEBUG] BUY breakout at", ts, "close", c, "high", h)
-            return {
-                "status": "ok",
-                "trigger_side": "BUY",
-                "trigger_time": ts,
-                "trigger_price": h,  # breakout candle HIGH
-                "marked_high": marked_high,
-                "marked_low": marked_low,
-            }
-
-        if c < marked_low:
-            print("[ORB-DEBUG] SELL breakout at", ts, "close", c, "low", l)
-            return {
-                "status": "ok",
-                "trigger_side": "SELL",
-                "trigger_time": ts,
-                "trigger_price": l,  # breakout candle LOW
-                "marked_high": marked_high,
-                "marked_low": marked_low,
-            }
+        if day.side == "BUY":
+            print("[ORB-DEBUG] BUY breakout at", day.time, "close", c, "high", day.price)
+        else:
+            print("[ORB-DEBUG] SELL breakout at", day.time, "close", c, "low", day.price)
+        return {
+            "status": "ok",
+            "trigger_side": day.side,
+            "trigger_time": day.time,
+            "trigger_price": day.price,  # breakout candle HIGH (BUY) / LOW (SELL)
+            "marked_high": marked_high,
+            "marked_low": marked_low,
+        }
 
     return {
         "status": "no_orb_breakout",
@@ -234,41 +199,19 @@ def get_midday_orb_breakout_15min(idx1: pd.DataFrame) -> Dict[str, Any]:
         else:
             return {"status": "error", "message": "No datetime index/time column"}
 
-    # 1-min -> 15-min
-    idx15 = (
-        idx1.resample("15min")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-        .dropna()
-    )
-
-    if idx15.empty:
-        return {"status": "error", "message": "No 15-min data"}
-
-    trade_date = idx15.index[0].date()
+    # 12:30 ORB candle + 12:45 ke baad saari 15-min candles (breakout_scanner kernel)
+    day = scan_day(idx1, MIDDAY_1230)
 
-    # MID-DAY ORB candle timestamp = 12:30
-    from datetime import datetime as _dt, time as _time
-
-    orb_mid_start = _dt.combine(trade_date, _time(12, 30))
-
-    if orb_mid_start not in idx15.index:
+    if not day.has_mark:
         return {"status": "error", "message": "No 12:30–12:45 15-min candle"}
 
-    orb_row = idx15.loc[orb_mid_start]
-    marked_high = float(orb_row["high"])
-    marked_low = float(orb_row["low"])
+    marked_high = day.marked_high
+    marked_low = day.marked_low
 
     print("[MID-ORB-DEBUG] MID ORB 12:30-12:45 High/Low:",
           marked_high, marked_low)
 
-    # NIFTY index ke rounded MIDDAY trigger levels (ORB high/low se)
-    rounded_buy_mid = round_index_price_for_side(marked_high, "BUY")
-    rounded_sell_mid = round_index_price_for_side(marked_low, "SELL")
-
-    # Breakout: saari 15-min candles AFTER 12:30 candle (no upper cutoff)
-    trigger_df = idx15[idx15.index > orb_mid_start]
-
-    if trigger_df.empty:
+    if day.candles.empty:
         return {
             "status": "no_midday_orb_breakout",
             "message": "No 15-min candles after MID-DAY ORB candle",
@@ -276,40 +219,21 @@ def get_midday_orb_breakout_15min(idx1: pd.DataFrame) -> Dict[str, Any]:
             "marked_low": marked_low,
         }
 
-    for ts, row in trigger_df.iterrows():
-        c = float(row["close"])
-        h = float(row["high"])
-        l = float(row["low"])
-
-        # BUY breakout: close must reach rounded_buy_mid
-        if c >= rounded_buy_mid:
-            trigger_price = round_index_price_for_side(c, "BUY")
-            print("[MID-ORB-DEBUG] BUY breakout at",
-                  ts, "close", c, "tp", trigger_price)
-            return {
-                "status": "ok",
-                "trigger_side": "BUY",
-                "trigger_time": ts,
-                "trigger_price": trigger_price,  # breakout CLOSE (rounded)
-                "marked_high": marked_high,
-                "marked_low": marked_low,
-                "mode": "MIDDAY",
-            }
-
-        # SELL breakout: close must reach rounded_sell_mid
-        if c <= rounded_sell_mid:
-            trigger_price = round_index_price_for_side(c, "SELL")
-            print("[MID-ORB-DEBUG] SELL breakout at",
-                  ts, "close", c, "tp", trigger_price)
-            return {
-                "status": "ok",
-                "trigger_side": "SELL",
-                "trigger_time": ts,
-                "trigger_price": trigger_price,  # breakout CLOSE (rounded)
-                "marked_high": marked_high,
-                "marked_low": marked_low,
-                "mode": "MIDDAY",
-            }
+    # Close rounded mid trigger (ORB high ceil / low floor) tak pahunche
+    if day.hit >= 0:
+        c = float(day.candles["close"].iloc[day.hit])
+        trigger_price = round_index_price_for_side(c, day.side)
+        print(f"[MID-ORB-DEBUG] {day.side} breakout at",
+              day.time, "close", c, "tp", trigger_price)
+        return {
+            "status": "ok",
+            "trigger_side": day.side,
+            "trigger_time": day.time,
+            "trigger_price": trigger_price,  # breakout CLOSE (rounded)
+            "marked_high": marked_high,
+            "marked_low": marked_low,
+            "mode": "MIDDAY",
+        }
 
     return {
         "status": "no_midday_orb_breakout",
@@ -321,52 +245,79 @@ def get_midday_orb_breakout_15min(idx1: pd.DataFrame) -> Dict[str, Any]:
 
 # ========== PREVIOUS DAY HIGH / LOW ==========
 
-def get_previous_day_high_low(api: SmartConnect, tradedate: str) -> Dict[str, float]:
+def get_previous_day_high_low(
+    api: SmartConnect,
+    tradedate: str,
+    ctx=None,
+) -> Dict[str, float]:
     """
-    Previous TRADING day ka NIFTY high/low fetch karta hai.
-    Weekend + random weekday holiday, dono skip karega.
-    Tries up to last 10 calendar days.
+    Previous TRADING day ka NIFTY high/low.
+    Prev day ke bars DayContext se aate hain (weekend + holiday skip wahi karta hai),
+    isliye same request me hook / half-gap ke saath dobara fetch nahi hota.
     """
     try:
-        trade_dt = datetime.strptime(tradedate, "%Y-%m-%d")
+        if ctx is None:
+            from day_context import DayContext
+            ctx = DayContext(api, tradedate)
 
-        prev_day = trade_dt - timedelta(days=1)
-        max_lookback = 10
+        prev_date, df = ctx.prev_day()
+        if df.empty:
+            print("Previous trading day data not available within lookback window")
+            return {"prev_high": 0.0, "prev_low": 0.0}
 
-        for _ in range(max_lookback):
-            fromdt = prev_day.replace(hour=9, minute=15)
-            todt = prev_day.replace(hour=15, minute=30)
+        prev_high = float(df["high"].max())
+        prev_low = float(df["low"].min())
+        print(
+            f"Previous trading day ({prev_date}) HIGH: {prev_high}, LOW: {prev_low}"
+        )
+        return {"prev_high": prev_high, "prev_low": prev_low}
 
-            payload = {
-                "exchange": "NSE",
-                "symboltoken": NIFTYINDEXTOKEN,
-                "interval": "ONE_MINUTE",
-                "fromdate": fromdt.strftime("%Y-%m-%d %H:%M"),
-                "todate": todt.strftime("%Y-%m-%d %H:%M"),
-            }
+    except Exception as e:
+        print("get_previous_day_high_low error", e)
+        return {"prev_high": 0.0, "prev_low": 0.0}
 
-            hist = api.getCandleData(payload)
 
-            if hist.get("status") and hist.get("data"):
-                df = pd.DataFrame(
-                    hist["data"],
-                    columns=["time", "open", "high", "low", "close", "volume"],
-                )
-                prev_high = float(df["high"].max())
-                prev_low = float(df["low"].min())
-                print(
-                    f"Previous trading day ({prev_day.date()}) HIGH: {prev_high}, LOW: {prev_low}"
-                )
-                return {"prev_high": prev_high, "prev_low": prev_low}
+# ========== DAILY HISTORY (ATR REGIME) ==========
+
+def get_nifty_daily_history_for_atr(api: SmartConnect, trade_date: str, lookback_days: int = 40) -> Optional[pd.DataFrame]:
+    """
+    NIFTY ka 1D OHLC history SmartAPI se laata hai,
+    ATR regime filter ke liye.
+    trade_date: "YYYY-MM-DD" (current test day)
+    """
+    try:
+        end_dt = datetime.strptime(trade_date, "%Y-%m-%d").date()
+        start_dt = end_dt - timedelta(days=lookback_days)
+
+        params = {
+            "exchange": "NSE",
+            "symboltoken": NIFTYINDEXTOKEN,  # 99926000
+            "interval": "ONE_DAY",
+            "fromdate": f"{start_dt} 09:15",
+            "todate": f"{end_dt} 15:30",
+        }
+        resp = get_candle_arrays(api, params)
+        arr = resp.get("arrays")
 
-            prev_day = prev_day - timedelta(days=1)
+        # YEH NAYA DEBUG PRINT
+        print("[ATR-DAILY-RAW]", resp.get("status"),
+              len(arr) if arr is not None else 0)
 
-        print("Previous trading day data not available within lookback window")
-        return {"prev_high": 0.0, "prev_low": 0.0}
+        if not resp.get("status") or arr is None or len(arr) == 0:
+            print("[ATR-DAILY] No daily data for ATR regime:", resp.get("message"))
+            return None
+
+        df = arr.to_frame().reset_index()
+        df["date"] = df["time"].dt.date
 
+        # AUR YEH NAYA DEBUG PRINT
+        print("[ATR-DAILY-DF-TAIL]")
+        print(df[["date", "high", "low", "close"]].tail(5))
+
+        return df[["date", "open", "high", "low", "close"]]
     except Exception as e:
-        print("get_previous_day_high_low error", e)
-        return {"prev_high": 0.0, "prev_low": 0.0}
+        print(f"[ATR-DAILY-ERROR] {e}")
+        return None
 
 
 # ========== PREV DAY BREAKOUT CHECK ==========
@@ -478,14 +429,35 @@ def calc_atm_strikes(openprice: float) -> Tuple[int, int]:
 
 # ========== OPTION TOKEN & DATA ==========
 
-def getoptiontoken(strike: int, expiry: str, opttype: str) -> Optional[str]:
-    try:
-        with open(SCRIPMASTERFILE, "r") as f:
-            data = json.load(f)
-        records = data if isinstance(data, list) else data.get("data", [])
+def _lookup_nifty_option(
+    strike: int, expirycode: str, opttype: str, as_of: Optional[str] = None
+):
+    """
+    Scrip index se NIFTY OPTIDX hit; live master me na ho (expired contract)
+    to dated archive se, as_of date ke hisaab se. Archive sirf backtest ke
+    liye (as_of aaj se pehle) - live / as_of None pe expired token nahi milna chahiye.
+    """
+    key = ("NFO", "NIFTY", "OPTIDX", expirycode, float(strike) * 100.0, opttype)
+    hit = get_scrip_index().option(*key)
+    if hit:
+        return hit
+    if not as_of or str(as_of)[:10] >= datetime.now().strftime("%Y-%m-%d"):
+        return None
+    archive = get_archive_index()
+    if archive is None:
+        return None
+    hit = archive.option(*key, as_of=as_of)
+    if hit:
+        print("DEBUG token from archive:", hit.symbol, "as_of", as_of)
+    return hit
+
 
+def getoptiontoken(
+    strike: int, expiry: str, opttype: str, as_of: Optional[str] = None
+) -> Optional[str]:
+    try:
         strike_in_file_units = float(strike) * 100.0
-        expirycode = _normalize_expiry_to_code(expiry)
+        expirycode = normalize_expiry_to_code(expiry)
 
         # 🔹 GUARD: expiry ya opttype galat ho to yahin return
         if not expirycode:
@@ -504,20 +476,10 @@ def getoptiontoken(strike: int, expiry: str, opttype: str) -> Optional[str]:
             "type", opttype,
         )
 
-        for row in records:
-            if (
-                row.get("exch_seg") == "NFO"
-                and row.get("name") == "NIFTY"           # NIFTY index options
-                and row.get("instrumenttype") == "OPTIDX"
-                and row.get("symbol", "").endswith(opttype.upper())
-            ):
-                row_strike = float(row.get("strike", 0.0))
-                row_expiry = (row.get("expiry") or "").upper()
-
-                if row_strike == strike_in_file_units and row_expiry == expirycode:
-                    print("DEBUG token hit:", row.get(
-                        "symbol"), row_strike, row_expiry)
-                    return str(row.get("token"))
+        hit = _lookup_nifty_option(strike, expirycode, opttype, as_of)
+        if hit:
+            print("DEBUG token hit:", hit.symbol, strike_in_file_units, expirycode)
+            return hit.token
 
         print("DEBUG token not found for",
               strike_in_file_units, expirycode, opttype)
@@ -528,18 +490,14 @@ def getoptiontoken(strike: int, expiry: str, opttype: str) -> Optional[str]:
 
 
 def getoptiontoken_and_symbol(
-    strike: int, expiry: str, opttype: str
+    strike: int, expiry: str, opttype: str, as_of: Optional[str] = None
 ) -> Tuple[Optional[str], Optional[str]]:
     """
     NIFTY option ke liye token + tradingsymbol (symbol) return karega.
     """
     try:
-        with open(SCRIPMASTERFILE, "r") as f:
-            data = json.load(f)
-        records = data if isinstance(data, list) else data.get("data", [])
-
         strike_in_file_units = float(strike) * 100.0
-        expirycode = _normalize_expiry_to_code(expiry)
+        expirycode = normalize_expiry_to_code(expiry)
         if not expirycode:
             print("getoptiontoken_and_symbol error: invalid expiry:", expiry)
             return None, None
@@ -555,22 +513,11 @@ def getoptiontoken_and_symbol(
             opttype,
         )
 
-        for row in records:
-            if (
-                row.get("exch_seg") == "NFO"
-                and row.get("name") == "NIFTY"
-                and row.get("instrumenttype") == "OPTIDX"
-                and row.get("symbol", "").endswith(opttype.upper())
-            ):
-                row_strike = float(row.get("strike", 0.0))
-                row_expiry = (row.get("expiry") or "").upper()
-
-                if row_strike == strike_in_file_units and row_expiry == expirycode:
-                    sym = str(row.get("symbol"))
-                    tok = str(row.get("token"))
-                    print("DEBUG token+symbol hit:",
-                          sym, row_strike, row_expiry)
-                    return tok, sym
+        hit = _lookup_nifty_option(strike, expirycode, opttype, as_of)
+        if hit:
+            print("DEBUG token+symbol hit:",
+                  hit.symbol, strike_in_file_units, expirycode)
+            return hit.token, hit.symbol
 
         print(
             "DEBUG token+symbol not found for",
@@ -597,22 +544,24 @@ def getoption1min(api: SmartConnect, token: str, tradedate: str) -> pd.DataFrame
         "todate": todt.strftime("%Y-%m-%d %H:%M"),
     }
 
-    hist = api.getCandleData(payload)
+    hist = get_candle_arrays(api, payload)
     if not hist.get("status"):
         msg = hist.get("message") or "Unknown error"
         print("Option getCandleData error:", msg, "token", token)
         return pd.DataFrame()
 
-    df = pd.DataFrame(
-        hist["data"],
-        columns=["time", "open", "high", "low", "close", "volume"],
-    )
-    df["time"] = pd.to_datetime(df["time"]).dt.tz_localize(None)
-    df = df.set_index("time")
-    return df
+    return hist["arrays"].to_frame()
 
 
 def getoptioncloseat(optdf: pd.DataFrame, ts: datetime) -> Optional[float]:
+    """ts pe (ya usse pehle ka last) option close; pehle koi bar nahi to None."""
+    idx = optdf.index
+    if idx.is_monotonic_increasing:
+        # As-of lookup: binary search, har call pe poora frame filter nahi
+        pos = idx.searchsorted(ts, side="right") - 1
+        if pos < 0:
+            return None
+        return float(optdf["close"].iat[pos])
     if ts in optdf.index:
         return float(optdf.loc[ts, "close"])
     prev = optdf[optdf.index < ts]
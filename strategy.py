@@ -1,10 +1,11 @@
 # strategy.py
 
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence
 
 import pandas as pd
 
+from multi_timeframe import bars_for
 from smartapi_helpers import getoptioncloseat
 from models import VixRequest
 
@@ -41,10 +42,36 @@ def applyborestriction(
 # ------------ COMMON HELPERS ------------
 
 def findentryidx(df: pd.DataFrame, level: float) -> Optional[pd.Series]:
-    for _, row in df.iterrows():
-        if row["low"] <= level <= row["high"]:
-            return row
-    return None
+    """Pehla candle jisme low <= level <= high (row, name = timestamp)."""
+    if df.empty:
+        return None
+    pos = bars_for(df).passage.first_touch(level)
+    return df.iloc[pos] if pos is not None else None
+
+
+def findentryrows(
+    base: pd.DataFrame,
+    windows: Sequence[pd.DataFrame],
+    levels: Sequence[float],
+) -> List[Optional[pd.Series]]:
+    """
+    Kai legs ek saath (findentryidx jaisa result per leg). Har window base
+    ka time-range slice hona chahiye; base ka cached first-passage index,
+    ek hi first_touch_many query.
+    """
+    out: List[Optional[pd.Series]] = [None] * len(windows)
+    legs = [k for k, w in enumerate(windows) if not w.empty]
+    if base.empty or not legs:
+        return out
+
+    pos = bars_for(base).passage.first_touch_many(
+        [levels[k] for k in legs],
+        after=[windows[k].index[0] for k in legs],
+        until=[windows[k].index[-1] for k in legs],
+    )
+    for k, p in zip(legs, pos.tolist()):
+        out[k] = base.iloc[p] if p >= 0 else None
+    return out
 
 
 def calc_pnl(entryopt: float, exitopt: float, direction: str, lots: int = 1) -> float:
@@ -94,117 +121,52 @@ def processnormal(
     eodexit = datetime.combine(
         entrytime.date(), datetime.strptime("15:00", "%H:%M").time()
     )
-    afterentry = idxdf[idxdf.index >= entrytime]
-
-    for _, row in afterentry.iterrows():
-        ts = row.name
-
-        if direction == "BUY":
-            # BUY side: abhi sab rules normal T4/SL hi use karte hain
-            if sl > 0 and row["low"] <= sl:
-                exitopt = getoptioncloseat(optdf, ts)
-                pnl = calc_pnl(entryopt, exitopt, "BUY", lots) if exitopt else 0.0
-                return {
-                    "status": "SL",
-                    "entry": entryopt,
-                    "exit": exitopt,
-                    "exittime": ts,
-                    "exitindex": row["close"],
-                    "pnl": pnl,
-                }
-            if t4 > 0 and row["high"] >= t4:
-                print(
-                    f"[DEBUG] T4 HIT BUY ts={ts} high={row['high']} "
-                    f"t4={t4} close={row['close']}"
-                )
-                exitopt = getoptioncloseat(optdf, ts)
-                pnl = calc_pnl(entryopt, exitopt, "BUY", lots) if exitopt else 0.0
-                label = "T4"
-                if rule == "ORB_LATE":
-                    label = "ORB_LATE_T"
-                elif rule == "HALF_GAP":
-                    label = "HALF_GAP_T"
-                elif rule == "ATR_NORMAL":
-                    label = "ATR_T4"
-                return {
-                    "status": label,
-                    "entry": entryopt,
-                    "exit": exitopt,
-                    "exittime": ts,
-                    "exitindex": row["close"],
-                    "pnl": pnl,
-                }
-
+    bars = bars_for(idxdf)
+    fp = bars.passage
+    start = fp.pos_at(entrytime)
+    if start >= fp.n:
+        return {"status": "OPEN", "entry": entryopt, "exit": None, "pnl": 0.0}
+
+    # SL vs target race (frame ka cached index); EOD bar pe bhi SL/T4 pehle.
+    # SELL HALF_GAP / ORB_LATE: same bar pe fixed target SL se pehle.
+    side = "BUY" if direction == "BUY" else "SELL"
+    sl_first = side == "BUY" or rule not in ("HALF_GAP", "ORB_LATE")
+    hit = fp.race(sl, t4, side, start=start, sl_first=sl_first)
+    eod = max(fp.pos_at(eodexit), start)
+
+    if hit.pos is not None and hit.pos <= eod:
+        i, event = hit.pos, hit.event
+    elif eod < fp.n:
+        i, event = eod, None
+    else:
+        return {"status": "OPEN", "entry": entryopt, "exit": None, "pnl": 0.0}
+
+    ts = fp.index[i]
+    close_i = bars.close[i]
+
+    if event == "SL":
+        label = "SL"
+    elif event == "TARGET":
+        if side == "SELL" and rule in ("HALF_GAP", "ORB_LATE"):
+            label = f"{rule}_T"
         else:
-            # SELL side: rule-specific handling
-            # HALF-GAP scalp: fixed target exit at t4 (N8/M8 level)
-            if rule == "HALF_GAP" and t4 > 0 and row["low"] <= t4:
-                exitopt = getoptioncloseat(optdf, ts)
-                pnl = calc_pnl(entryopt, exitopt, "SELL", lots) if exitopt else 0.0
-                return {
-                    "status": "HALF_GAP_T",
-                    "entry": entryopt,
-                    "exit": exitopt,
-                    "exittime": ts,
-                    "exitindex": row["close"],
-                    "pnl": pnl,
-                }
-
-            # MORNING ORB LATE: fixed T2 (J8/M8) as t4
-            if rule == "ORB_LATE" and t4 > 0 and row["low"] <= t4:
-                exitopt = getoptioncloseat(optdf, ts)
-                pnl = calc_pnl(entryopt, exitopt, "SELL", lots) if exitopt else 0.0
-                return {
-                    "status": "ORB_LATE_T",
-                    "entry": entryopt,
-                    "exit": exitopt,
-                    "exittime": ts,
-                    "exitindex": row["close"],
-                    "pnl": pnl,
-                }
-
-            # ATR_NORMAL or fallback: normal SL + T4
-            if sl > 0 and row["high"] >= sl:
-                exitopt = getoptioncloseat(optdf, ts)
-                pnl = calc_pnl(entryopt, exitopt, "SELL", lots) if exitopt else 0.0
-                return {
-                    "status": "SL",
-                    "entry": entryopt,
-                    "exit": exitopt,
-                    "exittime": ts,
-                    "exitindex": row["close"],
-                    "pnl": pnl,
-                }
-            if t4 > 0 and row["low"] <= t4:
-                print(
-                    f"[DEBUG] T4 HIT SELL ts={ts} low={row['low']} "
-                    f"t4={t4} close={row['close']}"
-                )
-                exitopt = getoptioncloseat(optdf, ts)
-                pnl = calc_pnl(entryopt, exitopt, "SELL", lots) if exitopt else 0.0
-                label = "T4"
-                if rule == "ATR_NORMAL":
-                    label = "ATR_T4"
-                return {
-                    "status": label,
-                    "entry": entryopt,
-                    "exit": exitopt,
-                    "exittime": ts,
-                    "exitindex": row["close"],
-                    "pnl": pnl,
-                }
-
-        # EOD exit
-        if ts >= eodexit:
-            exitopt = getoptioncloseat(optdf, ts)
-            pnl = calc_pnl(entryopt, exitopt, direction, lots) if exitopt else 0.0
-            return {
-                "status": "EOD_1500",
-                "entry": entryopt,
-                "exit": exitopt,
-                "exittime": ts,
-                "exitindex": row["close"],
-                "pnl": pnl,
-            }
-
-    return {"status": "OPEN", "entry": entryopt, "exit": None, "pnl": 0.0}
+            extreme = f"high={fp.high[i]}" if side == "BUY" else f"low={fp.low[i]}"
+            print(f"[DEBUG] T4 HIT {side} ts={ts} {extreme} t4={t4} close={close_i}")
+            label = "T4"
+            if rule == "ATR_NORMAL":
+                label = "ATR_T4"
+            elif side == "BUY" and rule in ("ORB_LATE", "HALF_GAP"):
+                label = f"{rule}_T"
+    else:
+        label = "EOD_1500"
+
+    exitopt = getoptioncloseat(optdf, ts)
+    pnl = calc_pnl(entryopt, exitopt, direction, lots) if exitopt else 0.0
+    return {
+        "status": label,
+        "entry": entryopt,
+        "exit": exitopt,
+        "exittime": ts,
+        "exitindex": close_i,
+        "pnl": pnl,
+    }
@@ -0,0 +1,6 @@
+# tests/conftest.py
+# Modules flat import hote hain (from orb_rule import ...) - repo root path pe
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
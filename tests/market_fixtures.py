@@ -0,0 +1,158 @@
+# tests/market_fixtures.py
+"""
+Chhote, fixed NIFTY 1-min fixture days (random nahi) - parity tests ke liye.
+
+    day_frame("2026-01-05", path={"09:15": 24000, "11:00": 24150})
+
+Close path ke points ke beech linear; open = pichla close, high / low =
+open/close se 0.5 bahar. bars={...} se kisi minute ka exact OHLC, drop se
+minutes hatao (khali bucket), nan se OHLC NaN (NaN bucket).
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+SESSION = ("09:15", "15:29")
+
+
+def _minute(hm: str) -> int:
+    h, m = hm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def _in(minutes: np.ndarray, spans: Iterable[Tuple[str, str]]) -> np.ndarray:
+    mask = np.zeros(len(minutes), dtype=bool)
+    for a, b in spans:
+        mask |= (minutes >= _minute(a)) & (minutes <= _minute(b))
+    return mask
+
+
+def day_frame(
+    day: str,
+    path: Dict[str, float],
+    bars: Optional[Dict[str, Tuple[float, float, float, float]]] = None,
+    drop: Iterable[Tuple[str, str]] = (),
+    nan: Iterable[Tuple[str, str]] = (),
+) -> pd.DataFrame:
+    minutes = np.arange(_minute(SESSION[0]), _minute(SESSION[1]) + 1)
+    xs = sorted(_minute(k) for k in path)
+    ys = [path[f"{x // 60:02d}:{x % 60:02d}"] for x in xs]
+    close = np.round(np.interp(minutes, xs, ys), 2)
+    open_ = np.concatenate([close[:1], close[:-1]])
+    high = np.maximum(open_, close) + 0.5
+    low = np.minimum(open_, close) - 0.5
+
+    frame = pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": 0.0},
+        index=pd.DatetimeIndex(
+            [datetime.fromisoformat(day) + pd.Timedelta(minutes=int(m)) for m in minutes],
+            name="time",
+        ),
+    )
+    for hm, ohlc in (bars or {}).items():
+        frame.loc[pd.Timestamp(f"{day} {hm}"), ["open", "high", "low", "close"]] = ohlc
+
+    nan_mask = _in(minutes, nan)
+    frame.loc[nan_mask, ["open", "high", "low", "close"]] = np.nan
+    return frame[~_in(minutes, drop)]
+
+
+def orb_days() -> Dict[str, pd.DataFrame]:
+    """ORB / breakout scanner edge cases, ek din per case."""
+    return {
+        # 10:15 candle hi marking ke upar close
+        "buy_clean": day_frame("2026-01-05", {
+            "09:15": 24000, "10:00": 24000, "10:14": 24010, "10:30": 24020,
+            "11:00": 24150, "15:29": 24100,
+        }),
+        # 10:15 bucket khali, 10:30 bucket poora NaN, 10:45 me aadha NaN
+        "sell_gaps_nan": day_frame("2026-01-06", {
+            "09:15": 24000, "10:14": 24000, "10:45": 23990, "11:30": 23900,
+            "15:29": 23950,
+        }, drop=[("10:15", "10:29")], nan=[("10:30", "10:44"), ("10:45", "10:50")]),
+        # marked high 24050.5: close == high (strict nahi), 24050.9 (strict haan,
+        # next_int 24051 nahi), 24051.0 (inclusive next_int haan)
+        "equal_closes": day_frame("2026-01-07", {
+            "09:15": 24050, "10:14": 24050, "10:29": 24050.5, "10:44": 24050.9,
+            "10:59": 24051.0, "11:30": 24080, "15:29": 24080,
+        }),
+        # poora din flat: kisi rule me breakout nahi
+        "flat": day_frame("2026-01-08", {"09:15": 24000, "15:29": 24000}),
+        # midday low 23999.5 -> floor 23999; 13:14 close exactly 23999.0
+        "midday_sell_equal": day_frame("2026-01-09", {
+            "09:15": 24000, "12:44": 24000, "13:14": 23999.0, "14:00": 23980,
+            "15:29": 23985,
+        }),
+        # 9:15 mark high exactly 24100.0: ceil 24100 vs next_int 24101
+        "integer_mark": day_frame("2026-01-12", {
+            "09:15": 24099, "09:29": 24099, "09:44": 24100.0, "10:30": 24100.2,
+            "15:29": 24100.2,
+        }, bars={"09:20": (24099.0, 24100.0, 24098.5, 24099.0)}),
+        # 12:30 wala akela bar: marking window (<= 12:30) me, 15M (< 12:30) me nahi
+        "edge_1230": day_frame("2026-01-13", {
+            "09:15": 24000, "12:29": 24000, "12:30": 24200, "15:29": 24200,
+        }),
+    }
+
+
+def exit_cases() -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame, dict]]:
+    """processnormal cases: name -> (index 1-min, option 1-min, kwargs)."""
+    idx = day_frame("2026-01-05", {
+        "09:15": 24000, "10:00": 24000, "11:00": 24100, "12:00": 23950,
+        "13:00": 24050, "15:29": 24000,
+    }, bars={"11:30": (24030.0, 24200.0, 23800.0, 24000.0)})   # SL aur T4 dono ek bar me
+    # NaN bars, phir 15 min ka gap aur SL ke paar khula bar
+    gappy = day_frame("2026-01-06", {"09:15": 24000, "10:25": 24000, "15:29": 24000},
+                      bars={"10:41": (23850.0, 23860.0, 23840.0, 23850.0)},
+                      drop=[("10:26", "10:40")], nan=[("10:20", "10:25")])
+    opt = day_frame("2026-01-05", {"09:15": 100, "12:00": 180, "15:29": 120},
+                    drop=[("11:25", "11:40")])      # as-of lookup
+    opt_late = day_frame("2026-01-05", {"09:15": 100, "15:29": 150}, drop=[("09:15", "10:30")])
+    opt2 = day_frame("2026-01-06", {"09:15": 90, "15:29": 140})
+
+    def at(day: str, hm: str) -> datetime:
+        return datetime.fromisoformat(f"{day} {hm}")
+
+    d1, d2 = "2026-01-05", "2026-01-06"
+    return {
+        "buy_t4_atr": (idx, opt, dict(entrytime=at(d1, "10:00"), level=24000, t4=24050, sl=23900,
+                                      direction="BUY", rule="ATR_NORMAL")),
+        "buy_sl": (idx, opt, dict(entrytime=at(d1, "11:05"), level=24090, t4=24300, sl=24000,
+                                  direction="BUY", lots=2)),
+        "buy_tie_sl_first": (idx, opt, dict(entrytime=at(d1, "11:20"), level=24050, t4=24150,
+                                            sl=23900, direction="BUY", rule="HALF_GAP")),
+        "sell_tie_half_gap": (idx, opt, dict(entrytime=at(d1, "11:20"), level=24050, t4=23900,
+                                             sl=24150, direction="SELL", rule="HALF_GAP",
+                                             is_half_gap=True, half_gap_type="UP")),
+        "sell_tie_orb_late": (idx, opt, dict(entrytime=at(d1, "11:20"), level=24050, t4=23900,
+                                             sl=24150, direction="SELL", rule="ORB_LATE")),
+        "sell_tie_atr": (idx, opt, dict(entrytime=at(d1, "11:20"), level=24050, t4=23900,
+                                        sl=24150, direction="SELL", rule="ATR_NORMAL")),
+        "buy_orb_late_target": (idx, opt, dict(entrytime=at(d1, "12:00"), level=23950, t4=24040,
+                                               sl=23800, direction="BUY", rule="ORB_LATE")),
+        "buy_half_gap_target": (idx, opt, dict(entrytime=at(d1, "12:00"), level=23950, t4=24040,
+                                               sl=23800, direction="BUY", rule="HALF_GAP")),
+        "sell_t4_plain": (idx, opt, dict(entrytime=at(d1, "11:35"), level=24000, t4=23960,
+                                         sl=24300, direction="SELL", rule="BOT3")),
+        "eod": (idx, opt, dict(entrytime=at(d1, "13:30"), level=24040, t4=24500, sl=23500,
+                               direction="BUY")),
+        "legs_off": (idx, opt, dict(entrytime=at(d1, "10:00"), level=24000, t4=0, sl=0,
+                                    direction="SELL")),
+        "entry_after_eod": (idx, opt, dict(entrytime=at(d1, "15:05"), level=24000, t4=24500,
+                                           sl=23500, direction="BUY")),
+        "open_no_eod_bar": (idx[idx.index < at(d1, "14:00")], opt,
+                            dict(entrytime=at(d1, "13:30"), level=24040, t4=24500, sl=23500,
+                                 direction="BUY")),
+        "entry_after_last_bar": (idx, opt, dict(entrytime=at(d1, "15:40"), level=24000, t4=24500,
+                                                sl=23500, direction="BUY")),
+        "no_opt_entry": (idx, opt_late, dict(entrytime=at(d1, "10:00"), level=24000, t4=24050,
+                                             sl=23900, direction="BUY")),
+        "nan_then_gap_sl": (gappy, opt2, dict(entrytime=at(d2, "10:15"), level=24000, t4=24100,
+                                              sl=23900, direction="BUY")),
+        "nan_then_gap_target": (gappy, opt2, dict(entrytime=at(d2, "10:15"), level=24000, t4=23900,
+                                                  sl=24100, direction="SELL", rule="ATR_NORMAL")),
+    }
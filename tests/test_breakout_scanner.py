@@ -0,0 +1,105 @@
+# tests/test_breakout_scanner.py
+"""
+breakout_scanner wale rules vs purane pandas resample + row-loop
+implementations ke outputs (fixed fixture days, values purane code se
+capture kiye hue - types bhi: int / float trigger prices).
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_fixtures import orb_days
+from breakout_scanner import ORB_10AM_15M, ORB_10AM_MARKING, scan_breakouts, scan_day
+from bot3_high_vol_rule import build_bot3_breakout_context
+from orb_rule import get_marking_and_trigger
+from smartapi_helpers import get_midday_orb_breakout_15min, get_orb_breakout_15min
+
+
+RULES = {
+    "get_orb_breakout_15min": get_orb_breakout_15min,
+    "get_midday_orb_breakout_15min": get_midday_orb_breakout_15min,
+    "get_marking_and_trigger": get_marking_and_trigger,
+    "build_bot3_breakout_context": build_bot3_breakout_context,
+}
+
+
+def _ts(s: str) -> pd.Timestamp:
+    return pd.Timestamp(s)
+
+
+EXPECTED = {
+    # get_orb_breakout_15min
+    ("get_orb_breakout_15min", "buy_clean"): {"status": "ok", "trigger_side": "BUY", "trigger_time": _ts("2026-01-05 10:15"), "trigger_price": 24019.88, "marked_high": 24010.5, "marked_low": 23999.5},
+    ("get_orb_breakout_15min", "sell_gaps_nan"): {"status": "ok", "trigger_side": "SELL", "trigger_time": _ts("2026-01-06 10:45"), "trigger_price": 23961.5, "marked_high": 24000.5, "marked_low": 23999.5},
+    ("get_orb_breakout_15min", "equal_closes"): {"status": "ok", "trigger_side": "BUY", "trigger_time": _ts("2026-01-07 10:30"), "trigger_price": 24051.4, "marked_high": 24050.5, "marked_low": 24049.5},
+    ("get_orb_breakout_15min", "flat"): {"status": "no_orb_breakout", "message": "No ORB close breakout between 10:15 and 12:15", "marked_high": 24000.5, "marked_low": 23999.5},
+    ("get_orb_breakout_15min", "midday_sell_equal"): {"status": "no_orb_breakout", "message": "No ORB close breakout between 10:15 and 12:15", "marked_high": 24000.5, "marked_low": 23999.5},
+    ("get_orb_breakout_15min", "integer_mark"): {"status": "no_orb_breakout", "message": "No ORB close breakout between 10:15 and 12:15", "marked_high": 24100.63, "marked_low": 24099.57},
+    ("get_orb_breakout_15min", "edge_1230"): {"status": "no_orb_breakout", "message": "No ORB close breakout between 10:15 and 12:15", "marked_high": 24000.5, "marked_low": 23999.5},
+    # get_midday_orb_breakout_15min
+    ("get_midday_orb_breakout_15min", "buy_clean"): {"status": "ok", "trigger_side": "SELL", "trigger_time": _ts("2026-01-05 12:45"), "trigger_price": 24127, "marked_high": 24133.96, "marked_low": 24130.17, "mode": "MIDDAY"},
+    ("get_midday_orb_breakout_15min", "sell_gaps_nan"): {"status": "ok", "trigger_side": "BUY", "trigger_time": _ts("2026-01-06 12:45"), "trigger_price": 23919, "marked_high": 23915.98, "marked_low": 23911.84, "mode": "MIDDAY"},
+    ("get_midday_orb_breakout_15min", "equal_closes"): {"status": "no_midday_orb_breakout", "message": "No MID-DAY ORB close breakout after 12:45", "marked_high": 24080.5, "marked_low": 24079.5},
+    ("get_midday_orb_breakout_15min", "flat"): {"status": "no_midday_orb_breakout", "message": "No MID-DAY ORB close breakout after 12:45", "marked_high": 24000.5, "marked_low": 23999.5},
+    ("get_midday_orb_breakout_15min", "midday_sell_equal"): {"status": "ok", "trigger_side": "SELL", "trigger_time": _ts("2026-01-09 13:00"), "trigger_price": 23999, "marked_high": 24000.5, "marked_low": 23999.5, "mode": "MIDDAY"},
+    ("get_midday_orb_breakout_15min", "integer_mark"): {"status": "no_midday_orb_breakout", "message": "No MID-DAY ORB close breakout after 12:45", "marked_high": 24100.7, "marked_low": 24099.7},
+    ("get_midday_orb_breakout_15min", "edge_1230"): {"status": "no_midday_orb_breakout", "message": "No MID-DAY ORB close breakout after 12:45", "marked_high": 24200.5, "marked_low": 23999.5},
+    # get_marking_and_trigger
+    ("get_marking_and_trigger", "buy_clean"): {"status": "ok", "trigger_side": "BUY", "trigger_time": _ts("2026-01-05 10:15"), "trigger_price": 24020, "marked_high": 24010.5, "marked_low": 23999.5},
+    ("get_marking_and_trigger", "sell_gaps_nan"): {"status": "ok", "trigger_side": "SELL", "trigger_time": _ts("2026-01-06 10:45"), "trigger_price": 23962, "marked_high": 24000.5, "marked_low": 23999.5},
+    ("get_marking_and_trigger", "equal_closes"): {"status": "ok", "trigger_side": "BUY", "trigger_time": _ts("2026-01-07 10:45"), "trigger_price": 24052, "marked_high": 24050.5, "marked_low": 24049.5},
+    ("get_marking_and_trigger", "flat"): {"status": "no_orb_breakout", "message": "No ORB breakout till 12:30", "marked_high": 24000.5, "marked_low": 23999.5},
+    ("get_marking_and_trigger", "midday_sell_equal"): {"status": "no_orb_breakout", "message": "No ORB breakout till 12:30", "marked_high": 24000.5, "marked_low": 23999.5},
+    ("get_marking_and_trigger", "integer_mark"): {"status": "no_orb_breakout", "message": "No ORB breakout till 12:30", "marked_high": 24100.63, "marked_low": 24099.57},
+    ("get_marking_and_trigger", "edge_1230"): {"status": "ok", "trigger_side": "BUY", "trigger_time": _ts("2026-01-13 12:30"), "trigger_price": 24201, "marked_high": 24000.5, "marked_low": 23999.5},
+    # build_bot3_breakout_context
+    ("build_bot3_breakout_context", "buy_clean"): {"status": "OK", "bo_side": "BUY", "bo_time": _ts("2026-01-05 10:00"), "bo_close": 24010.0, "marked_high": 24000.5, "marked_low": 23999.5},
+    ("build_bot3_breakout_context", "sell_gaps_nan"): {"status": "OK", "bo_side": "SELL", "bo_time": _ts("2026-01-06 10:45"), "bo_close": 23962.0, "marked_high": 24000.5, "marked_low": 23999.5},
+    ("build_bot3_breakout_context", "equal_closes"): {"status": "OK", "bo_side": "BUY", "bo_time": _ts("2026-01-07 10:45"), "bo_close": 24051.0, "marked_high": 24050.5, "marked_low": 24049.5},
+    ("build_bot3_breakout_context", "flat"): {"status": "NO_BO", "bo_side": None, "bo_time": None, "bo_close": None, "marked_high": 24000.5, "marked_low": 23999.5},
+    ("build_bot3_breakout_context", "midday_sell_equal"): {"status": "NO_BO", "bo_side": None, "bo_time": None, "bo_close": None, "marked_high": 24000.5, "marked_low": 23999.5},
+    ("build_bot3_breakout_context", "integer_mark"): {"status": "OK", "bo_side": "BUY", "bo_time": _ts("2026-01-12 09:30"), "bo_close": 24100.0, "marked_high": 24100.0, "marked_low": 24098.5},
+    ("build_bot3_breakout_context", "edge_1230"): {"status": "NO_BO", "bo_side": None, "bo_time": None, "bo_close": None, "marked_high": 24000.5, "marked_low": 23999.5},
+}
+
+DAYS = orb_days()
+
+
+@pytest.mark.parametrize("rule, day", sorted(EXPECTED))
+def test_rule_matches_old_loop(rule, day):
+    with contextlib.redirect_stdout(io.StringIO()):
+        got = RULES[rule](DAYS[day].copy())
+    got.pop("bucket_start", None)
+
+    expected = EXPECTED[(rule, day)]
+    assert got == expected
+    for key, value in expected.items():
+        assert type(got[key]) is type(value), key
+
+
+def test_batch_scan_matches_single_day():
+    frame = pd.concat([DAYS[name] for name in sorted(DAYS)]).sort_index()
+    for spec in (ORB_10AM_15M, ORB_10AM_MARKING):
+        batch = scan_breakouts(frame, spec).frame()
+        assert len(batch) == len(DAYS)
+        for name, df in DAYS.items():
+            one = scan_day(df, spec)
+            row = batch.loc[pd.Timestamp(one.trade_date)]
+            assert row["side"] == (one.side or "")
+            assert row["marked_high"] == one.marked_high
+            if one.hit >= 0:
+                assert row["trigger_time"] == one.time
+                assert row["trigger_price"] == one.price
+            else:
+                assert pd.isna(row["trigger_time"]) and np.isnan(row["trigger_price"])
+
+
+def test_empty_and_nan_buckets_are_dropped():
+    day = scan_day(DAYS["sell_gaps_nan"], ORB_10AM_15M)
+    # 10:15 (khali) aur 10:30 (poora NaN) candles nahi; 10:45 aadhe NaN se bhi bana
+    assert [t.strftime("%H:%M") for t in day.candles.index[:2]] == ["10:45", "11:00"]
+    assert day.candles.iloc[0]["open"] == DAYS["sell_gaps_nan"].loc["2026-01-06 10:51", "open"]
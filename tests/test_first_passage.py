@@ -0,0 +1,165 @@
+# tests/test_first_passage.py
+"""
+FirstPassage vs brute-force bar scan, aur race-based processnormal vs
+purane row-loop ke outputs (fixed fixtures; values purane code se capture).
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_fixtures import day_frame, exit_cases, orb_days
+from first_passage import FirstPassage
+from strategy import processnormal
+
+
+def _ts(s: str) -> pd.Timestamp:
+    return pd.Timestamp(s)
+
+
+# ---------- brute force ----------
+
+def _window(df: pd.DataFrame, after, until):
+    pos = np.arange(len(df))
+    if after is not None:
+        pos = pos[df.index >= pd.Timestamp(after)]
+    if until is not None:
+        pos = pos[df.index[pos] <= pd.Timestamp(until)]
+    return pos
+
+
+def _touch(df, level, after=None, until=None):
+    for i in _window(df, after, until):
+        if df["low"].iat[i] <= level <= df["high"].iat[i]:
+            return int(i)
+    return None
+
+
+def _cross(df, level, direction, after=None, until=None):
+    for i in _window(df, after, until):
+        if direction == "UP" and df["high"].iat[i] >= level:
+            return int(i)
+        if direction == "DOWN" and df["low"].iat[i] <= level:
+            return int(i)
+    return None
+
+
+def _fixture_frames():
+    frames = dict(orb_days())
+    # NaN bars, 15 min ka gap aur gap ke baad level ke paar khula bar
+    frames["gap_jump"] = day_frame(
+        "2026-01-06", {"09:15": 24000, "10:25": 24000, "15:29": 24000},
+        bars={"10:41": (23850.0, 23860.0, 23840.0, 23850.0)},
+        drop=[("10:26", "10:40")], nan=[("10:20", "10:25")],
+    )
+    return frames
+
+
+FRAMES = _fixture_frames()
+AFTERS = [None, "10:00", "10:20", "10:41", "12:07", "15:29"]
+UNTILS = [None, "10:30", "12:15", "15:00"]
+
+
+def _at(df, hm):
+    return None if hm is None else pd.Timestamp(f"{df.index[0]:%Y-%m-%d} {hm}")
+
+
+def _levels(df):
+    lo, hi = np.nanmin(df["low"]), np.nanmax(df["high"])
+    # exact bar values bhi (inclusive compare) aur range ke bahar bhi
+    exact = [df["high"].iat[len(df) // 3], df["low"].iat[len(df) // 2]]
+    return np.round(np.r_[np.linspace(lo - 5, hi + 5, 23), exact], 2)
+
+
+@pytest.mark.parametrize("name", sorted(FRAMES))
+def test_first_touch_and_cross_match_brute_force(name):
+    df = FRAMES[name]
+    fp = FirstPassage(df)
+    for level in _levels(df):
+        for a in AFTERS:
+            for u in UNTILS:
+                after, until = _at(df, a), _at(df, u)
+                assert fp.first_touch(level, after, until) == _touch(df, level, after, until)
+                for d in ("UP", "DOWN"):
+                    assert fp.first_cross(level, d, after, until) == _cross(df, level, d, after, until)
+
+
+@pytest.mark.parametrize("name", sorted(FRAMES))
+def test_first_touch_many_per_level_windows(name):
+    df = FRAMES[name]
+    fp = FirstPassage(df)
+    levels = _levels(df)
+    rng = np.random.default_rng(7)
+    starts = df.index[rng.integers(0, len(df), len(levels))]
+    ends = starts + pd.to_timedelta(rng.integers(0, 240, len(levels)), unit="min")
+
+    got = fp.first_touch_many(levels, after=starts, until=ends)
+    want = [_touch(df, lv, s, e) for lv, s, e in zip(levels, starts, ends)]
+    assert [None if g < 0 else int(g) for g in got] == want
+
+    # scalar window sab levels pe
+    got = fp.first_touch_many(levels, after=starts[0])
+    assert [None if g < 0 else int(g) for g in got] == [_touch(df, lv, starts[0]) for lv in levels]
+
+
+def test_gap_bar_and_nan_bars():
+    df = FRAMES["gap_jump"]
+    fp = FirstPassage(df)
+    after = _ts("2026-01-06 10:15")
+    # NaN bars kabhi hit nahi; gap ke upar kooda level touch nahi, cross hai
+    assert fp.first_touch(23900, after=after) is None
+    assert fp.time_of(fp.first_cross(23900, "DOWN", after=after)) == _ts("2026-01-06 10:41")
+    assert fp.first_touch(np.nan) is None
+    assert FirstPassage(df.iloc[:0]).first_touch(24000) is None
+
+
+def test_race_sl_first_tie():
+    df, _, _ = exit_cases()["buy_tie_sl_first"]
+    fp = FirstPassage(df)
+    after = _ts("2026-01-05 11:20")
+    assert fp.race(23900, 24150, "BUY", after=after).event == "SL"
+    assert fp.race(23900, 24150, "BUY", after=after, sl_first=False).event == "TARGET"
+    assert fp.race(0, 24150, "BUY", after=after).event == "TARGET"
+    assert fp.race(0, 0, "BUY", after=after).event is None
+
+
+# ---------- processnormal ----------
+
+EXPECTED = {
+    "buy_t4_atr": {"status": "ATR_T4", "entry": 121.82, "exit": 136.36, "exittime": _ts("2026-01-05 10:30"), "exitindex": 24050.0, "pnl": 945.1},
+    "buy_sl": {"status": "SL", "entry": 153.33, "exit": 162.55, "exittime": _ts("2026-01-05 11:30"), "exitindex": 24000.0, "pnl": 1198.6},
+    "buy_tie_sl_first": {"status": "SL", "entry": 160.61, "exit": 162.55, "exittime": _ts("2026-01-05 11:30"), "exitindex": 24000.0, "pnl": 126.1},
+    "sell_tie_half_gap": {"status": "HALF_GAP_T", "entry": 160.61, "exit": 162.55, "exittime": _ts("2026-01-05 11:30"), "exitindex": 24000.0, "pnl": 126.1},
+    "sell_tie_orb_late": {"status": "ORB_LATE_T", "entry": 160.61, "exit": 162.55, "exittime": _ts("2026-01-05 11:30"), "exitindex": 24000.0, "pnl": 126.1},
+    "sell_tie_atr": {"status": "SL", "entry": 160.61, "exit": 162.55, "exittime": _ts("2026-01-05 11:30"), "exitindex": 24000.0, "pnl": 126.1},
+    "buy_orb_late_target": {"status": "ORB_LATE_T", "entry": 180.0, "exit": 164.5, "exittime": _ts("2026-01-05 12:54"), "exitindex": 24040.0, "pnl": -1007.5},
+    "buy_half_gap_target": {"status": "HALF_GAP_T", "entry": 180.0, "exit": 164.5, "exittime": _ts("2026-01-05 12:54"), "exitindex": 24040.0, "pnl": -1007.5},
+    "sell_t4_plain": {"status": "T4", "entry": 162.55, "exit": 178.06, "exittime": _ts("2026-01-05 11:56"), "exitindex": 23960.0, "pnl": 1008.15},
+    "eod": {"status": "EOD_1500", "entry": 154.16, "exit": 128.33, "exittime": _ts("2026-01-05 15:00"), "exitindex": 24009.73, "pnl": -1678.95},
+    "legs_off": {"status": "EOD_1500", "entry": 121.82, "exit": 128.33, "exittime": _ts("2026-01-05 15:00"), "exitindex": 24009.73, "pnl": 423.15},
+    "entry_after_eod": {"status": "EOD_1500", "entry": 126.89, "exit": 126.89, "exittime": _ts("2026-01-05 15:05"), "exitindex": 24008.05, "pnl": 0.0},
+    "open_no_eod_bar": {"status": "OPEN", "entry": 154.16, "exit": None, "pnl": 0.0},
+    "entry_after_last_bar": {"status": "OPEN", "entry": 120.0, "exit": None, "pnl": 0.0},
+    "no_opt_entry": {"status": "NO_OPT_ENTRY"},
+    "nan_then_gap_sl": {"status": "SL", "entry": 98.02, "exit": 101.5, "exittime": _ts("2026-01-06 10:41"), "exitindex": 23850.0, "pnl": 226.2},
+    "nan_then_gap_target": {"status": "ATR_T4", "entry": 98.02, "exit": 101.5, "exittime": _ts("2026-01-06 10:41"), "exitindex": 23850.0, "pnl": 226.2},
+}
+
+
+@pytest.mark.parametrize("case", sorted(EXPECTED))
+def test_processnormal_matches_old_loop(case):
+    idx, opt, kw = exit_cases()[case]
+    with contextlib.redirect_stdout(io.StringIO()):
+        got = processnormal(idx, opt, **kw)
+
+    want = EXPECTED[case]
+    assert sorted(got) == sorted(want)
+    for key, val in want.items():
+        if isinstance(val, float):
+            assert isinstance(got[key], float), key
+            assert got[key] == pytest.approx(val, abs=1e-6), key
+        else:
+            assert got[key] == val, key
@@ -0,0 +1,94 @@
+# tests/test_tick_bar_aggregator.py
+
+import json
+from datetime import datetime, timedelta
+
+from tick_bar_aggregator import BarAggregator, FileTickFeed
+
+
+TOKEN = "99926000"
+
+
+def _ts(hms: str) -> datetime:
+    return datetime.fromisoformat(f"2026-01-05 {hms}")
+
+
+def _feed(tmp_path, name, ticks):
+    path = tmp_path / name
+    with open(path, "w", encoding="utf-8") as f:
+        for ts, ltp in ticks:
+            f.write(json.dumps({"token": TOKEN, "ts": f"2026-01-05 {ts}", "ltp": ltp, "volume": 1}) + "\n")
+    return FileTickFeed(str(path))
+
+
+def _recording_agg():
+    events = []
+    agg = BarAggregator(on_bar_close=lambda b: events.append((b.interval, b.start)))
+    return agg, events
+
+
+def test_one_and_fifteen_minute_ohlc(tmp_path):
+    agg, _ = _recording_agg()
+    _feed(tmp_path, "ticks.jsonl", [
+        ("09:15:01", 100.0), ("09:15:20", 103.0), ("09:15:40", 99.0), ("09:15:59", 101.0),
+        ("09:16:00", 101.5), ("09:16:30", 98.0),
+        ("09:29:59", 104.0),
+        ("09:30:00", 105.0), ("09:44:10", 95.0),
+    ]).run(agg.on_tick)
+    agg.on_clock(_ts("09:45:00"))
+
+    m1 = agg.frame(TOKEN, 1)
+    assert [t.strftime("%H:%M") for t in m1.index] == ["09:15", "09:16", "09:29", "09:30", "09:44"]
+    assert m1.loc[_ts("09:15:00")].tolist() == [100.0, 103.0, 99.0, 101.0, 4.0]
+    assert m1.loc[_ts("09:16:00")].tolist() == [101.5, 101.5, 98.0, 98.0, 2.0]
+
+    m15 = agg.frame(TOKEN, 15)
+    assert list(m15.index) == [_ts("09:15:00"), _ts("09:30:00")]
+    assert m15.iloc[0][["open", "high", "low", "close"]].tolist() == [100.0, 104.0, 98.0, 104.0]
+    assert m15.iloc[1][["open", "high", "low", "close"]].tolist() == [105.0, 105.0, 95.0, 95.0]
+
+
+def test_clock_closes_exactly_on_quarter_boundaries(tmp_path):
+    agg, events = _recording_agg()
+    _feed(tmp_path, "ticks.jsonl", [("09:59:30", 100.0)]).run(agg.on_tick)
+
+    agg.on_clock(_ts("09:59:59.999"))
+    assert events == []
+
+    agg.on_clock(_ts("10:00:00"))
+    # chhota interval pehle: 1m phir 15m
+    assert events == [(1, _ts("09:59:00")), (15, _ts("09:45:00"))]
+
+    for boundary in ("10:15:00", "10:30:00", "10:45:00", "11:00:00"):
+        end = _ts(boundary)
+        tick_at = (end - timedelta(minutes=5)).strftime("%H:%M:%S")
+        _feed(tmp_path, "next.jsonl", [(tick_at, 101.0)]).run(agg.on_tick)
+        events.clear()
+
+        agg.on_clock(end - timedelta(milliseconds=1))
+        assert [e for e in events if e[0] == 15] == []
+        agg.on_clock(end)
+        assert [e for e in events if e[0] == 15] == [(15, end - timedelta(minutes=15))]
+
+
+def test_late_tick_folds_into_closed_bar_without_reemit(tmp_path):
+    agg, events = _recording_agg()
+    _feed(tmp_path, "a.jsonl", [("10:00:05", 100.0), ("10:14:58", 102.0)]).run(agg.on_tick)
+    agg.on_clock(_ts("10:15:00.200"))
+    assert events == [(1, _ts("10:00:00")), (1, _ts("10:14:00")), (15, _ts("10:00:00"))]
+
+    events.clear()
+    _feed(tmp_path, "b.jsonl", [("10:14:59.900", 103.0), ("10:15:05", 101.0)]).run(agg.on_tick)
+    agg.on_clock(_ts("10:30:00"))
+
+    # late tick ne koi naya bar / event nahi banaya
+    assert events == [(1, _ts("10:15:00")), (15, _ts("10:15:00"))]
+    m1 = agg.frame(TOKEN, 1)
+    m15 = agg.frame(TOKEN, 15)
+    assert m1.index.is_unique and m15.index.is_unique
+    assert list(m15.index) == [_ts("10:00:00"), _ts("10:15:00")]
+
+    # ...par closed bars me fold ho gaya
+    assert m1.loc[_ts("10:14:00")][["high", "close", "volume"]].tolist() == [103.0, 103.0, 2.0]
+    assert m15.loc[_ts("10:00:00")][["open", "high", "close"]].tolist() == [100.0, 103.0, 103.0]
+    assert m15.loc[_ts("10:15:00")][["open", "close"]].tolist() == [101.0, 101.0]
@@ -0,0 +1,464 @@
+# tick_bar_aggregator.py
+"""
+Live ticks -> 1-min / 15-min OHLC bars, boundary pe bar-close events.
+
+    feed = SmartWebSocketFeed(api, client_code, [NIFTYINDEXTOKEN])   # live
+    feed = FileTickFeed("ticks.jsonl")                               # replay / test
+    agg = BarAggregator(on_bar_close=...)
+    watcher = OrbWatcher(agg, NIFTYINDEXTOKEN, on_trigger=...)
+    feed.run(agg.on_tick)
+
+    stream = start_orb_stream(api, client_code, NIFTYINDEXTOKEN)     # live loop wake-up
+    stream.wait(60)                                                  # 15m close pe jaagta hai
+
+Tick line format (file / socket): {"token": "99926000", "ts": "2026-01-05 09:15:03", "ltp": 24210.5, "volume": 0}
+
+15-min buckets :00/:15/:30/:45 pe aligned hain (09:15 session open ke saath).
+Bar tabhi close hota hai jab next bucket ka tick aaye ya on_clock() boundary
+cross kare - isliye ClockDriver har second on_clock chalata hai, taaki
+15-min candle exactly boundary pe close ho chahe tick late aaye.
+"""
+
+import json
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from orb_rule import get_marking_and_trigger
+from bot3_high_vol_rule import build_bot3_breakout_context
+
+
+IST = timezone(timedelta(hours=5, minutes=30))
+DEFAULT_INTERVALS = (1, 15)  # minutes
+
+
+@dataclass
+class Tick:
+    token: str
+    ts: datetime     # IST naive
+    ltp: float
+    volume: float = 0.0
+
+
+@dataclass
+class Bar:
+    token: str
+    interval: int    # minutes
+    start: datetime  # bucket start (index timestamp, getindex1min jaisa)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(minutes=self.interval)
+
+
+def ist_now() -> datetime:
+    """Exchange clock (IST, naive) - server ka local timezone kuch bhi ho."""
+    return datetime.now(IST).replace(tzinfo=None)
+
+
+def bucket_start(ts: datetime, interval: int) -> datetime:
+    """Minute-of-day ko interval pe floor (15 -> :00/:15/:30/:45)."""
+    mins = ts.hour * 60 + ts.minute
+    floored = (mins // interval) * interval
+    return ts.replace(hour=floored // 60, minute=floored % 60, second=0, microsecond=0)
+
+
+def _apply_tick(bar: Bar, tick: Tick) -> None:
+    if tick.ltp > bar.high:
+        bar.high = tick.ltp
+    if tick.ltp < bar.low:
+        bar.low = tick.ltp
+    bar.close = tick.ltp
+    bar.volume += tick.volume
+
+
+BarCallback = Callable[[Bar], None]
+
+
+class BarAggregator:
+    """
+    Per (token, interval) ek forming bar. Tick next bucket me jaaye ya clock
+    boundary cross kare to bar close -> on_bar_close(bar) callbacks.
+    Ek hi boundary pe chhota interval pehle close hota hai (1m phir 15m),
+    taaki 15m listener ko us minute ka 1m bar already mil jaaye.
+    Har bucket ek hi baar close hota hai: close ke baad aaya tick us closed
+    bar me fold hota hai (bina event ke).
+    """
+
+    def __init__(
+        self,
+        intervals: Iterable[int] = DEFAULT_INTERVALS,
+        on_bar_close: Optional[BarCallback] = None,
+    ) -> None:
+        self.intervals: Tuple[int, ...] = tuple(sorted(set(intervals)))
+        self._forming: Dict[Tuple[str, int], Bar] = {}
+        self._closed: Dict[Tuple[str, int], List[Bar]] = {}
+        self._listeners: List[BarCallback] = []
+        self._lock = threading.RLock()
+        if on_bar_close:
+            self._listeners.append(on_bar_close)
+
+    def subscribe(self, fn: BarCallback) -> None:
+        self._listeners.append(fn)
+
+    def _emit(self, bar: Bar) -> None:
+        self._closed.setdefault((bar.token, bar.interval), []).append(bar)
+        for fn in self._listeners:
+            try:
+                fn(bar)
+            except Exception as e:
+                print("[BAR-AGG] listener error", e)
+
+    def _close_due(self, now: datetime, token: Optional[str] = None) -> None:
+        # intervals ascending -> 1m pehle, phir 15m
+        for interval in self.intervals:
+            for key, bar in list(self._forming.items()):
+                if key[1] != interval or (token is not None and key[0] != token):
+                    continue
+                if now >= bar.end:
+                    del self._forming[key]
+                    self._emit(bar)
+
+    def on_tick(self, tick: Tick) -> None:
+        with self._lock:
+            self._close_due(tick.ts, tick.token)
+            for interval in self.intervals:
+                key = (tick.token, interval)
+                start = bucket_start(tick.ts, interval)
+                bar = self._forming.get(key)
+                closed = self._closed.get(key)
+
+                # Late tick (bucket clock se pehle hi close ho chuka): closed bar
+                # me fold, dobara emit nahi; usse bhi purana bucket -> drop
+                if (bar is not None and start < bar.start) or (
+                    bar is None and closed and start <= closed[-1].start
+                ):
+                    if closed and closed[-1].start == start:
+                        _apply_tick(closed[-1], tick)
+                    continue
+
+                if bar is None:
+                    self._forming[key] = Bar(
+                        token=tick.token,
+                        interval=interval,
+                        start=start,
+                        open=tick.ltp,
+                        high=tick.ltp,
+                        low=tick.ltp,
+                        close=tick.ltp,
+                        volume=tick.volume,
+                    )
+                    continue
+                _apply_tick(bar, tick)
+
+    def on_clock(self, now: Optional[datetime] = None) -> None:
+        """Boundary cross ho gaya ho to forming bars close karo (bina tick ke bhi)."""
+        with self._lock:
+            self._close_due(now or ist_now())
+
+    def bars(self, token: str, interval: int) -> List[Bar]:
+        with self._lock:
+            return list(self._closed.get((token, interval), []))
+
+    def frame(self, token: str, interval: int = 1) -> pd.DataFrame:
+        """Closed bars getindex1min jaisa DataFrame (DatetimeIndex 'time')."""
+        bars = self.bars(token, interval)
+        if not bars:
+            return pd.DataFrame()
+        return pd.DataFrame(
+            {
+                "open": [b.open for b in bars],
+                "high": [b.high for b in bars],
+                "low": [b.low for b in bars],
+                "close": [b.close for b in bars],
+                "volume": [b.volume for b in bars],
+            },
+            index=pd.DatetimeIndex([b.start for b in bars], name="time"),
+        )
+
+
+class ClockDriver:
+    """Background thread: har `period` sec pe aggregator.on_clock()."""
+
+    def __init__(self, aggregator: BarAggregator, period: float = 1.0) -> None:
+        self.aggregator = aggregator
+        self.period = period
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="bar-clock")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.period):
+            self.aggregator.on_clock(ist_now())
+
+    def start(self) -> "ClockDriver":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# ========== ORB WATCHER ==========
+
+
+class OrbWatcher:
+    """
+    15-min bar close pe ORB rules chalao (tick-built 1-min closed bars pe):
+    - 10:00 ORB: get_marking_and_trigger
+    - 9:15 ORB (Bot-3): build_bot3_breakout_context
+    Har rule ka pehla valid trigger ek baar on_trigger(name, info) ko jaata hai.
+    Tick replay / diagnostics ke liye; live loop ise nahi chalata (wahan
+    LiveOrbStream sirf wake-up hai).
+    """
+
+    def __init__(
+        self,
+        aggregator: BarAggregator,
+        token: str,
+        on_trigger: Callable[[str, Dict[str, Any]], None],
+    ) -> None:
+        self.aggregator = aggregator
+        self.token = str(token)
+        self.on_trigger = on_trigger
+        self.fired: Dict[str, Dict[str, Any]] = {}
+        aggregator.subscribe(self._on_bar_close)
+
+    def _on_bar_close(self, bar: Bar) -> None:
+        if bar.token != self.token or bar.interval != 15:
+            return
+
+        idx1 = self.aggregator.frame(self.token, 1)
+        if idx1.empty:
+            return
+
+        if "ORB_1000" not in self.fired:
+            info = get_marking_and_trigger(idx1)
+            if info.get("status") == "ok":
+                self._fire("ORB_1000", info)
+
+        if "ORB_915" not in self.fired:
+            info = build_bot3_breakout_context(idx1)
+            if info.get("status") == "OK":
+                self._fire("ORB_915", info)
+
+    def _fire(self, name: str, info: Dict[str, Any]) -> None:
+        self.fired[name] = info
+        print(f"[ORB-WATCH] {name} trigger on 15m close:", info)
+        try:
+            self.on_trigger(name, info)
+        except Exception as e:
+            print("[ORB-WATCH] on_trigger error", e)
+
+
+# ========== FEEDS ==========
+
+
+def _tick_from_json(raw: Dict[str, Any]) -> Tick:
+    return Tick(
+        token=str(raw["token"]),
+        ts=datetime.fromisoformat(str(raw["ts"]).replace("T", " ")),
+        ltp=float(raw["ltp"]),
+        volume=float(raw.get("volume") or 0.0),
+    )
+
+
+class FileTickFeed:
+    """JSONL file se ticks (test / replay). speed=0 -> jitna tez ho sake."""
+
+    def __init__(self, path: str, speed: float = 0.0) -> None:
+        self.path = path
+        self.speed = speed
+
+    def run(self, on_tick: Callable[[Tick], None]) -> None:
+        prev: Optional[datetime] = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                tick = _tick_from_json(json.loads(line))
+                if self.speed > 0 and prev is not None:
+                    gap = (tick.ts - prev).total_seconds() / self.speed
+                    if gap > 0:
+                        time.sleep(gap)
+                prev = tick.ts
+                on_tick(tick)
+
+
+class SocketTickFeed:
+    """TCP stand-in: newline-delimited JSON ticks (FileTickFeed jaisa format)."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+
+    def run(self, on_tick: Callable[[Tick], None]) -> None:
+        with socket.create_connection((self.host, self.port)) as sock:
+            buf = b""
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                buf += chunk
+                *lines, buf = buf.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        on_tick(_tick_from_json(json.loads(line)))
+
+
+class SmartWebSocketFeed:
+    """
+    SmartAPI WebSocket V2 (LTP mode). Login wale SmartConnect se jwt/feed token.
+    exchange_type: 1 = NSE_CM (index), 2 = NSE_FO (options).
+    """
+
+    LTP_MODE = 1
+
+    def __init__(
+        self,
+        api,
+        client_code: str,
+        tokens: Iterable[str],
+        exchange_type: int = 1,
+    ) -> None:
+        self.api = api
+        self.client_code = client_code
+        self.tokens = [str(t) for t in tokens]
+        self.exchange_type = exchange_type
+        self._ws = None
+
+    def run(self, on_tick: Callable[[Tick], None]) -> None:
+        # Lazy import: backtest / replay me websocket package zaruri nahi
+        from SmartApi.smartWebSocketV2 import SmartWebSocketV2
+
+        ws = SmartWebSocketV2(
+            self.api.access_token,
+            self.api.api_key,
+            self.client_code,
+            self.api.getfeedToken(),
+        )
+        self._ws = ws
+
+        def on_open(_ws):
+            ws.subscribe(
+                "vixbot",
+                self.LTP_MODE,
+                [{"exchangeType": self.exchange_type, "tokens": self.tokens}],
+            )
+
+        def on_data(_ws, msg):
+            try:
+                ts_ms = int(msg.get("exchange_timestamp") or 0)
+                ts = (
+                    datetime.fromtimestamp(ts_ms / 1000.0, tz=IST).replace(tzinfo=None)
+                    if ts_ms else ist_now()
+                )
+                on_tick(Tick(
+                    token=str(msg.get("token")),
+                    ts=ts,
+                    ltp=float(msg.get("last_traded_price") or 0) / 100.0,  # paise -> Rs
+                ))
+            except Exception as e:
+                print("[WS-FEED] bad tick", e, msg)
+
+        def on_error(_ws, err):
+            print("[WS-FEED] error", err)
+
+        ws.on_open = on_open
+        ws.on_data = on_data
+        ws.on_error = on_error
+        ws.connect()
+
+    def close(self) -> None:
+        if self._ws is not None:
+            try:
+                self._ws.close_connection()
+            except Exception as e:
+                print("[WS-FEED] close error", e)
+
+
+# ========== LIVE WIRING ==========
+
+
+class LiveOrbStream:
+    """
+    feed -> BarAggregator (+ ClockDriver), background thread me. Sirf wake-up
+    hai: live loop wait() karta hai aur 15-min close pe turant jaagta hai,
+    feed band / fail ho to timeout pe (purana polling). ORB rules yaha nahi
+    chalte - loop jaag ke broker candles (DayContext) pe apna V2 flow
+    chalata hai, wahi single source hai.
+    """
+
+    def __init__(self, feed, token: str) -> None:
+        self.feed = feed
+        self.token = str(token)
+        self.aggregator = BarAggregator()
+        self.aggregator.subscribe(self._on_bar_close)
+        self.clock = ClockDriver(self.aggregator)
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="orb-stream")
+
+    def _on_bar_close(self, bar: Bar) -> None:
+        if bar.token == self.token and bar.interval == 15:
+            self._wake.set()
+
+    def _run(self) -> None:
+        try:
+            self.feed.run(self.aggregator.on_tick)
+        except Exception as e:
+            print("[ORB-STREAM] feed stopped:", e)
+
+    def start(self) -> "LiveOrbStream":
+        self.clock.start()
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float) -> bool:
+        """True -> 15m bar close se jaage, False -> timeout."""
+        woke = self._wake.wait(timeout)
+        self._wake.clear()
+        return woke
+
+    def stop(self) -> None:
+        self.clock.stop()
+        close = getattr(self.feed, "close", None)
+        if close:
+            close()
+
+
+def start_orb_stream(api, client_code: str, token: str) -> Optional[LiveOrbStream]:
+    """SmartAPI websocket pe LiveOrbStream; start na ho to None (caller polling kare)."""
+    try:
+        return LiveOrbStream(SmartWebSocketFeed(api, client_code, [token]), token).start()
+    except Exception as e:
+        print("[ORB-STREAM] start failed, polling only:", e)
+        return None
+
+
+if __name__ == "__main__":
+    import sys
+
+    from config import NIFTYINDEXTOKEN
+
+    if len(sys.argv) < 2:
+        print("usage: python tick_bar_aggregator.py ticks.jsonl")
+        sys.exit(1)
+
+    def print_15m(b: Bar) -> None:
+        if b.interval == 15:
+            print(f"[BAR-15M] {b.start:%H:%M} o={b.open} h={b.high} l={b.low} c={b.close}")
+
+    agg = BarAggregator(on_bar_close=print_15m)
+    OrbWatcher(agg, NIFTYINDEXTOKEN, on_trigger=lambda name, info: None)
+    FileTickFeed(sys.argv[1]).run(agg.on_tick)
+    agg.on_clock(datetime.max)
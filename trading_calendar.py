@@ -0,0 +1,382 @@
+# trading_calendar.py
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import (
+    NIFTYINDEXTOKEN,
+    NSE_HOLIDAYS_FILE,
+    TRADING_CALENDAR_FILE,
+    TRADING_CALENDAR_START,
+)
+
+
+# Known range ke aage itne din tak weekday-minus-holiday rule se sessions banate hain
+FUTURE_HORIZON_DAYS = 400
+# Known range se pehle ki date maangi ho to itne din aur peeche se fetch (prev_session ke liye)
+HEAD_BUFFER_DAYS = 15
+
+
+def _parse_day(s: str) -> date:
+    return datetime.strptime(str(s)[:10], "%Y-%m-%d").date()
+
+
+def load_holiday_file(path: Path = NSE_HOLIDAYS_FILE) -> List[date]:
+    """
+    Optional local holiday list. Format: ["2026-01-26", ...]
+    ya {"holidays": [...]}. File na ho to empty list.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if isinstance(raw, dict):
+            raw = raw.get("holidays", [])
+        return sorted({_parse_day(x) for x in raw})
+    except Exception as e:
+        print("[CALENDAR] holiday file read error", path, e)
+        return []
+
+
+class TradingCalendar:
+    """
+    NSE trading sessions ka index.
+
+    - `known_from` .. `known_until` tak sessions actual daily candles se aate hain.
+    - Uske baad weekdays minus holiday-file (FUTURE_HORIZON_DAYS tak).
+    - `guess_from` diya ho (known range se pehle ki date chahiye thi, fetch nahi
+      hua) to known_from se pehle bhi weekdays minus holiday-file - ye guess
+      disk pe save nahi hota.
+    - Har calendar day -> "last session <= day" ka index precompute hota hai,
+      isliye prev/next/between sab O(1) lookups hain.
+    """
+
+    def __init__(
+        self,
+        sessions: Iterable[date],
+        holidays: Iterable[date] = (),
+        known_until: Optional[date] = None,
+        known_from: Optional[date] = None,
+        guess_from: Optional[date] = None,
+    ) -> None:
+        self.holidays = set(holidays)
+        known = sorted(set(sessions))
+        self.known_until = known_until or (known[-1] if known else None)
+        self.known_from = known_from or (known[0] if known else None)
+
+        start = self.known_from or _parse_day(TRADING_CALENDAR_START)
+        head: List[date] = []
+        if guess_from is not None and guess_from < start:
+            d = guess_from
+            while d < start:
+                if d.weekday() < 5 and d not in self.holidays:
+                    head.append(d)
+                d += timedelta(days=1)
+            start = guess_from
+        known = head + known
+
+        future_from = (
+            self.known_until + timedelta(days=1) if self.known_until else start
+        )
+        horizon = max(future_from, date.today()) + timedelta(days=FUTURE_HORIZON_DAYS)
+
+        d = future_from
+        while d <= horizon:
+            if d.weekday() < 5 and d not in self.holidays:
+                known.append(d)
+            d += timedelta(days=1)
+
+        self.sessions: List[date] = known
+        self.first_day = start
+        self.last_day = horizon
+
+        # calendar day -> index of last session on/before that day (-1 = none)
+        self._floor: Dict[date, int] = {}
+        idx = -1
+        d = start
+        while d <= horizon:
+            if idx + 1 < len(known) and known[idx + 1] == d:
+                idx += 1
+            self._floor[d] = idx
+            d += timedelta(days=1)
+
+    def known_sessions(self) -> List[date]:
+        """Sirf daily candles se aaye sessions (guess / future nahi)."""
+        if self.known_from is None or self.known_until is None:
+            return []
+        return [s for s in self.sessions if self.known_from <= s <= self.known_until]
+
+    def known_non_session(self, d: date) -> bool:
+        """d daily candles wali known range me hai aur us din session nahi tha."""
+        if self.known_from is None or self.known_until is None:
+            return False
+        return self.known_from <= d <= self.known_until and not self.is_session(d)
+
+    # ---------- LOOKUPS ----------
+
+    def _floor_idx(self, d: date) -> int:
+        if d in self._floor:
+            return self._floor[d]
+        if d < self.first_day:
+            return -1
+        raise ValueError(f"date {d} beyond calendar horizon {self.last_day}")
+
+    def is_session(self, d: date) -> bool:
+        i = self._floor_idx(d)
+        return i >= 0 and self.sessions[i] == d
+
+    def session_on_or_before(self, d: date) -> Optional[date]:
+        i = self._floor_idx(d)
+        return self.sessions[i] if i >= 0 else None
+
+    def prev_session(self, d: date) -> Optional[date]:
+        """Last session strictly before d."""
+        return self.session_on_or_before(d - timedelta(days=1))
+
+    def next_session(self, d: date) -> Optional[date]:
+        """First session strictly after d."""
+        i = self._floor_idx(d) + 1
+        return self.sessions[i] if i < len(self.sessions) else None
+
+    def sessions_between(self, a: date, b: date) -> List[date]:
+        """Sessions s with a <= s <= b."""
+        if b < a:
+            return []
+        lo = self._floor_idx(a - timedelta(days=1)) + 1
+        hi = self._floor_idx(b) + 1
+        return self.sessions[lo:hi]
+
+    # ---------- DISK ----------
+
+    def to_json(self) -> Dict:
+        return {
+            "known_from": self.known_from.isoformat() if self.known_from else None,
+            "known_until": self.known_until.isoformat() if self.known_until else None,
+            "sessions": [s.isoformat() for s in self.known_sessions()],
+            "holidays": sorted(h.isoformat() for h in self.holidays),
+        }
+
+    @classmethod
+    def from_json(cls, raw: Dict) -> "TradingCalendar":
+        known_until = raw.get("known_until")
+        known_from = raw.get("known_from")
+        return cls(
+            sessions=[_parse_day(s) for s in raw.get("sessions", [])],
+            holidays=[_parse_day(h) for h in raw.get("holidays", [])],
+            known_until=_parse_day(known_until) if known_until else None,
+            known_from=_parse_day(known_from) if known_from else None,
+        )
+
+
+def _save(cal: TradingCalendar, path: Path = TRADING_CALENDAR_FILE) -> None:
+    path = Path(path)
+    try:
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cal.to_json(), f)
+        os.replace(tmp, path)
+    except Exception as e:
+        print("[CALENDAR] save error", path, e)
+
+
+def _load(path: Path = TRADING_CALENDAR_FILE) -> Optional[TradingCalendar]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return TradingCalendar.from_json(json.load(f))
+    except Exception as e:
+        print("[CALENDAR] load error", path, e)
+        return None
+
+
+def _fetch_sessions(api, start: date, until: date) -> Optional[Tuple[List[date], Set[date]]]:
+    """
+    [start, until] ke NIFTY ONE_DAY candles -> (sessions, holidays). Range ke
+    andar jo weekday candle nahi hai wo holiday maana jaata hai. Fetch fail /
+    data hi na ho -> None.
+
+    Per-day candle cache se nahi jaata (saalon ki range = hazaar .npz files);
+    TRADING_CALENDAR_FILE hi is series ka range artifact hai aur _extend sirf
+    missing hissa laata hai.
+    """
+    from candle_fetcher import fetch_candles
+    from candle_decode import day_of_minute, decode_rows
+
+    payload = {
+        "exchange": "NSE",
+        "symboltoken": NIFTYINDEXTOKEN,
+        "interval": "ONE_DAY",
+        "fromdate": f"{start:%Y-%m-%d} 09:15",
+        "todate": f"{until:%Y-%m-%d} 15:30",
+    }
+    try:
+        hist = fetch_candles(api, payload)
+        arr = decode_rows(hist.get("data") or []) if hist.get("status") else None
+    except Exception as e:
+        print("[CALENDAR] daily candle fetch error:", e)
+        return None
+
+    if arr is None:
+        print("[CALENDAR] daily candles not available:", hist.get("message"))
+        return None
+
+    sessions = sorted({day_of_minute(m) for m in arr.minute.tolist()})
+    file_holidays = set(load_holiday_file())
+
+    holidays = set()
+    d = start
+    session_set = set(sessions)
+    while d <= until:
+        if d.weekday() < 5 and d not in session_set:
+            holidays.add(d)
+        d += timedelta(days=1)
+
+    # Khali range sirf tab valid hai jab usme koi "normal" weekday hi na ho
+    # (weekend / listed holiday) - warna data nahi mila, holidays mat gadho.
+    if not sessions and holidays - file_holidays:
+        print("[CALENDAR] daily candles not available:", start, "->", until)
+        return None
+
+    print("[CALENDAR] daily candles", start, "->", until, "sessions", len(sessions))
+    return sessions, holidays | file_holidays
+
+
+def build_from_daily_candles(api, until: date, start: Optional[date] = None) -> Optional[TradingCalendar]:
+    """Poora calendar [start (default TRADING_CALENDAR_START), until] ke daily candles se."""
+    start = start or _parse_day(TRADING_CALENDAR_START)
+    got = _fetch_sessions(api, start, until)
+    if got is None:
+        return None
+    sessions, holidays = got
+    return TradingCalendar(sessions, holidays, known_until=until, known_from=start)
+
+
+def _extend(api, cal: TradingCalendar, until: Optional[date], need_from: Optional[date]) -> TradingCalendar:
+    """
+    Known range ko sirf missing hisse ke fetch se badhao: aage (known_until,
+    until] aur peeche [need_from - HEAD_BUFFER_DAYS, known_from).
+    """
+    sessions = cal.known_sessions()
+    holidays = set(cal.holidays)
+    known_from, known_until = cal.known_from, cal.known_until
+    changed = False
+
+    if until is not None and known_until < until:
+        got = _fetch_sessions(api, known_until + timedelta(days=1), until)
+        if got is not None:
+            sessions += got[0]
+            holidays |= got[1]
+            known_until = until
+            changed = True
+
+    if need_from is not None and (need_from <= known_from or cal.prev_session(need_from) is None):
+        head_from = need_from - timedelta(days=HEAD_BUFFER_DAYS)
+        got = _fetch_sessions(api, head_from, known_from - timedelta(days=1))
+        if got is not None:
+            sessions = got[0] + sessions
+            holidays |= got[1]
+            known_from = head_from
+            changed = True
+
+    if not changed:
+        return cal
+    cal = TradingCalendar(sessions, holidays, known_until=known_until, known_from=known_from)
+    _save(cal)
+    return cal
+
+
+_CALENDAR: Optional[TradingCalendar] = None
+_CALENDAR_LOCK = threading.Lock()
+
+
+def get_trading_calendar(
+    api=None,
+    need_until: Optional[date] = None,
+    need_from: Optional[date] = None,
+) -> TradingCalendar:
+    """
+    Process-wide calendar.
+
+    - Pehle memory, phir disk (TRADING_CALENDAR_FILE).
+    - Agar api diya hai aur `need_until` tak actual sessions known nahi hain
+      to sirf missing tail ke daily candles fetch karke merge + save.
+    - `need_from` known range se pehle ho to utna hissa peeche se fetch
+      (prev_session ke liye HEAD_BUFFER_DAYS extra).
+    - Kuch na mile to weekdays minus holiday-file (known range se pehle bhi).
+    """
+    global _CALENDAR
+
+    with _CALENDAR_LOCK:
+        cal = _CALENDAR or _load()
+
+        # Aaj ka din abhi close nahi hua; known range max kal tak
+        yesterday = date.today() - timedelta(days=1)
+        target = min(need_until, yesterday) if need_until else yesterday
+
+        if api is not None:
+            if cal is None or cal.known_until is None or cal.known_from is None:
+                start = _parse_day(TRADING_CALENDAR_START)
+                if need_from is not None:
+                    start = min(start, need_from - timedelta(days=HEAD_BUFFER_DAYS))
+                built = build_from_daily_candles(api, yesterday, start)
+                if built is not None:
+                    cal = built
+                    _save(cal)
+            else:
+                cal = _extend(
+                    api, cal,
+                    yesterday if cal.known_until < target else None,
+                    need_from,
+                )
+
+        guess_from = need_from - timedelta(days=HEAD_BUFFER_DAYS) if need_from else None
+        if cal is None:
+            cal = TradingCalendar([], load_holiday_file(), guess_from=guess_from)
+        elif need_from is not None and need_from <= cal.first_day:
+            # Peeche ka data nahi mila - us hisse ke liye weekday rule (save nahi hota)
+            print("[CALENDAR] no daily candles before", cal.first_day, "- guessing from", guess_from)
+            cal = TradingCalendar(
+                cal.known_sessions(), cal.holidays,
+                known_until=cal.known_until, known_from=cal.known_from,
+                guess_from=guess_from,
+            )
+
+        _CALENDAR = cal
+        return cal
+
+
+def peek_trading_calendar() -> Optional[TradingCalendar]:
+    """Memory / disk wala calendar, bina fetch aur bina lock (None = abhi nahi bana)."""
+    return _CALENDAR or _load()
+
+
+def weekly_expiry_for(
+    trade_date: date,
+    cal: Optional[TradingCalendar] = None,
+    roll_on_expiry_day: bool = True,
+) -> date:
+    """
+    NIFTY weekly expiry (Tuesday):
+    - Nearest coming Tuesday; agar wo holiday hai to usse pehle wala session.
+    - Agar aaj hi expiry day hai to next week ka expiry
+      (roll_on_expiry_day=False ho to aaj ka hi).
+    """
+    cal = cal or get_trading_calendar()
+
+    weekday = trade_date.weekday()
+    nominal = trade_date + timedelta(days=(1 - weekday) % 7)  # 1 = Tuesday
+
+    expiry = cal.session_on_or_before(nominal) or nominal
+    if expiry < trade_date or (roll_on_expiry_day and expiry == trade_date):
+        nominal += timedelta(days=7)
+        expiry = cal.session_on_or_before(nominal) or nominal
+
+    return expiry
@@ -40,13 +40,13 @@ from config import (
     RISKSTARTTIME,
     BACKTESTDIR,
     NIFTYINDEXTOKEN,
-    SENSEXINDEXTOKEN,
     VIXINDEXTOKEN,
     HOOK_DETECTION_TIME,
     BREAKOUT_WAIT_MINUTES,
+    GANN_LEVELS_MAX_ROWS,
 )
 from strategy import (
-    findentryidx,
+    findentryrows,
     applyborestriction,
     processnormal,
 )
@@ -55,7 +55,6 @@ from smartapi_helpers import (
     get_orb_breakout_15min,
     get_midday_orb_breakout_15min,
     getoptiontoken,
-    getoption1min,
     calc_atm_strikes,
     get_previous_day_high_low,
     check_breakout,
@@ -67,6 +66,8 @@ from models import (
     VixRequest,
     SimpleVixConfig,
     LiveTradeSimpleRequest,
+    GannLevelsRequest,
+    BacktestBatchRequest,
 )
 
 from typing import Dict, Any, List, Optional, Literal
@@ -78,12 +79,10 @@ import logging
 
 import pandas as pd
 import numpy as np
-import openpyxl  # Gann Excel ke liye
-import xlwings as xw
 import pyotp
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import PlainTextResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 from datetime import datetime, date, time, timedelta
@@ -95,14 +94,24 @@ from SmartApi import SmartConnect
 from SmartApi import smartConnect as smart_module
 import SmartApi.smartConnect as smart_mod
 
-from expiry_store import refresh_and_get_expiries
+from expiry_store import expiries_with_etag, etag_matches
 from jumpback_rule import decide_orb_or_jumpback
 from price_rounding import round_index_price_for_side
+from breakout_scanner import ORB_915, scan_day
+from multi_timeframe import bars_for
 from bot3_high_vol_rule import (
     run_bot3_high_vol_strategy,
     run_bot3_entry_engine,
 )
 from trading_state import bot_state
+from day_context import DayContext
+from tick_bar_aggregator import start_orb_stream
+from trading_calendar import weekly_expiry_for
+from gann_mapping_engine import ladders_for_cmps, ladder_columns, ladder_npz_bytes
+from broker import create_smartconnect
+from scrip_refresh import refresh_scripmaster
+from option_chain import resolve_chain
+from backtest_batch import batch_trading_days, iter_batch_ndjson
 
 from config import BOT3_HIGH_VOL_THRESHOLD
 
@@ -118,22 +127,12 @@ from logging.handlers import RotatingFileHandler
 
 def pick_expiry_for_live(trade_date: date) -> str:
     """
-    NIFTY weekly expiry Tuesday:
-    - Normal days: nearest coming Tuesday
-    - Agar aaj Tuesday (expiry day) hai: next Tuesday choose karo.
+    NIFTY weekly expiry Tuesday (holiday ho to pehle wala session):
+    - Normal days: nearest coming expiry
+    - Agar aaj expiry day hai: next week ka expiry.
     Returns YYYY-MM-DD.
     """
-    weekday = trade_date.weekday()  # Monday=0, Tuesday=1, ... Sunday=6
-
-    # Pehle nearest coming Tuesday nikaalo
-    days_ahead = (1 - weekday) % 7  # 1 = Tuesday
-    expiry = trade_date + timedelta(days=days_ahead)
-
-    # Agar aaj hi Tuesday hai (expiry day), to next week ka Tuesday lo
-    if weekday == 1:
-        expiry = expiry + timedelta(days=7)
-
-    return expiry.strftime("%Y-%m-%d")
+    return weekly_expiry_for(trade_date).strftime("%Y-%m-%d")
 
 
 # ---- Logging config: console + file ----
@@ -277,44 +276,11 @@ def get_ltp_safe(api: SmartConnect, exchange: str, tradingsymbol: str, token: st
 def update_openapi():
     """
     Manual trigger: OpenAPIScripMaster.json ko latest AngelOne URL se update karega.
-    Wohi script run karta hai jo cron use kar raha hai.
+    In-process streaming refresh (scrip_refresh.py): atomic swap, diff,
+    scrip / expiry index background me rebuild.
+    Source hamesha SCRIPMASTER_URL - custom URL / file sirf scrip_refresh.py CLI se.
     """
-    import subprocess
-    import pathlib
-
-    try:
-        # Repo directory (vix_server.py ka parent folder)
-        repo_dir = pathlib.Path(__file__).resolve().parent
-        script_path = repo_dir / "update_openapi_scripmaster.sh"
-
-        if not script_path.exists():
-            return {
-                "status": "ERROR",
-                "message": f"Script not found: {script_path}",
-            }
-
-        result = subprocess.run(
-            ["bash", str(script_path)],
-            cwd=str(repo_dir),
-            capture_output=True,
-            text=True,
-            timeout=180,
-        )
-
-        ok = (result.returncode == 0)
-
-        return {
-            "status": "OK" if ok else "ERROR",
-            "returncode": result.returncode,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-        }
-
-    except Exception as e:
-        return {
-            "status": "ERROR",
-            "message": str(e),
-        }
+    return refresh_scripmaster()
 
 
 @app.get("/admin/poll")
@@ -482,7 +448,7 @@ def smartlogin() -> Optional[SmartConnect]:
     Backtest ke liye use ho raha hai.
     """
     totp = pyotp.TOTP(TOTPSECRET).now()
-    api = SmartConnect(
+    api = create_smartconnect(
         api_key=APIKEY,
         timeout=(10, 25)
     )
@@ -502,7 +468,7 @@ def smartlogin_for_account(acc: AccountConfig) -> SmartConnect:
     Live trading ke liye use hoga.
     """
     totp = pyotp.TOTP(acc.totpsecret).now()
-    api = SmartConnect(
+    api = create_smartconnect(
         api_key=APIKEY,
         timeout=(10, 25)
     )
@@ -615,22 +581,83 @@ def test_account_login():
 # ========= EXPIRIES ENDPOINTS =========
 
 
+def _expiries_response(request: Request, response: Response, include_past: bool):
+    expiries, etag = expiries_with_etag(include_past=include_past)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return expiries
+
+
 @app.get("/nifty-expiries-backtest")
-def get_nifty_expiries_backtest() -> List[str]:
+def get_nifty_expiries_backtest(request: Request, response: Response) -> List[str]:
     """
     Backtest ke liye NIFTY OPTIDX expiries (YYYY-MM-DD),
-    past + future sab dates.
+    past + future sab dates. ETag / If-None-Match -> 304.
     """
-    return refresh_and_get_expiries(include_past=True)
+    return _expiries_response(request, response, include_past=True)
 
 
 @app.get("/nifty-expiries-live")
-def get_nifty_expiries_live() -> List[str]:
+def get_nifty_expiries_live(request: Request, response: Response) -> List[str]:
     """
     Live trading ke liye NIFTY OPTIDX expiries (YYYY-MM-DD),
-    sirf aaj ke baad wali.
+    sirf aaj ke baad wali. ETag / If-None-Match -> 304.
+    """
+    return _expiries_response(request, response, include_past=False)
+
+
+# ========= GANN LEVELS (BATCH) =========
+
+
+@app.post("/gann/levels")
+def gann_levels(req: GannLevelsRequest):
+    """
+    Bahut saare CMPs ke Gann ladders ek saath (compiled table / formula se).
+    - cmps list ya start..end (step) range
+    - midday=True -> midday ladder
+    - format "json": {field: [values]} columnar; "npz": np.load-able binary
     """
-    return refresh_and_get_expiries(include_past=False)
+    if req.cmps:
+        cmps = np.asarray(req.cmps, dtype=np.float64)
+    elif req.start is not None and req.end is not None:
+        if req.step <= 0:
+            raise HTTPException(status_code=400, detail="step must be positive")
+        if req.end < req.start:
+            raise HTTPException(status_code=400, detail="end must be >= start")
+        # Rows pehle gino - bada range arange se pehle hi reject
+        rows = (req.end - req.start) // req.step + 1
+        if rows > GANN_LEVELS_MAX_ROWS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"max {GANN_LEVELS_MAX_ROWS} cmps per request",
+            )
+        cmps = req.start + np.arange(rows, dtype=np.float64) * req.step
+    else:
+        raise HTTPException(status_code=400, detail="cmps ya start+end chahiye")
+
+    if len(cmps) > GANN_LEVELS_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max {GANN_LEVELS_MAX_ROWS} cmps per request",
+        )
+    if not np.isfinite(cmps).all() or (cmps <= 0).any():
+        raise HTTPException(status_code=400, detail="cmps must be positive numbers")
+
+    ladders = ladders_for_cmps(cmps, midday=req.midday)
+
+    if req.format == "npz":
+        return Response(
+            content=ladder_npz_bytes(ladders),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": "attachment; filename=gann_levels.npz"},
+        )
+
+    return {
+        "midday": req.midday,
+        "rows": int(len(ladders)),
+        "columns": ladder_columns(ladders),
+    }
 
 
 @app.get("/day-open-vix")
@@ -716,14 +743,8 @@ def savebacktestrequest(req: VixRequest) -> None:
         print("Error saving backtest", e)
 
 
-@app.post("/v2/vixbacktest")
-def vixbacktest(req: VixV2Request) -> Dict[str, Any]:
-    """
-    V2 ORB+Gann backtest:
-    - Android se sirf date + expiry aata hai (VixV2Request).
-    - Yahan se hum internally VixRequest banate hain (dummy values),
-      jo niche existing V2 engine (run_v2_orb_gann_backtest_logic) use karta hai.
-    """
+def build_v2_backtest_request(trade_date: str, expiry: str) -> VixRequest:
+    """V2 (date + expiry) -> internal VixRequest (dummy levels, engine bharega)."""
     dummy_side = {
         "level": 0.0,
         "t2": None,
@@ -732,14 +753,14 @@ def vixbacktest(req: VixV2Request) -> Dict[str, Any]:
         "sl": None,
     }
 
-    v1req = VixRequest(
+    return VixRequest(
         candletype="NORMAL",
         open=0.0,
         vix=0.0,
         buy=dummy_side,
         sell=dummy_side,
-        date=req.date,
-        expiry=req.expiry,
+        date=trade_date,
+        expiry=expiry,
         boside=None,
         bostart=None,
         lots=1,
@@ -750,20 +771,13 @@ def vixbacktest(req: VixV2Request) -> Dict[str, Any]:
         borestrictuntil=None,
     )
 
-    print("V2 RAW REQUEST BODY:", req.dict())
-    print("V2 DERIVED V1 REQUEST:", v1req.dict())
-
-    # Backtest request ko file me save karo
-    savebacktestrequest(v1req)
-
-    # SmartAPI login (config.py credentials)
-    api = smartlogin()
-    if api is None:
-        return {
-            "status": "error",
-            "message": "SmartAPI login failed (Invalid TOTP credentials).",
-        }
 
+def run_v2_backtest_day(api, v1req: VixRequest) -> Dict[str, Any]:
+    """
+    Ek din ka V2 backtest (logged-in api ke saath):
+    Bot-3 high-vol gate -> normal flow -> JUMP pe 9:15 ORB.
+    /v2/vixbacktest aur batch runner dono yahi use karte hain.
+    """
     # Fake AccountConfig jahan sirf name use ho raha hai
     try:
         fake_acc = AccountConfig(
@@ -779,24 +793,20 @@ def vixbacktest(req: VixV2Request) -> Dict[str, Any]:
                 self.name = name
         fake_acc = DummyAcc("BACKTEST")
 
+    # Is request ka saara market data ek hi DayContext se (har series ek baar)
+    ctx = DayContext(api, v1req.date)
+
     # ---- BOT-3 HIGH-VOL GATE ----
-    if is_bot3_high_vol_day(api, v1req.date):
+    if is_bot3_high_vol_day(api, v1req.date, ctx=ctx):
         print("[BOT3] High-vol day detected → Bot-3 ONLY mode")
 
-        nifty_idxdf = getindex1min(
-            api, v1req.date, symboltoken=NIFTYINDEXTOKEN)
+        nifty_idxdf = ctx.nifty_1min()
         if nifty_idxdf.empty:
             return {"status": "error", "message": "No NIFTY data for Bot-3"}
         nifty_idxdf.index = pd.to_datetime(nifty_idxdf.index)
         full_idxdf = nifty_idxdf.copy()
 
-        daily_df = (
-            full_idxdf
-            .resample("1D")
-            .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-            .dropna()
-            .reset_index()
-        )
+        daily_df = bars_for(full_idxdf).daily.reset_index()
         daily_df = daily_df.rename(columns={"index": "date"})
 
         bot3_result = run_bot3_high_vol_strategy(
@@ -813,7 +823,7 @@ def vixbacktest(req: VixV2Request) -> Dict[str, Any]:
         }
 
     # ---- NORMAL FLOW (Bot-1 / Bot-2 / 9:15 etc.) ----
-    result = run_v2_orb_gann_backtest_logic(api, fake_acc, v1req)
+    result = run_v2_orb_gann_backtest_logic(api, fake_acc, v1req, ctx=ctx)
 
     if result.get("status") == "JUMP_TO_915_ORB":
         jump_decision_time = result.get("jump_decision_time")
@@ -826,11 +836,60 @@ def vixbacktest(req: VixV2Request) -> Dict[str, Any]:
             fake_acc,
             v1req,
             fallback_after_time=jump_decision_time,
+            ctx=ctx,
         )
 
     return result
 
 
+@app.post("/v2/vixbacktest")
+def vixbacktest(req: VixV2Request) -> Dict[str, Any]:
+    """
+    V2 ORB+Gann backtest:
+    - Android se sirf date + expiry aata hai (VixV2Request).
+    - Yahan se hum internally VixRequest banate hain (dummy values),
+      jo niche existing V2 engine (run_v2_orb_gann_backtest_logic) use karta hai.
+    """
+    v1req = build_v2_backtest_request(req.date, req.expiry)
+
+    print("V2 RAW REQUEST BODY:", req.dict())
+    print("V2 DERIVED V1 REQUEST:", v1req.dict())
+
+    # Backtest request ko file me save karo
+    savebacktestrequest(v1req)
+
+    # SmartAPI login (config.py credentials)
+    api = smartlogin()
+    if api is None:
+        return {
+            "status": "error",
+            "message": "SmartAPI login failed (Invalid TOTP credentials).",
+        }
+
+    return run_v2_backtest_day(api, v1req)
+
+
+@app.post("/v2/vixbacktest/batch")
+def vixbacktest_batch(req: BacktestBatchRequest):
+    """
+    Date range backtest: din process pool me parallel (ek login, shared
+    candle cache). Response NDJSON stream: har din ek line (jaise complete ho),
+    aakhri line aggregate summary (P&L, win rate, drawdown).
+    """
+    api = smartlogin()
+    if api is None:
+        return {
+            "status": "error",
+            "message": "SmartAPI login failed (Invalid TOTP credentials).",
+        }
+
+    days = batch_trading_days(api, req.date_from, req.date_to)
+    return StreamingResponse(
+        iter_batch_ndjson(api, days, req.expiry, workers=req.workers),
+        media_type="application/x-ndjson",
+    )
+
+
 @app.post("/v2/manual-test-trade")
 def manual_test_trade():
     """
@@ -1076,53 +1135,6 @@ def get_live_option_ltp(api: SmartConnect, token: str) -> float:
         return 0.0
 
 
-def get_nifty_daily_history_for_atr(api: SmartConnect, trade_date: str, lookback_days: int = 40) -> Optional[pd.DataFrame]:
-    """
-    NIFTY ka 1D OHLC history SmartAPI se laata hai,
-    ATR regime filter ke liye.
-    trade_date: "YYYY-MM-DD" (current test day)
-    """
-    try:
-        end_dt = datetime.strptime(trade_date, "%Y-%m-%d").date()
-        start_dt = end_dt - timedelta(days=lookback_days)
-
-        params = {
-            "exchange": "NSE",
-            "symboltoken": NIFTYINDEXTOKEN,  # 99926000
-            "interval": "ONE_DAY",
-            "fromdate": f"{start_dt} 09:15",
-            "todate": f"{end_dt} 15:30",
-        }
-        resp = api.getCandleData(params)
-
-        # YEH NAYA DEBUG PRINT
-        print("[ATR-DAILY-RAW]", resp.get("status"),
-              len(resp.get("data") or []))
-
-        if not resp.get("status") or not resp.get("data"):
-            print("[ATR-DAILY] No daily data for ATR regime:", resp)
-            return None
-
-        df = pd.DataFrame(
-            resp["data"],
-            columns=["timestamp", "open", "high", "low", "close", "volume"],
-        )
-        df["open"] = df["open"].astype(float)
-        df["high"] = df["high"].astype(float)
-        df["low"] = df["low"].astype(float)
-        df["close"] = df["close"].astype(float)
-        df["date"] = pd.to_datetime(df["timestamp"]).dt.date
-
-        # AUR YEH NAYA DEBUG PRINT
-        print("[ATR-DAILY-DF-TAIL]")
-        print(df[["date", "high", "low", "close"]].tail(5))
-
-        return df[["date", "open", "high", "low", "close"]]
-    except Exception as e:
-        print(f"[ATR-DAILY-ERROR] {e}")
-        return None
-
-
 def calculate_daily_atr_and_ratio(idxdf_daily, period=14):
     """
     idxdf_daily: daily NIFTY DF with columns: ['date','high','low','close']
@@ -1187,12 +1199,14 @@ class LiveScheduleResponse(BaseModel):
 # ========= REAL LIVE TRADE ENDPOINT (V2 ENGINE) =========
 # 1) PURE STRATEGY HELPER (backtest logic yahan shift)
 
-def is_bot3_high_vol_day(api, trade_date) -> bool:
+def is_bot3_high_vol_day(api, trade_date, ctx: Optional[DayContext] = None) -> bool:
     """
     Prev day HL/ATR > BOT3_HIGH_VOL_THRESHOLD?
     True → Bot-3 only day.
     """
-    daily_hist = get_nifty_daily_history_for_atr(api, trade_date)
+    if ctx is None:
+        ctx = DayContext(api, trade_date)
+    daily_hist = ctx.daily_history()
     if daily_hist is None:
         print("[BOT3-HIGHVOL] daily_hist is None")
         return False
@@ -1221,11 +1235,18 @@ def run_v2_orb_gann_backtest_logic(
     api,
     acc,
     v1req: VixRequest,
+    ctx: Optional[DayContext] = None,
 ) -> Dict[str, Any]:
     """
     10:00 ORB + Gann backtest logic.
     BACKTEST MODE me yahan 9:30 hook/unhook detection bhi hota hai.
+    Market data ctx (DayContext) se aata hai; na diya ho to yahin banta hai.
     """
+    if ctx is None:
+        ctx = DayContext(api, v1req.date)
+
+    # Hook, ATR, prev-day, NIFTY/SENSEX sab independent hain - ek saath fetch
+    ctx.prefetch()
 
     # ===== BACKTEST HOOK / UNHOOK LOGIC =====
     bot_state.hook_detected = False
@@ -1234,7 +1255,7 @@ def run_v2_orb_gann_backtest_logic(
     hook_info: Dict[str, Any] = {}
 
     print("[HOOK] BACKTEST hook detection start")
-    hook_info = detect_hook_930_exact(api, v1req.date)
+    hook_info = detect_hook_930_exact(api, v1req.date, ctx=ctx)
     bot_state.hook_detected = True
     bot_state.is_hooked = hook_info.get("is_hooked", True)
     bot_state.breakout_level = hook_info.get("breakout_level", 0.0)
@@ -1249,8 +1270,8 @@ def run_v2_orb_gann_backtest_logic(
         )
 
     # -------- NIFTY + SENSEX 1-min DATA --------
-    nifty_idxdf = getindex1min(api, v1req.date, symboltoken=NIFTYINDEXTOKEN)
-    sensex_idxdf = getindex1min(api, v1req.date, symboltoken=SENSEXINDEXTOKEN)
+    nifty_idxdf = ctx.nifty_1min()
+    sensex_idxdf = ctx.sensex_1min()
     if nifty_idxdf.empty or sensex_idxdf.empty:
         return {"status": "error", "message": "No NIFTY/SENSEX data"}
 
@@ -1258,13 +1279,7 @@ def run_v2_orb_gann_backtest_logic(
     sensex_idxdf.index = pd.to_datetime(sensex_idxdf.index)
 
     # -------- DAILY DF FROM 1-MIN (for ATR regime) --------
-    daily_df = (
-        nifty_idxdf
-        .resample("1D")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-        .dropna()
-        .reset_index()
-    )
+    daily_df = bars_for(nifty_idxdf).daily.reset_index()
     daily_df = daily_df.rename(columns={"index": "date"})
 
     is_high_vol_day = False  # FLAG
@@ -1278,7 +1293,7 @@ def run_v2_orb_gann_backtest_logic(
         print("[ATR REGIME] skip: insufficient daily data for ATR")
 
     # -------- ATR REGIME USING DAILY HISTORY (NEW) – LOG + FALLBACK FLAG --------
-    daily_hist = get_nifty_daily_history_for_atr(api, v1req.date)
+    daily_hist = ctx.daily_history()
     if daily_hist is None:
         print("[ATR-REGIME-DAILY] daily_hist is None")
     else:
@@ -1298,7 +1313,7 @@ def run_v2_orb_gann_backtest_logic(
             print("[ATR-REGIME-DAILY] skip: insufficient daily history")
 
     # -------- PREVIOUS DAY HIGH/LOW --------
-    prevdaydata = get_previous_day_high_low(api, v1req.date)
+    prevdaydata = get_previous_day_high_low(api, v1req.date, ctx=ctx)
     prevhigh = prevdaydata.get("prev_high") or prevdaydata.get("prevhigh")
     prevlow = prevdaydata.get("prev_low") or prevdaydata.get("prevlow")
     if not prevhigh or not prevlow:
@@ -1317,7 +1332,7 @@ def run_v2_orb_gann_backtest_logic(
         }
 
     # -------- HALF GAP CHECK (ATR 14 Angel) --------
-    half_gap = detect_half_gap(api, nifty_idxdf, v1req.date)
+    half_gap = detect_half_gap(api, nifty_idxdf, v1req.date, ctx=ctx)
     atr14 = float(half_gap.get("atr_14") or 0.0)
 
     rule = "HALF_GAP" if half_gap.get("is_half_gap", False) else "ATR_NORMAL"
@@ -1341,7 +1356,9 @@ def run_v2_orb_gann_backtest_logic(
     cutoff_1330 = datetime.combine(
         trade_date, datetime.strptime("13:30", "%H:%M").time()
     )
-    idx_till_1330 = full_idxdf[full_idxdf.index <= cutoff_1330]
+    # 1-min -> 15-min / daily ek hi baar (multi_timeframe); rules isi frame pe chalte hain
+    bars = bars_for(full_idxdf)
+    idx_till_1330 = bars.window(full_idxdf.index[0], cutoff_1330, include_end=True)
     prev_break_till_1330 = check_breakout(idx_till_1330, prevhigh, prevlow)
     prev_break_flag_1330 = bool(prev_break_till_1330.get("breakout"))
 
@@ -1352,9 +1369,7 @@ def run_v2_orb_gann_backtest_logic(
     )
 
     # -------- PREV DAY 15-MIN BREAKOUT --------
-    idx15 = full_idxdf.resample("15min").agg(
-        {"open": "first", "high": "max", "low": "min", "close": "last"}
-    ).dropna()
+    idx15 = bars.bars_15m
     breakout_result = check_breakout(idx15, prevhigh, prevlow)
     prev_break_15_flag = bool(breakout_result.get("breakout"))
     breakout_type = breakout_result.get("breakouttype")
@@ -1528,7 +1543,7 @@ def run_v2_orb_gann_backtest_logic(
     }
 
     # -------- ATR REGIME USING DAILY HISTORY (NEW) – LOG ONLY --------
-    daily_hist = get_nifty_daily_history_for_atr(api, v1req.date)
+    daily_hist = ctx.daily_history()
     if daily_hist is None:
         print("[ATR-REGIME-DAILY] daily_hist is None")
     else:
@@ -1653,8 +1668,10 @@ def run_v2_orb_gann_backtest_logic(
     # -------- BO RESTRICTION + ENTRY CANDLES --------
     idxdfbuy = applyborestriction(idxdf_buy_window, v1req, legside="BUYBO")
     idxdfsell = applyborestriction(idxdf_sell_window, v1req, legside="SELLBO")
-    buyentrycandle = findentryidx(idxdfbuy, buyentrylevel)
-    sellentrycandle = findentryidx(idxdfsell, sellentrylevel)
+    # Dono legs base_idxdf ke time-slices: ek cached index, ek query
+    buyentrycandle, sellentrycandle = findentryrows(
+        base_idxdf, [idxdfbuy, idxdfsell], [buyentrylevel, sellentrylevel]
+    )
     print(
         "[ENTRY-RESULT-CHOTI]",
         "is_choti_day=", is_choti_day,
@@ -1695,8 +1712,8 @@ def run_v2_orb_gann_backtest_logic(
                   expiry_raw, "resetting to trade date")
             expiry_raw = v1req.date  # fallback: index trade date
 
-        cetoken = getoptiontoken(cestrike, expiry_raw, "CE")
-        petoken = getoptiontoken(pestrike, expiry_raw, "PE")
+        cetoken = getoptiontoken(cestrike, expiry_raw, "CE", as_of=v1req.date)
+        petoken = getoptiontoken(pestrike, expiry_raw, "PE", as_of=v1req.date)
 
         movement = 0.0
         if not cetoken or not petoken:
@@ -1707,8 +1724,10 @@ def run_v2_orb_gann_backtest_logic(
                 "petoken": petoken,
             }
 
-        ceoptdf = getoption1min(api, cetoken, v1req.date)
-        peoptdf = getoption1min(api, petoken, v1req.date)
+        # CE + PE ek saath
+        ctx.prefetch(option_tokens=(cetoken, petoken))
+        ceoptdf = ctx.option_1min(cetoken)
+        peoptdf = ctx.option_1min(petoken)
         if ceoptdf.empty or peoptdf.empty:
             return {
                 "status": "error",
@@ -1979,6 +1998,7 @@ def run_915_orb_gann_backtest_logic(
     acc,
     v1req: VixRequest,
     fallback_after_time: Optional[str] = None,  # "HH:MM" -> bot-1 JUMP time
+    ctx: Optional[DayContext] = None,
 ) -> Dict[str, Any]:
     """
     9:15–9:30 ORB based Gann bot:
@@ -1986,10 +2006,14 @@ def run_915_orb_gann_backtest_logic(
     - us ORB ka 15-min close-based breakout (09:30 se aage)
     - Gann + HALF_GAP / ATR_NORMAL mapping same as 10AM bot
     - CHOTI & 10:00 ORB rules yahan nahi lagenge
+    - JUMP fallback pe bot-1 ka ctx milta hai, data dobara fetch nahi hota
     """
+    if ctx is None:
+        ctx = DayContext(api, v1req.date)
+    ctx.prefetch(include_sensex=False)
 
     # -------- NIFTY 1-min DATA --------
-    nifty_idxdf = getindex1min(api, v1req.date, symboltoken=NIFTYINDEXTOKEN)
+    nifty_idxdf = ctx.nifty_1min()
     if nifty_idxdf.empty:
         return {"status": "error", "message": "No NIFTY data"}
 
@@ -1997,7 +2021,7 @@ def run_915_orb_gann_backtest_logic(
     full_idxdf = nifty_idxdf.copy()
 
     # -------- HALF GAP + ATR14 (Angel) --------
-    half_gap = detect_half_gap(api, full_idxdf, v1req.date)
+    half_gap = detect_half_gap(api, full_idxdf, v1req.date, ctx=ctx)
     atr14 = float(half_gap.get("atr_14") or 0.0)
     is_half_gap = half_gap.get("is_half_gap", False)
     half_gap_type = half_gap.get("half_gap_type")
@@ -2011,22 +2035,13 @@ def run_915_orb_gann_backtest_logic(
             "atr_14": atr14,
         }
 
-    # -------- 9:15–9:30 ORB MARKING (15-min) --------
-    trade_date = full_idxdf.index[0].date()
-    start_915 = datetime.combine(
-        trade_date, datetime.strptime("09:15", "%H:%M").time()
-    )
-    end_930 = datetime.combine(
-        trade_date, datetime.strptime("09:30", "%H:%M").time()
-    )
-
-    orb_915 = full_idxdf[(full_idxdf.index >= start_915)
-                         & (full_idxdf.index < end_930)]
-    if orb_915.empty:
+    # -------- 9:15–9:30 ORB MARKING + 15-MIN CLOSE BREAKOUT (09:30 se aage) --------
+    day = scan_day(full_idxdf, ORB_915)
+    if not day.has_mark:
         return {"status": "error", "message": "No 9:15–9:30 data"}
 
-    marked_high = float(orb_915["high"].max())
-    marked_low = float(orb_915["low"].min())
+    marked_high = day.marked_high
+    marked_low = day.marked_low
 
     print(
         "[915-ORB-MARK]",
@@ -2034,9 +2049,7 @@ def run_915_orb_gann_backtest_logic(
         "low=", marked_low,
     )
 
-    # -------- 15-MIN CLOSE-BASED BREAKOUT (from 09:30 onwards) --------
-    trigger_window = full_idxdf[full_idxdf.index >= end_930]
-    if trigger_window.empty:
+    if day.scan_bars == 0:
         return {
             "status": "NO_TRIGGER_WINDOW_915",
             "message": "No data after 9:30 for 9:15 ORB breakout",
@@ -2044,32 +2057,20 @@ def run_915_orb_gann_backtest_logic(
             "marked_low": marked_low,
         }
 
-    agg_dict = {"open": "first", "high": "max", "low": "min", "close": "last"}
-    trigger_df15m = trigger_window.resample("15min").agg(agg_dict).dropna()
-
-    trigger_side = None
-    trigger_time = None
-    trigger_price = None
-
-    for ts, row in trigger_df15m.iterrows():
-        close_price = float(row["close"])
-        high_price = float(row["high"])
-        low_price = float(row["low"])
+    checked = day.candles if day.hit < 0 else day.candles.iloc[: day.hit + 1]
+    for ts, close_price, high_price, low_price in zip(
+        checked.index, checked["close"].tolist(), checked["high"].tolist(), checked["low"].tolist()
+    ):
         print(
             f"[915-ORB-15M-CHECK] {ts} close {close_price} high {high_price} low {low_price}"
         )
 
-        if close_price > marked_high:
-            trigger_side = "BUY"
-            trigger_time = ts
-            trigger_price = round_index_price_for_side(close_price, "BUY")
-            break
-
-        if close_price < marked_low:
-            trigger_side = "SELL"
-            trigger_time = ts
-            trigger_price = round_index_price_for_side(close_price, "SELL")
-            break
+    trigger_side = day.side
+    trigger_time = day.time
+    trigger_price = None
+    if day.hit >= 0:
+        close_price = float(day.candles["close"].iloc[day.hit])
+        trigger_price = round_index_price_for_side(close_price, trigger_side)
 
     if trigger_time is None:
         return {
@@ -2163,8 +2164,10 @@ def run_915_orb_gann_backtest_logic(
     # -------- BO RESTRICTION + ENTRY CANDLES --------
     idxdfbuy = applyborestriction(idxdf_buy_window, v1req, legside="BUYBO")
     idxdfsell = applyborestriction(idxdf_sell_window, v1req, legside="SELLBO")
-    buyentrycandle = findentryidx(idxdfbuy, buyentrylevel)
-    sellentrycandle = findentryidx(idxdfsell, sellentrylevel)
+    # Dono legs base_idxdf ke time-slices: ek cached index, ek query
+    buyentrycandle, sellentrycandle = findentryrows(
+        base_idxdf, [idxdfbuy, idxdfsell], [buyentrylevel, sellentrylevel]
+    )
     print(
         "[915-ENTRY-RESULT]",
         "buytime=", getattr(buyentrycandle, "name", None),
@@ -2194,8 +2197,8 @@ def run_915_orb_gann_backtest_logic(
                 expiry_raw), "resetting to trade date")
             expiry_raw = v1req.date
 
-        cetoken = getoptiontoken(cestrike, expiry_raw, "CE")
-        petoken = getoptiontoken(pestrike, expiry_raw, "PE")
+        cetoken = getoptiontoken(cestrike, expiry_raw, "CE", as_of=v1req.date)
+        petoken = getoptiontoken(pestrike, expiry_raw, "PE", as_of=v1req.date)
     else:
         cestrike = 0
         pestrike = 0
@@ -2203,8 +2206,10 @@ def run_915_orb_gann_backtest_logic(
         petoken = None
 
     if not index_mode:
-        ceoptdf = getoption1min(api, cetoken, v1req.date)
-        peoptdf = getoption1min(api, petoken, v1req.date)
+        # CE + PE ek saath
+        ctx.prefetch(option_tokens=(cetoken, petoken))
+        ceoptdf = ctx.option_1min(cetoken)
+        peoptdf = ctx.option_1min(petoken)
         if ceoptdf.empty or peoptdf.empty:
             return {
                 "status": "error",
@@ -2444,6 +2449,19 @@ def run_live_loop_for_account(api, acc, date: str, expiry: str):
 
     print(f"[LIVE-LOOP] Started for {acc.name} date={date} expiry={expiry}")
 
+    # Poore din ka ek hi context: history ek baar, aaj ke bars delta me
+    ctx = DayContext(api, date, live=True)
+
+    # NIFTY ticks -> 15-min close pe loop turant jaagta hai (ORB rules neeche
+    # V2 flow me broker candles pe); stream na ho to purana fixed-interval polling
+    stream = start_orb_stream(api, acc.clientid, NIFTYINDEXTOKEN)
+
+    def pause(seconds: float) -> None:
+        if stream is not None:
+            stream.wait(seconds)
+        else:
+            time.sleep(seconds)
+
     while True:
         now = datetime.now()
 
@@ -2453,7 +2471,8 @@ def run_live_loop_for_account(api, acc, date: str, expiry: str):
         if (not bot_state.hook_detected
                 and now.time() >= HOOK_DETECTION_TIME):
             print("[HOOK] LIVE 9:30 hook detection start")
-            hook_info = detect_hook_930_exact(api, date)
+            ctx.refresh_intraday()
+            hook_info = detect_hook_930_exact(api, date, ctx=ctx)
             bot_state.hook_detected = True
             bot_state.is_hooked = hook_info.get("is_hooked", False)
             bot_state.breakout_level = hook_info.get("breakout_level", 0.0)
@@ -2491,10 +2510,14 @@ def run_live_loop_for_account(api, acc, date: str, expiry: str):
             borestrictuntil=None,
         )
 
-        strat = run_v2_orb_gann_backtest_logic(api=api, acc=acc, v1req=v1req)
+        # Sirf last bar ke baad ke minutes (NIFTY/SENSEX/options)
+        ctx.refresh_intraday()
+        strat = run_v2_orb_gann_backtest_logic(
+            api=api, acc=acc, v1req=v1req, ctx=ctx
+        )
 
         if strat.get("status") not in ("ok", "GAP_DAY"):
-            time.sleep(30)
+            pause(30)
             continue
 
         if strat["status"] == "GAP_DAY":
@@ -2576,8 +2599,10 @@ def run_live_loop_for_account(api, acc, date: str, expiry: str):
                     if exit_res["status"]:
                         trading_state.mark_exit()
 
-        time.sleep(60)
+        pause(60)
 
+    if stream is not None:
+        stream.stop()
     print(f"[LIVE-LOOP] Finished for {acc.name}")
 
 
@@ -2715,10 +2740,16 @@ def manual_override(req: ManualOverrideRequest) -> Dict[str, Any]:
     positions: list[dict] = []
 
     try:
+        # Sab strikes ke tokens ek hi chain lookup me
+        chain = resolve_chain(
+            [round_to_nearest_50(p) for p in (req.buy_prices or []) + (req.sell_prices or [])],
+            [req.expiry],
+        )
+
         # BUY side (CE)
         for i, raw_price in enumerate(req.buy_prices or []):
             strike = round_to_nearest_50(raw_price)
-            token = getoptiontoken(strike, req.expiry, "CE")
+            token = chain.token_for(strike, req.expiry, "CE")
             if not token:
                 print(
                     f"[MANUAL] CE token not found {raw_price} -> {strike} {req.expiry}")
@@ -2745,7 +2776,7 @@ def manual_override(req: ManualOverrideRequest) -> Dict[str, Any]:
         # SELL side (PE)
         for i, raw_price in enumerate(req.sell_prices or []):
             strike = round_to_nearest_50(raw_price)
-            token = getoptiontoken(strike, req.expiry, "PE")
+            token = chain.token_for(strike, req.expiry, "PE")
             if not token:
                 print(
                     f"[MANUAL] PE token not found {raw_price} -> {strike} {req.expiry}")